@@ -0,0 +1,286 @@
+import ast
+import math
+from functools import lru_cache
+import numpy as np # 用于向量化数值计算，需要安装 pip install numpy
+from calculation_formulas import KERNEL_CACHE_MAXSIZE, CompiledKernel, _TimedStage, _normalize_function_str
+
+# --- 前向模式自动微分后端 ---
+# 直接解析与 SymPy 相同语法的函数表达式，用向量化的对偶数同时计算函数值和梯度，
+# 不做符号求导，适合嵌套很深、符号求导会爆炸的长表达式。
+
+
+class Dual:
+    """
+    向量化对偶数：value 为函数值（标量或数组），grad 为 {变量序号: 偏导数} 的稀疏梯度。
+    只保存实际依赖的变量的偏导数，变量很多时也不会为每个变量分配完整的梯度数组。
+    """
+    __slots__ = ("value", "grad")
+
+    def __init__(self, value, grad: dict):
+        self.value = value
+        self.grad = grad
+
+
+def _parts(x):
+    if isinstance(x, Dual):
+        return x.value, x.grad
+    return x, {}
+
+
+def _combine(grad_a: dict, factor_a, grad_b: dict, factor_b) -> dict:
+    """计算 factor_a·grad_a + factor_b·grad_b。"""
+    result = {i: g * factor_a for i, g in grad_a.items()}
+    for i, g in grad_b.items():
+        if i in result:
+            result[i] = result[i] + g * factor_b
+        else:
+            result[i] = g * factor_b
+    return result
+
+
+def _add(a, b):
+    if not isinstance(a, Dual) and not isinstance(b, Dual):
+        return a + b
+    (va, ga), (vb, gb) = _parts(a), _parts(b)
+    return Dual(va + vb, _combine(ga, 1.0, gb, 1.0))
+
+
+def _sub(a, b):
+    if not isinstance(a, Dual) and not isinstance(b, Dual):
+        return a - b
+    (va, ga), (vb, gb) = _parts(a), _parts(b)
+    return Dual(va - vb, _combine(ga, 1.0, gb, -1.0))
+
+
+def _mul(a, b):
+    if not isinstance(a, Dual) and not isinstance(b, Dual):
+        return a * b
+    (va, ga), (vb, gb) = _parts(a), _parts(b)
+    return Dual(va * vb, _combine(ga, vb, gb, va))
+
+
+def _div(a, b):
+    if not isinstance(a, Dual) and not isinstance(b, Dual):
+        return a / b
+    (va, ga), (vb, gb) = _parts(a), _parts(b)
+    value = va / vb
+    return Dual(value, _combine(ga, 1.0 / vb, gb, -value / vb))
+
+
+def _pow(a, b):
+    if not isinstance(a, Dual) and not isinstance(b, Dual):
+        return a ** b
+    (va, ga), (vb, gb) = _parts(a), _parts(b)
+    value = va ** vb
+    if not gb:
+        # 指数为常数: d(a^c) = c·a^(c-1)·da
+        return Dual(value, _combine(ga, vb * va ** (vb - 1), {}, 0.0))
+    # 指数含变量: d(a^b) = a^b·(ln(a)·db + b·da/a)
+    return Dual(value, _combine(ga, vb * va ** (vb - 1), gb, value * np.log(va)))
+
+
+def _neg(a):
+    if not isinstance(a, Dual):
+        return -a
+    return Dual(-a.value, {i: -g for i, g in a.grad.items()})
+
+
+def _pos(a):
+    return a
+
+
+# 一元函数: 名称 -> (函数, 导数)，导数以 (自变量值 v, 函数值 fv) 计算
+_UNARY_FUNCTIONS = {
+    "sqrt": (np.sqrt, lambda v, fv: 0.5 / fv),
+    "abs": (np.abs, lambda v, fv: np.sign(v)),
+    "Abs": (np.abs, lambda v, fv: np.sign(v)),
+    "exp": (np.exp, lambda v, fv: fv),
+    "log": (np.log, lambda v, fv: 1.0 / v),
+    "ln": (np.log, lambda v, fv: 1.0 / v),
+    "sin": (np.sin, lambda v, fv: np.cos(v)),
+    "cos": (np.cos, lambda v, fv: -np.sin(v)),
+    "tan": (np.tan, lambda v, fv: 1.0 + fv**2),
+    "asin": (np.arcsin, lambda v, fv: 1.0 / np.sqrt(1.0 - v**2)),
+    "acos": (np.arccos, lambda v, fv: -1.0 / np.sqrt(1.0 - v**2)),
+    "atan": (np.arctan, lambda v, fv: 1.0 / (1.0 + v**2)),
+    "sinh": (np.sinh, lambda v, fv: np.cosh(v)),
+    "cosh": (np.cosh, lambda v, fv: np.sinh(v)),
+    "tanh": (np.tanh, lambda v, fv: 1.0 - fv**2),
+}
+
+_CONSTANTS = {"pi": math.pi, "E": math.e}
+
+_BINARY_OPS = {
+    ast.Add: _add,
+    ast.Sub: _sub,
+    ast.Mult: _mul,
+    ast.Div: _div,
+    ast.Pow: _pow,
+}
+
+_UNARY_OPS = {
+    ast.USub: _neg,
+    ast.UAdd: _pos,
+}
+
+# 指令类型
+_VAR, _CONST, _OP = "var", "const", "op"
+
+
+def _apply_unary(name: str, a):
+    func, derivative = _UNARY_FUNCTIONS[name]
+    if not isinstance(a, Dual):
+        return func(a)
+    value = func(a.value)
+    factor = derivative(a.value, value)
+    return Dual(value, {i: g * factor for i, g in a.grad.items()})
+
+
+def _log_with_base(x, base):
+    # log(x, b) = ln(x) / ln(b)
+    return _div(_apply_unary("log", x), _apply_unary("log", base))
+
+
+def _unary_function(name: str):
+    return lambda a: _apply_unary(name, a)
+
+
+def _build_tape(tree, var_index: dict[str, int]) -> list[tuple]:
+    """
+    把语法树展开为按求值顺序排列的指令列表，每条指令为 (类型, 变量序号/常数/运算函数, 参数所在的指令位置)。
+    结构相同的子表达式只生成一条指令，求值时只计算一次（相当于公共子表达式消除）：
+    每个节点以 (运算, 子节点的指令位置) 为键查找已生成的指令，子节点已先得到位置，建表的开销与表达式长度成正比。
+    只含常数的子表达式在建表时直接求值。
+    """
+    tape = []
+    slots = {}
+
+    def emit(key, step) -> int:
+        slot = slots.get(key)
+        if slot is None:
+            tape.append(step)
+            slot = slots[key] = len(tape) - 1
+        return slot
+
+    def constant(value) -> int:
+        value = float(value)
+        return emit((_CONST, value), (_CONST, value, ()))
+
+    def operation(key, func, args: tuple, node) -> int:
+        if key in slots:
+            return slots[key]
+        if all(tape[i][0] is _CONST for i in args):
+            try:
+                with np.errstate(all="raise"):
+                    value = float(func(*(tape[i][1] for i in args)))
+            except (ArithmeticError, ValueError, TypeError):
+                value = math.nan
+            if not math.isfinite(value):
+                raise ValueError(f"函数表达式无效: 常数运算 '{ast.unparse(node)}' 无定义或结果不是有限实数。")
+            return constant(value)
+        return emit(key, (_OP, func, args))
+
+    def visit(node) -> int:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return constant(node.value)
+
+        if isinstance(node, ast.Name):
+            if node.id in var_index:
+                return emit((_VAR, var_index[node.id]), (_VAR, var_index[node.id], ()))
+            return constant(_CONSTANTS[node.id]) # 未定义的名称已在 compile_autodiff_kernel 中检查
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            args = (visit(node.left), visit(node.right))
+            return operation((type(node.op), args), _BINARY_OPS[type(node.op)], args, node)
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            args = (visit(node.operand),)
+            return operation((type(node.op), args), _UNARY_OPS[type(node.op)], args, node)
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id
+            if name == "log" and len(node.args) == 2:
+                args = tuple(visit(arg) for arg in node.args)
+                return operation((_log_with_base, args), _log_with_base, args, node)
+            if name in _UNARY_FUNCTIONS and len(node.args) == 1:
+                args = (visit(node.args[0]),)
+                return operation((name, args), _unary_function(name), args, node)
+            raise ValueError(f"函数表达式无效: 不支持的函数调用 '{ast.unparse(node)}'。")
+
+        raise ValueError(f"函数表达式无效: 不支持的语法 '{ast.unparse(node)}'。")
+
+    visit(tree.body)
+    return tape
+
+
+def _run_tape(tape: list[tuple], env: list):
+    """按顺序执行指令；env 中的输入为数组时计算函数值，为 Dual 时同时计算梯度。"""
+    values = []
+    for kind, payload, args in tape:
+        if kind is _OP:
+            values.append(payload(*[values[i] for i in args]))
+        elif kind is _VAR:
+            values.append(env[payload])
+        else:
+            values.append(payload)
+    return values[-1]
+
+
+@lru_cache(maxsize=KERNEL_CACHE_MAXSIZE)
+def _compile_autodiff_kernel(function_str: str, var_names: tuple[str, ...]) -> CompiledKernel:
+    try:
+        # 与 SymPy 一致，'^' 也表示幂（在解析前替换，运算优先级与 '**' 相同）
+        with _TimedStage('parse'):
+            tree = ast.parse(function_str.replace("^", "**"), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"函数表达式无效: {e}")
+
+    # 检查未定义的名称（函数名除外）
+    function_names = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and id(node) not in function_names}
+    undefined = names - set(var_names) - set(_CONSTANTS)
+    if undefined:
+        raise ValueError(f"函数表达式中包含未输入的物理量: {', '.join(sorted(undefined))}")
+
+    used_names = tuple(name for name in var_names if name in names)
+    with _TimedStage('parse'):
+        tape = _build_tape(tree, {name: i for i, name in enumerate(var_names)})
+    seed_slots = {var_names.index(name): slot for slot, name in enumerate(used_names)}
+
+    def value_func(*args):
+        return _run_tape(tape, [np.asarray(x, dtype=float) for x in args])
+
+    def value_grad_func(*args):
+        env = []
+        for i, x in enumerate(args):
+            x = np.asarray(x, dtype=float)
+            # 出现在表达式中的变量以单位梯度作为种子
+            env.append(Dual(x, {seed_slots[i]: 1.0}) if i in seed_slots else x)
+        value, grad = _parts(_run_tape(tape, env))
+        return [value] + [grad.get(slot, 0.0) for slot in range(len(used_names))]
+
+    return CompiledKernel(
+        expr=None,
+        var_names=var_names,
+        used_names=used_names,
+        value_func=value_func,
+        value_grad_func=value_grad_func,
+    )
+
+
+def compile_autodiff_kernel(function_str: str, var_names) -> CompiledKernel:
+    """
+    生成自动微分后端的编译内核，接口与 SymPy 后端相同（expr 为 None）。
+    支持的语法与 UncertaintyPropagationCalculator.get_common_symbols_text 中列出的常量和函数一致。
+    Args:
+        function_str (str): 函数关系字符串，例如 'x1*x2 + sin(x3)'。
+        var_names: 全部输入物理量的变量名。
+    Returns:
+        CompiledKernel: 编译内核，其 var_names 为排序后的变量名。
+    """
+    return _compile_autodiff_kernel(_normalize_function_str(function_str), tuple(sorted(var_names)))
+
+
+def get_autodiff_cache_info():
+    """返回自动微分内核缓存的统计信息 (hits, misses, maxsize, currsize)。"""
+    return _compile_autodiff_kernel.cache_info()
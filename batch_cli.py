@@ -0,0 +1,326 @@
+"""
+不确定度批量计算命令行工具（无界面）。
+
+从 JSON-lines 或 CSV 任务文件读取计算任务，分发到进程池并行计算，
+按完成顺序将格式化结果流式写出到标准输出或文件，最后报告吞吐量。
+
+JSON-lines 任务（每行一个 JSON 对象，id 可省略，默认为任务序号）：
+  不确定度传递 (type 可省略；加上 "budget": true 时结果中包含各输入量的不确定度预算；
+  提供各输入量的自由度 "dof" 时结果中包含有效自由度 effective_dof、t_factor 与扩展不确定度 expanded_uncertainty，
+  置信水平由 "confidence" 给出，默认 0.95):
+    {"id": "a1", "function": "x1*x2", "values": {"x1": 1.0, "x2": 2.0}, "uncertainties": {"x1": 0.1, "x2": 0.2}}
+    {"function": "x1*x2", "values": {...}, "uncertainties": {...}, "dof": {"x1": 5}, "confidence": 0.95}
+  多次测量 (提供 "confidence" 时按数据个数自动确定 t因子，不再使用 t_factor；
+  "outliers" 为 "grubbs"、"chauvenet" 或 "3sigma" 时先剔除异常值，结果的 rejected_indices 字段为被剔除数据的下标):
+    {"type": "multiple", "data": [1.01, 1.02, 0.99], "t_factor": 1.0, "limit": 0.02, "distribution": "均匀分布"}
+  单次测量 (直尺类测量提供 value1 与 value2 代替 value):
+    {"type": "single", "value": 12.3, "min_division": 0.1, "reading_factor": 0.1, "limit": 0.05, "distribution": "均匀分布"}
+
+CSV 任务（仅支持不确定度传递）：表头包含 function 列、可选的 id 列，
+其余列中 <变量名> 为测量值、u_<变量名> 为不确定度，空单元格表示该任务不使用此变量。
+
+用法: python batch_cli.py jobs.jsonl [-o results.jsonl] [--workers 4] [--output-format csv] [--kernel-cache DIR] [--budget]
+--budget 为所有传递任务输出不确定度预算（budget 字段，见 calculation_formulas.propagate_uncertainty_budget），
+CSV 输出时该列为 JSON 文本。有效自由度、被剔除数据的下标等字段只写入 JSON-lines 输出。
+有任务失败时（失败原因写在该任务结果的 error 字段中）退出码为1。
+"""
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from calculation_formulas import (
+    calculate_a_uncertainty_multiple_measurements,
+    calculate_b_uncertainty_from_limit,
+    calculate_combined_uncertainty,
+    enable_kernel_disk_cache,
+    format_uncertainty_and_value,
+    propagate_uncertainty,
+    propagate_uncertainty_budget,
+)
+from outlier_rejection import calculate_a_uncertainty_with_outlier_rejection
+from t_distribution import DEFAULT_CONFIDENCE_LEVEL, propagate_uncertainty_with_dof
+
+# 每个分块包含的任务数：分块越大，进程间通信开销越小
+DEFAULT_CHUNK_SIZE = 64
+# 每个工作进程最多同时排队的分块数，用于限制内存占用
+MAX_PENDING_CHUNKS_PER_WORKER = 4
+UNCERTAINTY_COLUMN_PREFIX = "u_"
+
+
+# --- 任务读取 ---
+
+def _read_jsonl_jobs(file):
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            job = {"error": f"第 {line_number} 行不是有效的 JSON: {e}"}
+        if not isinstance(job, dict):
+            job = {"error": f"第 {line_number} 行必须是 JSON 对象。"}
+        job.setdefault("id", line_number)
+        yield job
+
+
+def _read_csv_jobs(file):
+    reader = csv.DictReader(file)
+    for row_number, row in enumerate(reader, start=1):
+        values = {}
+        uncertainties = {}
+        for column, cell in row.items():
+            if column in ("id", "function") or column is None or cell is None or not cell.strip():
+                continue
+            if column.startswith(UNCERTAINTY_COLUMN_PREFIX):
+                uncertainties[column[len(UNCERTAINTY_COLUMN_PREFIX):]] = cell.strip()
+            else:
+                values[column] = cell.strip()
+        yield {
+            "id": row.get("id") or row_number,
+            "function": row.get("function", ""),
+            "values": values,
+            "uncertainties": uncertainties,
+        }
+
+
+def read_jobs(file, input_format: str):
+    """按格式逐条读取任务，不会一次性把整个文件读入内存。"""
+    if input_format == "csv":
+        return _read_csv_jobs(file)
+    return _read_jsonl_jobs(file)
+
+
+# --- 任务计算（在工作进程中执行） ---
+
+def _to_float_dict(data, name: str) -> dict[str, float]:
+    if not isinstance(data, dict):
+        raise ValueError(f"'{name}' 必须是 {{变量名: 数值}} 形式。")
+    try:
+        return {str(k): float(v) for k, v in data.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' 中包含非数字项。")
+
+
+def _run_propagation_job(job: dict) -> tuple:
+    x_values = _to_float_dict(job.get("values", {}), "values")
+    u_x_values = _to_float_dict(job.get("uncertainties", {}), "uncertainties")
+    function_str = job.get("function", "").strip()
+    extra_fields = {}
+    if "dof" in job:
+        result = propagate_uncertainty_with_dof(
+            function_str, x_values, u_x_values, _to_float_dict(job["dof"], "dof"),
+            float(job.get("confidence", DEFAULT_CONFIDENCE_LEVEL)))
+        value, uncertainty = result.y_value, result.u_y
+        # 有效自由度为无穷大时写为 null，JSON 中没有 inf
+        extra_fields["effective_dof"] = result.effective_dof if math.isfinite(result.effective_dof) else None
+        extra_fields["t_factor"] = result.t_factor
+        extra_fields["expanded_uncertainty"] = result.expanded_uncertainty
+    if job.get("budget"):
+        value, uncertainty, extra_fields["budget"] = propagate_uncertainty_budget(function_str, x_values, u_x_values)
+    elif "dof" not in job:
+        value, uncertainty = propagate_uncertainty(function_str, x_values, u_x_values)
+    return value, uncertainty, extra_fields
+
+
+def _run_multiple_job(job: dict) -> tuple:
+    data_list = [float(x) for x in job.get("data", [])]
+    t_factor = float(job.get("t_factor", 1.0))
+    confidence_level = float(job["confidence"]) if "confidence" in job else None
+    extra_fields = {}
+    if job.get("outliers"):
+        mean_val, u_a, _, rejected_indices = calculate_a_uncertainty_with_outlier_rejection(
+            data_list, job["outliers"], t_factor, confidence_level)
+        extra_fields["rejected_indices"] = rejected_indices.tolist()
+    else:
+        mean_val, u_a, _ = calculate_a_uncertainty_multiple_measurements(data_list, t_factor, confidence_level)
+    u_b = calculate_b_uncertainty_from_limit(float(job["limit"]), job.get("distribution", "均匀分布"))
+    return mean_val, calculate_combined_uncertainty(u_a, u_b), extra_fields
+
+
+def _run_single_job(job: dict) -> tuple[float, float]:
+    u_b_instrument = calculate_b_uncertainty_from_limit(float(job["limit"]), job.get("distribution", "均匀分布"))
+    u_b_reading = float(job.get("reading_factor", 0.1)) * float(job["min_division"])
+    if "value1" in job or "value2" in job:
+        # 直尺类测量：两次读数各有一个估读不确定度
+        value = abs(float(job["value2"]) - float(job["value1"]))
+        u_b_reading = math.sqrt(2 * u_b_reading**2)
+    else:
+        value = float(job["value"])
+    return value, calculate_combined_uncertainty(u_b_instrument, u_b_reading)
+
+
+_JOB_RUNNERS = {
+    "propagation": _run_propagation_job,
+    "multiple": _run_multiple_job,
+    "single": _run_single_job,
+}
+
+
+def run_job(job: dict) -> dict:
+    """计算单个任务并返回结果记录，错误不会中断整个批次。"""
+    result = {"id": job.get("id")}
+    try:
+        if "error" in job:
+            raise ValueError(job["error"])
+        runner = _JOB_RUNNERS.get(job.get("type", "propagation"))
+        if runner is None:
+            raise ValueError(f"未知的任务类型: {job.get('type')}")
+        # 任务函数返回 (值, 不确定度) 或 (值, 不确定度, 附加字段)
+        value, uncertainty, *extra_fields = runner(job)
+        formatted_value, formatted_uncertainty = format_uncertainty_and_value(value, uncertainty)
+        result.update(y=formatted_value, u_y=formatted_uncertainty, y_raw=value, u_y_raw=uncertainty)
+        for fields in extra_fields:
+            result.update(fields)
+    except KeyError as e:
+        result["error"] = f"缺少字段: {e}"
+    except (ValueError, TypeError) as e:
+        result["error"] = str(e)
+    except Exception as e:
+        result["error"] = f"发生未知错误: {e}"
+    return result
+
+
+def run_job_chunk(jobs: list[dict]) -> list[dict]:
+    """计算一个任务分块。各工作进程的编译内核缓存会在分块之间复用。"""
+    return [run_job(job) for job in jobs]
+
+
+# --- 结果输出 ---
+
+class _ResultWriter:
+    def __init__(self, file, output_format: str, budget: bool = False):
+        self.file = file
+        self.output_format = output_format
+        if output_format == "csv":
+            fieldnames = ["id", "y", "u_y", "y_raw", "u_y_raw", "error"] + (["budget"] if budget else [])
+            # 未开启 --budget 时，单个任务要求的不确定度预算不写入 CSV
+            self.csv_writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction="ignore")
+            self.csv_writer.writeheader()
+
+    def write(self, results: list[dict]) -> None:
+        if self.output_format == "csv":
+            self.csv_writer.writerows(
+                dict(result, budget=json.dumps(result["budget"], ensure_ascii=False)) if "budget" in result else result
+                for result in results
+            )
+        else:
+            for result in results:
+                self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+
+def _chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_jobs(jobs, writer: _ResultWriter, workers: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 kernel_cache_directory: str = None) -> tuple[int, int]:
+    """
+    分块并行计算任务，并按完成顺序写出结果。
+    给定 kernel_cache_directory 时使用该目录中的编译内核磁盘缓存：单进程时在主进程中开启，
+    多进程时只由各工作进程的 initializer 开启（主进程不计算）。
+    Returns:
+        tuple[int, int]: (任务总数, 失败的任务数)
+    """
+    total = 0
+    failed = 0
+
+    def record(results):
+        nonlocal total, failed
+        total += len(results)
+        failed += sum(1 for result in results if "error" in result)
+        writer.write(results)
+
+    chunks = _chunked(jobs, chunk_size)
+    if workers <= 1:
+        if kernel_cache_directory is not None:
+            enable_kernel_disk_cache(kernel_cache_directory)
+        for chunk in chunks:
+            record(run_job_chunk(chunk))
+        return total, failed
+
+    max_pending = workers * MAX_PENDING_CHUNKS_PER_WORKER
+    initializer, initargs = None, ()
+    if kernel_cache_directory is not None:
+        initializer, initargs = enable_kernel_disk_cache, (kernel_cache_directory,)
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(run_job_chunk, chunk))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future.result())
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record(future.result())
+    return total, failed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="不确定度批量计算（无界面）")
+    parser.add_argument("jobs", help="任务文件 (.jsonl 或 .csv)，'-' 表示从标准输入读取 JSON-lines")
+    parser.add_argument("-o", "--output", help="结果输出文件，缺省时写到标准输出")
+    parser.add_argument("--input-format", choices=["jsonl", "csv"], help="任务文件格式，缺省时按扩展名判断")
+    parser.add_argument("--output-format", choices=["jsonl", "csv"], default="jsonl", help="结果格式 (默认 jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="工作进程数 (默认为CPU核数)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"每个分块的任务数 (默认 {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--kernel-cache", nargs="?", const="", metavar="DIR",
+                        help="开启编译内核磁盘缓存；不给出目录时使用默认缓存目录。"
+                             "缓存文件中的代码会被加载执行，目录必须只有当前用户可写（新建时权限为 0700），"
+                             "不要使用共享或来源不可信的目录；其他用户可写的目录会被拒绝")
+    parser.add_argument("--budget", action="store_true", help="为不确定度传递任务输出各输入量的不确定度预算")
+    args = parser.parse_args(argv)
+
+    input_format = args.input_format or ("csv" if args.jobs.lower().endswith(".csv") else "jsonl")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size 必须是正整数。")
+    if args.kernel_cache is not None:
+        # 这里只检查目录，缓存由 process_jobs 开启
+        from kernel_cache import prepare_cache_directory # 仅在使用时导入
+        try:
+            prepare_cache_directory(args.kernel_cache)
+        except (OSError, ValueError) as e:
+            parser.error(f"--kernel-cache: {e}")
+
+    input_file = sys.stdin if args.jobs == "-" else open(args.jobs, "r", encoding="utf-8", newline="")
+    output_file = sys.stdout if not args.output else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        start = time.perf_counter()
+        jobs = read_jobs(input_file, input_format)
+        if args.budget:
+            jobs = (dict(job, budget=job.get("budget", True)) for job in jobs)
+        total, failed = process_jobs(
+            jobs,
+            _ResultWriter(output_file, args.output_format, args.budget),
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            kernel_cache_directory=args.kernel_cache,
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    throughput = total / elapsed if elapsed > 0 else float("inf")
+    print(f"完成 {total} 个任务 (失败 {failed} 个)，用时 {elapsed:.2f} s，吞吐量 {throughput:.1f} jobs/s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+自动微分后端与 SymPy 后端的速度和一致性对比。
+
+对嵌套层数不同的表达式，分别测量两种后端的：
+1. 冷启动耗时：首次调用 propagate_uncertainty（解析 + 求导/编译 + 求值）；
+2. 热调用耗时：编译内核已缓存时，propagate_uncertainty_batch 对多行数据求值；
+3. 两者结果 (y, u_y) 的最大相对差异。
+
+用法: python benchmarks/bench_autodiff.py [--max-depth 5] [--rows 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from calculation_formulas import clear_kernel_cache, propagate_uncertainty, propagate_uncertainty_batch
+
+
+def build_nested_expression(depth: int) -> str:
+    """f0 = x1, f(k+1) = sin(fk)*x2 + cos(fk*x3)/(1 + fk**2)：表达式长度随层数指数增长。"""
+    expr = "x1"
+    for _ in range(depth):
+        expr = f"sin({expr})*x2 + cos(({expr})*x3)/(1 + ({expr})**2)"
+    return expr
+
+
+def relative_difference(a, b) -> float:
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    return float(np.max(np.abs(a - b) / np.maximum(np.abs(b), 1e-300)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    x_values = {"x1": 0.7, "x2": 1.3, "x3": 0.4}
+    u_x_values = {"x1": 0.01, "x2": 0.02, "x3": 0.005}
+    rng = np.random.default_rng(0)
+    batch_x = {name: value * rng.uniform(0.9, 1.1, args.rows) for name, value in x_values.items()}
+
+    print(f"{'层数':>4} {'表达式长度':>10} {'SymPy 冷启动 (s)':>16} {'AD 冷启动 (s)':>14} "
+          f"{'SymPy 批量 (ms)':>15} {'AD 批量 (ms)':>13} {'最大相对差异':>12}")
+    for depth in range(1, args.max_depth + 1):
+        function_str = build_nested_expression(depth)
+        clear_kernel_cache()
+
+        timings = {}
+        results = {}
+        for backend in ("sympy", "autodiff"):
+            start = time.perf_counter()
+            scalar = propagate_uncertainty(function_str, x_values, u_x_values, backend=backend)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch = propagate_uncertainty_batch(function_str, batch_x, u_x_values, backend=backend)
+            warm = time.perf_counter() - start
+
+            timings[backend] = (cold, warm)
+            results[backend] = (scalar, batch)
+
+        difference = max(
+            relative_difference(results["autodiff"][0], results["sympy"][0]),
+            relative_difference(results["autodiff"][1][0], results["sympy"][1][0]),
+            relative_difference(results["autodiff"][1][1], results["sympy"][1][1]),
+        )
+        print(f"{depth:>4} {len(function_str):>10} {timings['sympy'][0]:>16.3f} {timings['autodiff'][0]:>14.3f} "
+              f"{timings['sympy'][1] * 1e3:>15.1f} {timings['autodiff'][1] * 1e3:>13.1f} {difference:>12.1e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
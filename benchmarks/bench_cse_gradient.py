@@ -0,0 +1,95 @@
+"""
+公共子表达式消除 (CSE) 梯度求值器的性能对比。
+
+对变量数和子项数量不同的表达式，比较以下两种求值方式的耗时：
+1. 逐个偏导数分别求值（原先的做法，每个偏导数都重新计算共享的子项）；
+2. 编译内核中的 value_grad_func（函数值与全部偏导数合并，sympy.cse 提取公共子表达式）。
+输出表格中的加速比随变量数和表达式规模的增长情况。
+
+用法: python benchmarks/bench_cse_gradient.py [--rows 10000] [--repeat 5] [--vars 5,10,20,40]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import sympy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from calculation_formulas import get_compiled_kernel
+
+
+def build_expression(n_vars: int, n_terms: int) -> str:
+    """
+    构造含共享子项的表达式：所有项都依赖于 s = Σ xi² 与 q = Σ xi/10，
+    项数 n_terms 控制表达式规模。
+    """
+    names = [f"x{i + 1}" for i in range(n_vars)]
+    s = " + ".join(f"{name}**2" for name in names)
+    q = " + ".join(f"{name}/10" for name in names)
+    terms = [f"sqrt({s})*exp(-({s})/{n_vars * 10})"]
+    for k in range(n_terms):
+        name = names[k % n_vars]
+        terms.append(f"sin({name} + {k})*log(1 + {s})*exp(-({q}))")
+    return " + ".join(terms)
+
+
+def separate_evaluator(function_str: str, names: list[str]):
+    """逐个偏导数单独生成数值函数（不做 CSE），模拟原先的逐项求值。"""
+    symbols = [sympy.Symbol(name, real=True) for name in names]
+    expr = sympy.sympify(function_str, locals=dict(zip(names, symbols)))
+    value_func = sympy.lambdify(symbols, expr, modules="numpy")
+    grad_funcs = [sympy.lambdify(symbols, sympy.diff(expr, sym), modules="numpy") for sym in symbols]
+
+    def evaluate(*args):
+        return [value_func(*args)] + [grad_func(*args) for grad_func in grad_funcs]
+    return evaluate
+
+
+def best_time(func, args, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000, help="每次求值的数据行数")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--vars", default="5,10,20,40", help="逗号分隔的变量数列表")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'变量数':>6} {'项数':>6} {'逐项求值 (ms)':>14} {'CSE 求值 (ms)':>14} {'加速比':>8} {'最大相对误差':>12}")
+    for n_vars in (int(v) for v in args.vars.split(",")):
+        for n_terms in (n_vars, 4 * n_vars):
+            names = [f"x{i + 1}" for i in range(n_vars)]
+            function_str = build_expression(n_vars, n_terms)
+            columns = [rng.uniform(0.5, 2.0, args.rows) for _ in names]
+
+            kernel = get_compiled_kernel(function_str, names)
+            # 内核的参数顺序为排序后的变量名
+            kernel_args = [columns[names.index(name)] for name in kernel.var_names]
+            separate = separate_evaluator(function_str, names)
+
+            separate_time = best_time(separate, columns, args.repeat)
+            cse_time = best_time(kernel.value_grad_func, kernel_args, args.repeat)
+
+            expected = separate(*columns)
+            actual = kernel.value_grad_func(*kernel_args)
+            order = [0] + [1 + kernel.used_names.index(name) for name in names]
+            error = max(
+                float(np.max(np.abs(actual[j] - expected[i]) / np.maximum(np.abs(expected[i]), 1e-300)))
+                for i, j in enumerate(order)
+            )
+            print(f"{n_vars:>6} {n_terms:>6} {separate_time * 1e3:>14.2f} {cse_time * 1e3:>14.2f} "
+                  f"{separate_time / cse_time:>7.1f}x {error:>12.1e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
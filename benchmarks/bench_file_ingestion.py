@@ -0,0 +1,78 @@
+"""
+从测量数据文件计算A类不确定度的性能与内存测试。
+
+生成一个原始 float64 文件（以及可选的 .npy 文件），用 calculate_a_uncertainty_from_file
+分块计算平均值、S_x 和 u_A，报告耗时、吞吐量和 NumPy 分配的峰值内存（tracemalloc），
+并与逐块写入文件时同步累加的参考统计量比较。
+
+用法: python benchmarks/bench_file_ingestion.py [--n 50000000] [--chunk-size 1048576] [--npy]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from calculation_formulas import FILE_CHUNK_SIZE, RunningStatistics, calculate_a_uncertainty_from_file
+
+# 生成文件时每次写入的数据个数
+WRITE_BLOCK = 1 << 22
+
+
+def write_data_file(path: str, n: int, seed: int, as_npy: bool) -> RunningStatistics:
+    """分块生成正态分布数据并写入文件，同时返回参考统计量；生成过程不需要把全部数据放入内存。"""
+    rng = np.random.default_rng(seed)
+    reference = RunningStatistics()
+    if as_npy:
+        output = np.lib.format.open_memmap(path, mode="w+", dtype="<f8", shape=(n,))
+        for start in range(0, n, WRITE_BLOCK):
+            block = rng.normal(10.0, 0.5, min(WRITE_BLOCK, n - start))
+            reference.update(block)
+            output[start:start + block.size] = block
+        output.flush()
+        del output
+    else:
+        with open(path, "wb") as f:
+            for start in range(0, n, WRITE_BLOCK):
+                block = rng.normal(10.0, 0.5, min(WRITE_BLOCK, n - start))
+                reference.update(block)
+                f.write(block.astype("<f8").tobytes())
+    return reference
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=50_000_000, help="数据个数 (默认 5e7，约 400 MB)")
+    parser.add_argument("--chunk-size", type=int, default=FILE_CHUNK_SIZE)
+    parser.add_argument("--npy", action="store_true", help="使用 .npy 文件代替原始 float64 文件")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.npy" if args.npy else "data.f64")
+        reference = write_data_file(path, args.n, args.seed, args.npy)
+        size_mb = os.path.getsize(path) / 2**20
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        mean_val, u_a, s_x = calculate_a_uncertainty_from_file(path, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    ref_mean, ref_u_a, ref_s_x = reference.result()
+    relative_difference = max(abs(mean_val - ref_mean) / abs(ref_mean), abs(s_x - ref_s_x) / ref_s_x)
+    print(f"文件大小: {size_mb:.0f} MB ({args.n} 个数据)")
+    print(f"耗时: {elapsed:.2f} s，吞吐量 {size_mb / elapsed:.0f} MB/s")
+    print(f"峰值内存分配: {peak / 2**20:.1f} MB (分块大小 {args.chunk_size})")
+    print(f"平均值 {mean_val:.9g}, S_x {s_x:.9g}, u_A {u_a:.6g}; 与参考值的最大相对差异 {relative_difference:.1e}")
+    return 0 if relative_difference < 1e-9 and math.isfinite(u_a) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
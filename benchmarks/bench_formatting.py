@@ -0,0 +1,67 @@
+"""
+format_uncertainty_and_value_batch 与逐条调用 format_uncertainty_and_value 的耗时对比。
+
+两者结果一致性的差分检验在 tests/test_formatting.py 中。
+
+用法: python benchmarks/bench_formatting.py [--n 200000] [--seed 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from calculation_formulas import format_uncertainty_and_value, format_uncertainty_and_value_batch
+
+
+def build_corpus(n: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """生成覆盖多个数量级、正负号、舍入边界和恰好为5的情形的语料。"""
+    rng = np.random.default_rng(seed)
+    quarter = n // 4
+
+    # 1. 任意数量级的测量值与不确定度
+    values = rng.choice([-1, 1], n) * 10.0**rng.uniform(-6, 6, n)
+    uncertainties = 10.0**rng.uniform(-8, 4, n)
+
+    # 2. 不确定度恰好在两位有效数字的舍入边界附近，例如 0.0995、0.125、9.95
+    mantissa = rng.integers(100, 1000, quarter) + 0.5
+    uncertainties[:quarter] = mantissa * 10.0**rng.integers(-9, 2, quarter).astype(float)
+
+    # 3. 测量值的判断位恰好为5（"五成双"）或5后还有数字（"5后有数就入"）
+    digits = rng.integers(0, 10**6, quarter)
+    tails = rng.choice(["5", "50", "51", "500001", "4", "6"], quarter)
+    values[quarter:2 * quarter] = [float(f"{d / 1000:.3f}{t}") for d, t in zip(digits, tails)]
+    uncertainties[quarter:2 * quarter] = 0.012
+
+    # 4. 不确定度为0的特殊情形
+    uncertainties[2 * quarter:2 * quarter + quarter // 10] = 0.0
+    return values, uncertainties
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    values, uncertainties = build_corpus(args.n, args.seed)
+
+    start = time.perf_counter()
+    for value, uncertainty in zip(values.tolist(), uncertainties.tolist()):
+        format_uncertainty_and_value(value, uncertainty)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    format_uncertainty_and_value_batch(values, uncertainties)
+    batch_time = time.perf_counter() - start
+
+    print(f"样本数: {args.n}")
+    print(f"format_uncertainty_and_value (逐条): {reference_time:.3f} s")
+    print(f"format_uncertainty_and_value_batch:  {batch_time:.3f} s "
+          f"({reference_time / batch_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
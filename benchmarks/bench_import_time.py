@@ -0,0 +1,75 @@
+"""
+导入耗时检查：用 python -X importtime 测量计算核心模块的冷启动导入时间。
+
+检查两项内容，任一不满足时以非零状态码退出：
+1. 导入模块后 numpy、sympy、tkinter 等重量级依赖尚未被加载；
+2. 模块的累计导入时间（取多次运行的最小值）不超过预算。
+tests/test_import_time.py 在测试中以默认参数做同样的检查；本脚本用于手动检查其他模块或预算。
+
+用法: python benchmarks/bench_import_time.py [--module calculation_formulas] [--budget-ms 100] [--runs 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# 计算核心在导入阶段不应加载的模块
+HEAVY_MODULES = ("numpy", "sympy", "tkinter", "customtkinter")
+
+
+def measure_import(module: str) -> tuple[float, list[str]]:
+    """
+    在新的解释器中导入模块。
+    Returns:
+        tuple[float, list[str]]: (累计导入时间 ms, 已被加载的重量级模块)
+    """
+    code = (
+        f"import {module}, sys; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative_us = None
+    for line in completed.stderr.splitlines():
+        # 格式: "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            cumulative_us = int(fields[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"未能在 -X importtime 输出中找到模块 {module}。")
+    loaded = [name for name in completed.stdout.strip().split(",") if name]
+    return cumulative_us / 1000, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="calculation_formulas")
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    timings = []
+    loaded = []
+    for _ in range(args.runs):
+        elapsed_ms, loaded = measure_import(args.module)
+        timings.append(elapsed_ms)
+    best = min(timings)
+
+    print(f"{args.module}: 累计导入时间 最小 {best:.1f} ms / 最大 {max(timings):.1f} ms (预算 {args.budget_ms:.0f} ms)")
+    failed = False
+    if loaded:
+        print(f"失败: 导入 {args.module} 时加载了重量级依赖: {', '.join(loaded)}")
+        failed = True
+    if best > args.budget_ms:
+        print(f"失败: 导入时间超出预算 {best - args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+编译内核磁盘缓存的效果测试。
+
+在全新的子进程中编译一组函数表达式两次：第一次缓存为空（需要解析、求导和生成代码），
+第二次从磁盘缓存加载。两次都预先导入 numpy / sympy，只比较编译部分的耗时，并检查结果一致。
+
+用法: python benchmarks/bench_kernel_cache.py [--formulas 20] [--vars 6]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD_SCRIPT = """
+import json, sys, time
+import numpy, sympy, sympy.utilities.lambdify
+from calculation_formulas import enable_kernel_disk_cache, propagate_uncertainty
+directory, n_formulas, n_vars = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+enable_kernel_disk_cache(directory)
+x_values = {f"x{i}": 1.0 + 0.1 * i for i in range(1, n_vars + 1)}
+u_x_values = {name: 0.01 for name in x_values}
+start = time.perf_counter()
+results = []
+for j in range(n_formulas):
+    terms = [f"sin(x{i})*exp(-x{i % n_vars + 1}/{j + 2})/sqrt(1 + x{i}**2)" for i in range(1, n_vars + 1)]
+    results.append(propagate_uncertainty(" + ".join(terms), x_values, u_x_values))
+print(json.dumps({"elapsed": time.perf_counter() - start, "results": results}))
+"""
+
+
+def run_child(directory: str, n_formulas: int, n_vars: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, directory, str(n_formulas), str(n_vars)],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--formulas", type=int, default=20)
+    parser.add_argument("--vars", type=int, default=6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cold = run_child(directory, args.formulas, args.vars)
+        warm = run_child(directory, args.formulas, args.vars)
+
+    print(f"冷启动 (无缓存): {cold['elapsed'] * 1e3:8.1f} ms")
+    print(f"热启动 (磁盘缓存): {warm['elapsed'] * 1e3:8.1f} ms")
+    print(f"加速比: {cold['elapsed'] / warm['elapsed']:.1f}x")
+    if cold["results"] != warm["results"]:
+        print("错误: 两次计算结果不一致")
+        return 1
+    print("两次计算结果一致")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+parse_float_array 的差分检验与性能对比。
+
+1. 在随机生成的文本（各种分隔符、空项、非数字项）上比较 parse_float_array 与 parse_float_list：
+   两者要么得到相同的数值，要么都报错；
+2. 对大量数据比较两者的耗时与峰值内存（tracemalloc 统计的 Python 内存分配）。
+
+用法: python benchmarks/bench_parse.py [--n 1000000] [--cases 20000] [--seed 0]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from calculation_formulas import parse_float_array, parse_float_list
+
+TOKENS = ["1", "-1", "-2.5", "3e-4", "+.5", "1.", "nan", "-inf", "1e999", "1_000", "007", "abc", "1..2", "nan(1)", ""]
+SEPARATORS = [",", ", ", " ,", "，", " ", "  ", "　", ",,", " , "]
+
+
+def random_text(rng: np.random.Generator) -> str:
+    n = int(rng.integers(0, 8))
+    # 大部分用例只使用有效数字，以覆盖快速解析路径
+    tokens = TOKENS[:9] if rng.random() < 0.7 else TOKENS
+    parts = [str(rng.choice(tokens)) for _ in range(n)]
+    separators = [str(rng.choice(SEPARATORS)) for _ in range(n + 1)]
+    return separators[0] * int(rng.integers(0, 2)) + "".join(p + s for p, s in zip(parts, separators[1:]))
+
+
+def outcome(parse, text: str):
+    try:
+        return np.asarray(parse(text), dtype=float).tobytes()
+    except ValueError:
+        return "ERR"
+
+
+def measure(parse, text: str) -> tuple[float, float]:
+    """返回 (耗时 s, 峰值内存 MB)。"""
+    start = time.perf_counter()
+    parse(text)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    parse(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--cases", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    mismatches = 0
+    for _ in range(args.cases):
+        text = random_text(rng)
+        if outcome(parse_float_array, text) != outcome(parse_float_list, text):
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"不一致: {text!r}")
+    print(f"差分检验: {args.cases} 个用例，{mismatches} 个不一致")
+
+    numbers = rng.normal(10.0, 0.1, args.n)
+    print(f"\n{'数据':<18} {'函数':<18} {'耗时 (ms)':>10} {'峰值内存 (MB)':>14}")
+    for label, separator in [("逗号分隔", ", "), ("空格分隔", " "), ("中文逗号分隔", "，")]:
+        text = separator.join(f"{x:.6f}" for x in numbers)
+        for parse in (parse_float_list, parse_float_array):
+            elapsed, peak = measure(parse, text)
+            print(f"{label:<16} {parse.__name__:<18} {elapsed * 1e3:>10.1f} {peak:>14.1f}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+custom_round_decimal / custom_round_decimal_array 的差分检验与性能对比。
+
+将快速实现与原先基于 Decimal 的实现（保存在本脚本中作为参照）逐条比较，
+任何不一致都会打印出来并以非零状态码退出；随后比较三者的耗时。
+
+用法: python benchmarks/bench_rounding.py [--n 500000] [--seed 0]
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_HALF_DOWN
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from calculation_formulas import custom_round_decimal, custom_round_decimal_array
+
+
+def reference_round(number: float, decimals: int) -> float:
+    """原先的 Decimal 实现，作为差分检验的参照。"""
+    d_num_str = str(number)
+    d_num = Decimal(d_num_str)
+    quantize_to = Decimal('1') if decimals == 0 else Decimal('1e-{}'.format(decimals))
+    dot_index = d_num_str.find('.')
+    if dot_index == -1:
+        return float(d_num)
+    required_length_after_dot = decimals + 1
+    if len(d_num_str) - dot_index - 1 < required_length_after_dot:
+        return float(d_num.quantize(quantize_to, rounding=ROUND_HALF_EVEN))
+    target_index = dot_index + required_length_after_dot
+    digit_to_check = int(d_num_str[target_index])
+    has_non_zero_after_five = bool(d_num_str[target_index + 1:].strip('0'))
+    if digit_to_check < 5:
+        return float(d_num.quantize(quantize_to, rounding=ROUND_HALF_DOWN))
+    elif digit_to_check > 5 or has_non_zero_after_five:
+        return float(d_num.quantize(quantize_to, rounding=ROUND_HALF_UP))
+    return float(d_num.quantize(quantize_to, rounding=ROUND_HALF_EVEN))
+
+
+def build_corpus(n: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """随机数量级的数字，以及判断位恰好为5、5后有数字等边界情形。"""
+    rng = np.random.default_rng(seed)
+    half = n // 2
+    numbers = rng.choice([-1, 1], n) * 10.0**rng.uniform(-3, 6, n)
+    decimals = rng.integers(0, 8, n)
+
+    digits = rng.integers(0, 10**7, half)
+    tails = rng.choice(["5", "50", "51", "5000001", "49", "6"], half)
+    places = rng.integers(0, 5, half)
+    numbers[:half] = [float(f"{d / 10**p:.{p}f}{t}") if p else float(f"{d}.{t}")
+                      for d, t, p in zip(digits, tails, places)]
+    decimals[:half] = places
+    return numbers, decimals
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    numbers, decimals = build_corpus(args.n, args.seed)
+    number_list, decimal_list = numbers.tolist(), decimals.tolist()
+    # 原实现对科学计数法表示的数（如 '1.5e-07'）按字符位置判断，结果无意义，不参与比较
+    comparable = ['e' not in str(x) for x in number_list]
+
+    start = time.perf_counter()
+    reference = [reference_round(x, d) if ok else None for x, d, ok in zip(number_list, decimal_list, comparable)]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = [custom_round_decimal(x, d) for x, d in zip(number_list, decimal_list)]
+    fast_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = custom_round_decimal_array(numbers, decimals).tolist()
+    vectorized_time = time.perf_counter() - start
+
+    mismatches = 0
+    for i, expected in enumerate(reference):
+        if expected is None:
+            continue
+        if not (expected == fast[i] == vectorized[i]):
+            mismatches += 1
+            if mismatches <= 20:
+                print(f"不一致: number={number_list[i]!r} decimals={decimal_list[i]} "
+                      f"reference={expected!r} fast={fast[i]!r} vectorized={vectorized[i]!r}")
+
+    print(f"样本数: {args.n}, 不一致: {mismatches}, 跳过: {comparable.count(False)}")
+    print(f"Decimal 参照实现:            {reference_time:.3f} s")
+    print(f"custom_round_decimal:       {fast_time:.3f} s ({reference_time / fast_time:.1f}x)")
+    print(f"custom_round_decimal_array: {vectorized_time:.3f} s ({reference_time / vectorized_time:.1f}x)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+输入物理量表格的耗时测试：在不确定度传递页面中逐个点击“添加物理量”添加 500 个物理量，
+再导入一个包含几千个物理量的项目，记录耗时以及实际创建的输入框行数。
+
+表格只为可见的行创建输入框，每次添加的耗时应与已有物理量的个数无关（最后几次添加不比最初几次慢），
+输入框行数应只取决于表格高度。需要图形界面 (DISPLAY)；没有图形界面时以非零状态码退出。
+
+用法: python benchmarks/bench_variable_table.py [--count 500] [--import-count 5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# 每次添加的耗时分别取最初和最后这么多次的平均值进行比较
+SAMPLE_SIZE = 50
+
+
+class _App:
+    """页面需要的主程序接口（返回主菜单），测试中不使用。"""
+
+    def create_main_menu(self):
+        pass
+
+
+def bench_add_variables(page, count: int) -> list[float]:
+    """逐个添加 count 个物理量，返回每次添加（包括界面刷新）的耗时 (s)。"""
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        page.add_input_variable()
+        page.update_idletasks()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def bench_load_project(page, count: int) -> float:
+    from project_file import Formula, Project, Variable
+    project = Project(
+        [Formula("y", " + ".join(f"x{i + 1}" for i in range(count)))],
+        [Variable(f"x{i + 1}", float(i), 0.01) for i in range(count)],
+        {},
+    )
+    start = time.perf_counter()
+    page.load_project(project)
+    page.update_idletasks()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=500, help="逐个添加的物理量个数")
+    parser.add_argument("--import-count", type=int, default=5000, help="导入的项目中的物理量个数")
+    args = parser.parse_args()
+
+    import customtkinter as ctk
+    from uncertainty_propagation import UncertaintyPropagationCalculator
+    try:
+        root = ctk.CTk()
+    except Exception as e:
+        print(f"无法创建窗口（需要图形界面）: {e}", file=sys.stderr)
+        sys.exit(1)
+    root.geometry("900x800")
+    page = UncertaintyPropagationCalculator(root, _App())
+    page.pack(fill="both", expand=True)
+    root.update()
+
+    try:
+        durations = bench_add_variables(page, args.count)
+        table = page.input_vars_frame
+        sample = min(SAMPLE_SIZE, len(durations))
+        first_ms = sum(durations[:sample]) / sample * 1e3
+        last_ms = sum(durations[-sample:]) / sample * 1e3
+        print(f"添加 {args.count} 个物理量: 共 {sum(durations) * 1e3:.1f} ms")
+        print(f"  最初 {sample} 次平均 {first_ms:.2f} ms/次，最后 {sample} 次平均 {last_ms:.2f} ms/次")
+        print(f"  表格中共 {len(table)} 个物理量，创建的输入框行数 {len(table._slots)}")
+
+        load_seconds = bench_load_project(page, args.import_count)
+        print(f"导入 {args.import_count} 个物理量的项目: {load_seconds * 1e3:.1f} ms，"
+              f"创建的输入框行数 {len(table._slots)}")
+    finally:
+        page.destroy()
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+calculation_server 的本地压力测试。
+
+在子进程中启动计算服务（端口自动选择），用多个客户端线程通过长连接并发发送 /propagate 请求，
+统计吞吐量与延迟分位数，并抽查结果与直接调用 propagate_uncertainty 的结果一致（相对误差不超过 1e-12）。
+默认分别测试开启与关闭请求合并两种情况。
+
+用法: python benchmarks/load_test_server.py [--clients 16] [--requests 300] [--formulas 2] [--heavy] [--batch-window-ms 2]
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_ROOT)
+from calculation_formulas import propagate_uncertainty
+
+FORMULAS = [
+    "x1*sin(x2)/sqrt(x3**2 + 1) + exp(-x1/x3)",
+    "sqrt(x1**2 + x2**2 + x3**2)",
+    "x1*x2/x3 + log(x1 + x2)",
+    "atan(x2/x1)*x3",
+]
+# --heavy 时使用的变量数：每个表达式含有大量共享子项，求值耗时远大于 HTTP 处理
+HEAVY_N_VARS = 24
+
+
+def heavy_formula(index: int) -> str:
+    terms = [f"sin(x{i})*exp(-x{i % HEAVY_N_VARS + 1}/x{i})/sqrt({index + 1} + x{i}**2)" for i in range(1, HEAVY_N_VARS + 1)]
+    return " + ".join(terms)
+
+
+def start_server(batch_window_ms: float) -> tuple[subprocess.Popen, int]:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "calculation_server.py"), "--port", "0",
+         "--batch-window-ms", str(batch_window_ms)],
+        cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    line = process.stdout.readline() # "计算服务已启动: http://127.0.0.1:端口"
+    if not line:
+        process.kill()
+        raise RuntimeError("计算服务启动失败")
+    return process, int(line.strip().rsplit(":", 1)[1])
+
+
+def build_requests(n: int, n_formulas: int, seed: int, heavy: bool = False) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    n_vars = HEAVY_N_VARS if heavy else 3
+    requests = []
+    for i in range(n):
+        x = rng.uniform(1.0, 2.0, n_vars)
+        requests.append({
+            "function": heavy_formula(i % n_formulas) if heavy else FORMULAS[i % n_formulas],
+            "values": {f"x{j + 1}": float(x[j]) for j in range(n_vars)},
+            "uncertainties": {f"x{j + 1}": 0.01 for j in range(n_vars)},
+        })
+    return requests
+
+
+def run_client(port: int, requests: list[dict], latencies: list, responses: list) -> None:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        for request in requests:
+            body = json.dumps(request).encode("utf-8")
+            start = time.perf_counter()
+            connection.request("POST", "/propagate", body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            data = json.loads(response.read())
+            latencies.append(time.perf_counter() - start)
+            responses.append((request, response.status, data))
+    finally:
+        connection.close()
+
+
+def get_json(port: int, path: str) -> dict:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        connection.request("GET", path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def load_test(args, batch_window_ms: float) -> int:
+    process, port = start_server(batch_window_ms)
+    try:
+        # 预热：每个函数表达式先编译一次，使测量结果不包含首次编译的耗时
+        run_client(port, build_requests(args.formulas, args.formulas, args.seed, args.heavy), [], [])
+
+        latencies, responses = [], []
+        threads = [
+            threading.Thread(target=run_client, args=(
+                port, build_requests(args.requests, args.formulas, args.seed + i, args.heavy), latencies, responses))
+            for i in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        health = get_json(port, "/health")
+    finally:
+        process.terminate()
+        process.wait()
+
+    failures = 0
+    for request, status, data in responses[::max(1, len(responses) // 200)]: # 抽查
+        expected = propagate_uncertainty(request["function"], request["values"], request["uncertainties"])
+        # 向量化求值与标量求值使用的 NumPy 实现不同，结果可能相差几个 ULP
+        if status != 200 or not np.allclose((data["y_raw"], data["u_y_raw"]), expected, rtol=1e-12, atol=0):
+            failures += 1
+    failures += sum(1 for _, status, _ in responses if status != 200)
+
+    latencies_ms = sorted(latency * 1e3 for latency in latencies)
+    quantiles = statistics.quantiles(latencies_ms, n=100)
+    mode = f"合并窗口 {batch_window_ms:g} ms" if batch_window_ms > 0 else "不合并"
+    average_batch = health["batched_requests"] / health["batches"] if health["batches"] else 1.0
+    print(f"[{mode}] {len(responses)} 个请求, {elapsed:.2f} s, 吞吐量 {len(responses) / elapsed:.0f} req/s, "
+          f"延迟 p50 {quantiles[49]:.2f} ms / p99 {quantiles[98]:.2f} ms, 平均每批 {average_batch:.1f} 个请求, "
+          f"错误 {failures} 个")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=16, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=300, help="每个客户端发送的请求数")
+    parser.add_argument("--formulas", type=int, default=2, choices=range(1, len(FORMULAS) + 1),
+                        help="请求中使用的不同函数表达式个数")
+    parser.add_argument("--heavy", action="store_true", help=f"使用 {HEAVY_N_VARS} 个变量的长表达式")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = 0
+    for batch_window_ms in (0.0, args.batch_window_ms):
+        failures += load_test(args, batch_window_ms)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
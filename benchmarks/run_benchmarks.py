@@ -0,0 +1,306 @@
+"""
+calculation_formulas 热点函数的基准测试套件（无界面，不导入 tkinter）。
+
+覆盖以下函数，每个用例重复运行多次，记录最短耗时与中位耗时：
+- propagate_uncertainty: 不同变量数与表达式嵌套深度，分别测量首次编译 (cold) 与缓存命中 (warm)；
+- propagate_uncertainty_multi: 共用输入量的多个输出，与逐个调用 propagate_uncertainty 比较；
+- propagate_uncertainty_second_order(_batch): 二阶泰勒展开传递，单次调用与 10^5 行批量计算；
+- calculate_a_uncertainty_multiple_measurements: 10 ~ 10^7 个测量数据；
+- reject_outliers: 含少量异常值的 10^4 ~ 10^6 个测量数据，三种判别准则；
+- read_project / write_project: 含 10^3 ~ 10^5 个物理量的项目文件；
+- parse_float_list 与 parse_float_array: 大段粘贴的数据文本；
+- format_uncertainty_and_value 与 custom_round_decimal: 大量逐个调用。
+
+结果保存为 JSON；给定基准文件时逐项比较最短耗时，任一用例变慢超过阈值则以非零状态码退出。
+仓库中的 benchmarks/baseline.json 是按下面第一条命令生成的基准，其中 environment 记录了生成时的
+Python / NumPy / SymPy 版本和机器信息。耗时与机器有关，在其他机器上比较前应先在同一台机器上重新生成基准。
+
+用法:
+  python benchmarks/run_benchmarks.py -o benchmarks/baseline.json          # 保存基准
+  python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json  # 与基准比较
+  可选: [--threshold 0.2] [--repeat 5] [--quick] [--filter propagate]
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from outlier_rejection import OUTLIER_METHODS, reject_outliers
+from project_file import Formula, Project, Variable, read_project, write_project
+from second_order import propagate_uncertainty_second_order, propagate_uncertainty_second_order_batch
+from calculation_formulas import (
+    calculate_a_uncertainty_multiple_measurements,
+    clear_kernel_cache,
+    custom_round_decimal,
+    format_uncertainty_and_value,
+    parse_float_array,
+    parse_float_list,
+    propagate_uncertainty,
+    propagate_uncertainty_multi,
+)
+
+# 结果文件格式版本
+RESULT_FORMAT_VERSION = 1
+# 默认回归阈值：比基准慢 20% 以上视为性能回归
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_SEED = 0
+
+
+# --- 用例 ---
+
+def build_propagation_expression(n_vars: int, depth: int) -> str:
+    """n_vars 个变量之和，每一项嵌套 depth 层: t -> sin(t)*x(i+1) + 0.5。"""
+    terms = []
+    for i in range(1, n_vars + 1):
+        term = f"x{i}"
+        for _ in range(depth):
+            term = f"sin({term})*x{i % n_vars + 1} + 0.5"
+        terms.append(f"({term})")
+    return " + ".join(terms)
+
+
+def propagation_cases(quick: bool):
+    sizes = [(2, 1), (8, 2)] if quick else [(2, 1), (2, 4), (8, 1), (8, 4), (24, 2)]
+    for n_vars, depth in sizes:
+        function_str = build_propagation_expression(n_vars, depth)
+        x_values = {f"x{i}": 1.0 + 0.1 * i for i in range(1, n_vars + 1)}
+        u_x_values = {name: 0.01 for name in x_values}
+
+        def cold(function_str=function_str, x_values=x_values, u_x_values=u_x_values):
+            clear_kernel_cache()
+            propagate_uncertainty(function_str, x_values, u_x_values)
+
+        def warm(function_str=function_str, x_values=x_values, u_x_values=u_x_values):
+            propagate_uncertainty(function_str, x_values, u_x_values)
+
+        yield f"propagate/cold/vars={n_vars}/depth={depth}", cold, 1, None
+        propagate_uncertainty(function_str, x_values, u_x_values) # 预热缓存
+        yield f"propagate/warm/vars={n_vars}/depth={depth}", warm, 1000, None
+
+
+def multi_output_cases(quick: bool):
+    """m 个输出共用 8 个输入量，且都包含同一个较长的子表达式。"""
+    n_vars = 8
+    shared = build_propagation_expression(n_vars, 2)
+    x_values = {f"x{i}": 1.0 + 0.1 * i for i in range(1, n_vars + 1)}
+    u_x_values = {name: 0.01 for name in x_values}
+    for m in (2, 4) if quick else (2, 4, 8):
+        function_strs = [f"({shared})*x{i} + x{i % n_vars + 1}**2" for i in range(1, m + 1)]
+
+        def multi(function_strs=function_strs):
+            propagate_uncertainty_multi(function_strs, x_values, u_x_values)
+
+        def separate(function_strs=function_strs):
+            for function_str in function_strs:
+                propagate_uncertainty(function_str, x_values, u_x_values)
+
+        yield f"propagate_multi/warm/outputs={m}", multi, 200, m
+        yield f"propagate_multi/separate/outputs={m}", separate, 200, m
+
+
+def second_order_cases(quick: bool, rng: np.random.Generator):
+    function_str = build_propagation_expression(4, 2)
+    x_values = {f"x{i}": 1.0 + 0.1 * i for i in range(1, 5)}
+    u_x_values = {name: 0.05 for name in x_values}
+    propagate_uncertainty_second_order(function_str, x_values, u_x_values) # 预热缓存
+    yield ("second_order/warm/vars=4/depth=2",
+           lambda: propagate_uncertainty_second_order(function_str, x_values, u_x_values), 200, None)
+
+    n = 10**4 if quick else 10**5
+    x_columns = {name: rng.uniform(1.0, 2.0, n) for name in x_values}
+    yield (f"second_order_batch/vars=4/depth=2/n={n}",
+           lambda: propagate_uncertainty_second_order_batch(function_str, x_columns, u_x_values), 1, n)
+
+
+def type_a_cases(quick: bool, rng: np.random.Generator):
+    exponents = range(1, 6) if quick else range(1, 8)
+    for exponent in exponents:
+        data = rng.normal(10.0, 0.1, 10**exponent)
+        # 界面中的数据是列表；10^7 个数据的列表占用内存过大，使用数组
+        data = data if exponent >= 7 else data.tolist()
+        yield (f"type_a/n=1e{exponent}", lambda data=data: calculate_a_uncertainty_multiple_measurements(data),
+               1, 10**exponent)
+
+
+def outlier_cases(quick: bool, rng: np.random.Generator):
+    for exponent in (4, 5) if quick else (4, 5, 6):
+        n = 10**exponent
+        data = rng.normal(10.0, 0.1, n)
+        # 约千分之一的数据为偏差很大的异常值
+        glitches = rng.choice(n, n // 1000, replace=False)
+        data[glitches] += rng.normal(0.0, 100.0, glitches.size)
+        for method in OUTLIER_METHODS:
+            yield (f"reject_outliers/{method}/n=1e{exponent}",
+                   lambda data=data, method=method: reject_outliers(data, method), 1, n)
+
+
+def parse_cases(quick: bool, rng: np.random.Generator):
+    for exponent in (3, 5) if quick else (3, 5, 6):
+        numbers = rng.normal(10.0, 0.1, 10**exponent)
+        comma_text = ", ".join(f"{x:.6f}" for x in numbers)
+        space_text = " ".join(f"{x:.6f}" for x in numbers)
+        yield f"parse_float_list/comma/n=1e{exponent}", lambda text=comma_text: parse_float_list(text), 1, 10**exponent
+        yield f"parse_float_list/space/n=1e{exponent}", lambda text=space_text: parse_float_list(text), 1, 10**exponent
+        yield f"parse_float_array/comma/n=1e{exponent}", lambda text=comma_text: parse_float_array(text), 1, 10**exponent
+        yield f"parse_float_array/space/n=1e{exponent}", lambda text=space_text: parse_float_array(text), 1, 10**exponent
+
+
+def project_file_cases(quick: bool, rng: np.random.Generator):
+    for exponent in (3, 4) if quick else (3, 4, 5):
+        n = 10**exponent
+        values = rng.normal(10.0, 1.0, n)
+        project = Project(
+            [Formula("y", " + ".join(f"x{i}" for i in range(1, 11)))],
+            [Variable(f"x{i}", float(value), 0.01, "均匀分布" if i % 2 else None) for i, value in enumerate(values, start=1)],
+            {(f"x{i}", f"x{i + 1}"): 0.5 for i in range(1, n, 100)},
+        )
+        fd, file_path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        atexit.register(os.remove, file_path)
+        write_project(file_path, project)
+        yield f"read_project/vars=1e{exponent}", lambda file_path=file_path: read_project(file_path), 1, n
+        yield (f"write_project/vars=1e{exponent}",
+               lambda file_path=file_path, project=project: write_project(file_path, project), 1, n)
+
+
+def formatting_cases(quick: bool, rng: np.random.Generator):
+    n = 2_000 if quick else 20_000
+    values = (rng.choice([-1, 1], n) * 10.0**rng.uniform(-4, 4, n)).tolist()
+    uncertainties = (10.0**rng.uniform(-6, 2, n)).tolist()
+    decimals = rng.integers(0, 8, n).tolist()
+
+    def format_all():
+        for value, uncertainty in zip(values, uncertainties):
+            format_uncertainty_and_value(value, uncertainty)
+
+    def round_all():
+        for value, d in zip(values, decimals):
+            custom_round_decimal(value, d)
+
+    yield f"format_uncertainty_and_value/n={n}", format_all, 1, n
+    yield f"custom_round_decimal/n={n}", round_all, 1, n
+
+
+def all_cases(quick: bool, seed: int):
+    rng = np.random.default_rng(seed)
+    yield from propagation_cases(quick)
+    yield from multi_output_cases(quick)
+    yield from second_order_cases(quick, rng)
+    yield from type_a_cases(quick, rng)
+    yield from outlier_cases(quick, rng)
+    yield from parse_cases(quick, rng)
+    yield from formatting_cases(quick, rng)
+    yield from project_file_cases(quick, rng)
+
+
+# --- 运行与比较 ---
+
+def time_case(func, inner_loops: int, repeat: int) -> list[float]:
+    """每次测量调用 func inner_loops 次，返回 repeat 次测量的单次调用耗时 (s)。"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(inner_loops):
+            func()
+        timings.append((time.perf_counter() - start) / inner_loops)
+    return timings
+
+
+def run_suite(quick: bool, repeat: int, name_filter: str = None, seed: int = DEFAULT_SEED) -> dict:
+    results = {}
+    for name, func, inner_loops, n_items in all_cases(quick, seed):
+        if name_filter and name_filter not in name:
+            continue
+        func() # 预热（首次调用的导入等一次性开销不计入）
+        timings = time_case(func, inner_loops, repeat)
+        result = {"min_s": min(timings), "median_s": statistics.median(timings), "repeat": repeat}
+        if n_items:
+            result["items_per_s"] = n_items / result["min_s"]
+        results[name] = result
+        print(f"{name:<45} {result['min_s'] * 1e3:12.4f} ms (中位数 {result['median_s'] * 1e3:.4f} ms)", flush=True)
+    return results
+
+
+def compare_with_baseline(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """返回变慢超过阈值的用例说明；只比较两边都存在的用例。"""
+    regressions = []
+    print(f"\n与基准比较 (阈值 +{threshold:.0%}):")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"  {name:<45} 基准中没有此用例")
+            continue
+        ratio = result["min_s"] / baseline[name]["min_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- 性能回归"
+            regressions.append(f"{name}: {ratio:.2f}x")
+        print(f"  {name:<45} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-o", "--output", help="结果 JSON 文件")
+    parser.add_argument("--baseline", help="用于比较的基准 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"回归阈值，相对基准变慢的比例 (默认 {DEFAULT_THRESHOLD})")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的重复次数 (默认 5)")
+    parser.add_argument("--quick", action="store_true", help="只运行较小规模的用例")
+    parser.add_argument("--filter", help="只运行名称中包含该字符串的用例")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="生成测试数据的随机种子")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat 必须是正整数。")
+
+    results = run_suite(args.quick, args.repeat, args.filter, args.seed)
+    if "tkinter" in sys.modules:
+        print("错误: 基准测试过程中导入了 tkinter")
+        return 1
+
+    if args.output:
+        document = {
+            "format_version": RESULT_FORMAT_VERSION,
+            "environment": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "sympy": sys.modules["sympy"].__version__ if "sympy" in sys.modules else None,
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "processor": platform.processor(),
+                "cpu_count": os.cpu_count(),
+                "date": time.strftime("%Y-%m-%d"),
+                "quick": args.quick,
+                "seed": args.seed,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("format_version") != RESULT_FORMAT_VERSION:
+            print(f"错误: 基准文件格式版本 {baseline.get('format_version')} 与当前版本 {RESULT_FORMAT_VERSION} 不符")
+            return 1
+        if baseline.get("environment", {}).get("python") != platform.python_version():
+            print("注意: 基准文件由不同的 Python 版本生成，比较结果仅供参考")
+        regressions = compare_with_baseline(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回归: " + "; ".join(regressions))
+            return 1
+        print("\n没有发现性能回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,40 @@
+from __future__ import annotations # 注解不在定义时求值，避免为类型注解而提前导入 numpy / sympy
+import importlib
 import math
-import numpy as np # 用于统计计算，需要安装 pip install numpy
-import sympy # 用于符号计算和求导，需要安装 pip install sympy
-from decimal import Decimal, getcontext, ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_HALF_DOWN # 导入 decimal 模块及舍入模式
+import os
+import re
+import string
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, NamedTuple
+from decimal import Decimal, ROUND_HALF_EVEN # 导入 decimal 模块及舍入模式
+
+
+class _LazyModule:
+    """
+    延迟导入的模块代理：首次访问属性时才导入真正的模块，
+    并把本模块中的同名全局变量替换为真正的模块，之后的访问没有额外开销。
+    """
+    def __init__(self, module_name: str, alias: str):
+        self._module_name = module_name
+        self._alias = alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._module_name)
+        setattr(sys.modules[__name__], self._alias, module)
+        return getattr(module, attr)
+
+
+# numpy 与 sympy 的导入耗时较长，只在第一次用到时加载，
+# 使只需要 B 类不确定度、合成不确定度等简单计算的程序能够快速启动
+np = _LazyModule("numpy", "np") # 用于统计计算，需要安装 pip install numpy
+sympy = _LazyModule("sympy", "sympy") # 用于符号计算和求导，需要安装 pip install sympy
 
 # --- 常量和辅助函数 ---
-# t因子，这里只是一个默认值，实际应该由用户输入或根据自由度查询表
+# t因子，这里只是一个默认值，实际应该由用户输入，或提供置信水平由 t_distribution.student_t_factor 根据自由度查表
 DEFAULT_T_FACTOR = 1.0
 # 均匀分布的系数
 K_UNIFORM = math.sqrt(3)
@@ -12,10 +42,22 @@ K_UNIFORM = math.sqrt(3)
 K_TRIANGULAR = math.sqrt(6)
 # 正态分布，置信水平为95%
 K_NORMAL_DISTRIBUTION = 2 # 可以根据需要调整
+# 支持的分布类型（B类不确定度、蒙特卡洛抽样和项目文件共用）
+VALID_DISTRIBUTIONS = ('均匀分布', '正态分布', '三角形分布')
+# 从文件计算A类不确定度时每个分块的数据个数 (float64 约 8 MB)
+FILE_CHUNK_SIZE = 1 << 20
+# 编译内核 (解析 + 求导 + 数值化) 的 LRU 缓存容量
+KERNEL_CACHE_MAXSIZE = 256
+# 求导后端: 'sympy' 为符号求导，'autodiff' 为前向模式自动微分 (不依赖 SymPy)
+PROPAGATION_BACKENDS = ('sympy', 'autodiff')
 
 def custom_round_decimal(number: float, decimals: int) -> float:
     """
-    使用 decimal 模块实现“四舍六入五成双”并包含“5后若有数字就入”的舍入规则。
+    实现“四舍六入五成双”并包含“5后若有数字就入”的舍入规则。
+    舍入基于数字的十进制表示 repr(number)，按以下顺序处理：
+    1. 常见情形：缩放后离 .5 足够远，浮点误差不会改变舍入方向，直接用浮点运算；
+    2. 接近 .5 时：对 repr 的十进制数字做整数运算；
+    3. 只有恰好为“5”（其后全为0）时才使用 decimal 模块的 ROUND_HALF_EVEN。
     
     Args:
         number (float): 待舍入的数字。
@@ -25,61 +67,78 @@ def custom_round_decimal(number: float, decimals: int) -> float:
     """
     if decimals < 0:
         raise ValueError("decimals 必须是非负整数。")
-    
-    # 1. 将浮点数转换为 Decimal，避免浮点数精度问题。使用 str(number) 是为了避免二进制浮点数转换误差。
-    d_num_str = str(number)
-    d_num = Decimal(d_num_str)
 
-    # 2. 构造一个代表所需精度的 Decimal 对象，例如 '0.01' 用于两位小数
-    if decimals == 0:
-        quantize_to = Decimal('1')
-    else:
-        # 创建一个精确到 decimals 位的 Decimal，例如 Decimal('0.001') for decimals=3
-        quantize_to = Decimal('1e-{}'.format(decimals))
-
-    # 3. 检查舍入位及其之后是否有非零数字
-    # 获取数字的字符串表示，并确保小数点后有足够的位数进行判断
-    dot_index = d_num_str.find('.')
-    if dot_index == -1: # 如果是整数，直接返回，不需要小数舍入
-        return float(d_num)
-
-    # 确保字符串有足够的长度来检查舍入位
-    # 需要检查的数字在小数点后 decimals + 1 位
-    required_length_after_dot = decimals + 1
-    current_length_after_dot = len(d_num_str) - dot_index - 1
-    
-    # 如果当前小数位数不足以达到舍入位，则认为其后都是0，不需要特殊处理
-    if current_length_after_dot < required_length_after_dot:
-        # 直接使用 ROUND_HALF_EVEN 对原始 Decimal 进行量化
-        return float(d_num.quantize(quantize_to, rounding=ROUND_HALF_EVEN))
+    number = float(number)
+    if not math.isfinite(number):
+        return number
 
+    # 快速路径：10**22 以内的10的幂可被浮点数精确表示，缩放只引入一次舍入误差，
+    # 误差上界与 scaled 成正比，只要小数部分离 .5 的距离大于该上界，舍入方向就与十进制表示一致
+    if decimals <= 22:
+        scale = 10.0**decimals
+        scaled = abs(number) * scale
+        if scaled < 1e15 and abs(scaled - math.floor(scaled) - 0.5) > scaled * 1e-15:
+            return math.copysign(round(scaled) / scale, number)
 
-    # 提取舍入位（decimals + 1 位）的数字
-    # 例如：1.2345, decimals=2, target_digit_index = dot_index + 2 + 1 = 4
-    target_digit_index_in_str = dot_index + required_length_after_dot
-    
-    digit_to_check_char = d_num_str[target_digit_index_in_str]
-    digit_to_check = int(digit_to_check_char)
-
-    # 检查 5 后面是否有非零数字
-    # 例如 1.2351 -> "1", 1.2350 -> ""
-    rest_of_digits_str = d_num_str[target_digit_index_in_str + 1:].strip('0')
-    has_non_zero_after_five = bool(rest_of_digits_str)
-
-    # 4. 根据规则进行舍入
-    if digit_to_check < 5:
-        # 四舍：直接向下舍入
-        return float(d_num.quantize(quantize_to, rounding=ROUND_HALF_DOWN))
-    elif digit_to_check > 5:
-        # 六入：直接向上舍入
-        return float(d_num.quantize(quantize_to, rounding=ROUND_HALF_UP))
-    else: # digit_to_check == 5
-        if has_non_zero_after_five:
-            # 5后有数字，直接进位
-            return float(d_num.quantize(quantize_to, rounding=ROUND_HALF_UP))
-        else:
-            # 5后无数字（或只有0），应用“五成双”
-            return float(d_num.quantize(quantize_to, rounding=ROUND_HALF_EVEN))
+    # 1. 将浮点数的十进制表示拆成整数数字串和指数，例如 '-1.2345e-07' -> 12345, -11
+    number_str = repr(number)
+    mantissa, _, exponent_str = number_str.partition('e')
+    negative = mantissa.startswith('-')
+    integer_part, _, fraction_part = mantissa.lstrip('-').partition('.')
+    digits_after_dot = len(fraction_part) - int(exponent_str or 0)
+
+    # 2. 需要舍去的位数不大于0时，数字本身已经满足精度要求
+    drop = digits_after_dot - decimals
+    if drop <= 0:
+        return number
+
+    # 3. 判断被舍去部分与“半个单位”的大小关系
+    kept, rest = divmod(int(integer_part + fraction_part), 10**drop)
+    half = 5 * 10**(drop - 1)
+    if rest > half:
+        # 六入，或5后有数字：进位
+        kept += 1
+    elif rest == half:
+        # 5后无数字：应用“五成双”
+        quantize_to = Decimal(1).scaleb(-decimals)
+        return float(Decimal(number_str).quantize(quantize_to, rounding=ROUND_HALF_EVEN))
+    # rest < half 时四舍：直接舍去
+
+    # 整数除法的结果是正确舍入的浮点数，与 float(Decimal) 相同
+    rounded = kept / 10**decimals
+    return -rounded if negative else rounded
+
+
+def custom_round_decimal_array(numbers, decimals) -> np.ndarray:
+    """
+    custom_round_decimal 的向量化版本，结果与逐个调用相同。
+    用浮点数缩放后 np.rint 舍入；缩放结果接近 .5（可能恰好为5或受浮点误差影响）、
+    数量级过大或位数过多的元素退回到逐个调用 custom_round_decimal。
+    Args:
+        numbers: 待舍入的数组。
+        decimals: 每个元素保留的小数位数（整数数组或单个整数）。
+    Returns:
+        np.ndarray: 舍入后的浮点数组。
+    """
+    numbers = np.asarray(numbers, dtype=float)
+    decimals = np.broadcast_to(np.asarray(decimals, dtype=np.int64), numbers.shape)
+    if np.any(decimals < 0):
+        raise ValueError("decimals 必须是非负整数。")
+
+    result = numbers.copy()
+    # 10**22 以内的10的幂可以被浮点数精确表示
+    candidates = np.isfinite(numbers) & (decimals <= 22)
+    scale = 10.0**np.where(candidates, decimals, 0)
+    with np.errstate(all="ignore"):
+        scaled = np.abs(numbers * scale)
+    # 浮点误差上界与 |scaled| 成正比，只有与 .5 的距离小于该上界时舍入方向才不确定
+    fast = candidates & (scaled < 1e15) & (np.abs(scaled - np.floor(scaled) - 0.5) > scaled * 1e-15)
+    result[fast] = np.rint(numbers[fast] * scale[fast]) / scale[fast]
+
+    slow = np.isfinite(numbers) & ~fast
+    for index in zip(*np.nonzero(slow)):
+        result[index] = custom_round_decimal(float(numbers[index]), int(decimals[index]))
+    return result
 
 # --- 单个物理量不确定度计算函数 ---
 
@@ -116,39 +175,514 @@ def calculate_combined_uncertainty(u_a: float, u_b: float) -> float:
 
 # --- 多次测量A类不确定度计算函数 ---
 
-def calculate_a_uncertainty_multiple_measurements(data_list: list[float], t_factor: float = DEFAULT_T_FACTOR) -> tuple[float, float, float]:
+class RunningStatistics:
+    """
+    流式A类统计量累加器 (Welford / Chan 算法)。
+    只保存样本数、平均值和离差平方和，内存占用与数据量无关；
+    可以分块调用 update()，也可以用 merge() 合并其他进程或文件得到的部分结果。
+    """
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0 # 样本数
+        self.mean = 0.0 # 平均值
+        self.m2 = 0.0 # 离差平方和 Σ(x - mean)²
+
+    def _combine(self, count: int, mean: float, m2: float) -> None:
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    def update(self, data) -> "RunningStatistics":
+        """加入一个数据块（单个数值或数组），返回自身以便链式调用。"""
+        chunk = np.asarray(data, dtype=float).ravel()
+        if chunk.size:
+            chunk_mean = float(chunk.mean())
+            self._combine(chunk.size, chunk_mean, float(np.square(chunk - chunk_mean).sum()))
+        return self
+
+    def merge(self, other: "RunningStatistics") -> "RunningStatistics":
+        """合并另一个累加器的结果，返回自身。"""
+        self._combine(other.count, other.mean, other.m2)
+        return self
+
+    @property
+    def s_x(self) -> float:
+        """实验标准差 S_x (除以 n-1)，少于两个数据时为0。"""
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def u_a(self, t_factor: float = DEFAULT_T_FACTOR) -> float:
+        """A类不确定度 u_A = t · S_x / √n。"""
+        if self.count < 2:
+            return 0.0
+        return t_factor * self.s_x / math.sqrt(self.count)
+
+    def result(self, t_factor: float = DEFAULT_T_FACTOR) -> tuple[float, float, float]:
+        """
+        Returns:
+            tuple[float, float, float]: (平均值, A类不确定度 u_A, 实验标准差 S_x)，与 calculate_a_uncertainty_multiple_measurements 一致。
+        """
+        if self.count == 0:
+            raise ValueError("数据列表不能为空。")
+        return self.mean, self.u_a(t_factor), self.s_x
+
+
+def _t_factor_for_count(count: int, t_factor: float, confidence_level) -> float:
+    """confidence_level 不为 None 时由测量次数 n（自由度 n-1）查表得到 t因子，代替 t_factor。"""
+    if confidence_level is None or count < 2:
+        return t_factor
+    from t_distribution import student_t_factor # 仅在使用时导入
+    return student_t_factor(count - 1, confidence_level)
+
+
+def calculate_a_uncertainty_multiple_measurements(data_list: list[float], t_factor: float = DEFAULT_T_FACTOR,
+                                                  confidence_level: float = None) -> tuple[float, float, float]:
     """
     计算多次测量下的A类不确定度。
     Args:
-        data_list (list[float]): 测量数据列表。
+        data_list (list[float]): 测量数据列表（也可以是 NumPy 数组）。
         t_factor (float): t因子。
+        confidence_level (float, optional): 置信水平，例如 0.95；提供时按测量次数自动确定 t因子，不再使用 t_factor。
     Returns:
         tuple[float, float, float]: (平均值, A类不确定度 u_A, 实验标准差 S_x)
     """
-    if not data_list:
+    if len(data_list) == 0:
         raise ValueError("数据列表不能为空。")
-    
-    n = len(data_list)
-    mean_val = np.mean(data_list)
-    
-    if n < 2: # 至少需要两个数据点才能计算标准差
-        # 如果只有一个数据点，实验标准差无法计算，A类不确定度为0
-        # 实际情况可能需要提示用户输入更多数据或考虑为单次测量
-        return mean_val, 0.0, 0.0
-        
-    s_x = np.std(data_list, ddof=1) # 样本标准差 (ddof=1 表示除以 n-1)
-    u_a_prime = s_x / math.sqrt(n) # 平均值的标准不确定度
-    
-    u_a = t_factor * u_a_prime # 扩展不确定度或修正后的A类不确定度
 
+    # 只有一个数据点时实验标准差无法计算，A类不确定度为0
+    # 实际情况可能需要提示用户输入更多数据或考虑为单次测量
+    stats = RunningStatistics().update(data_list)
+    return stats.result(_t_factor_for_count(stats.count, t_factor, confidence_level))
+
+
+def open_measurement_file(file_path: str) -> np.ndarray:
+    """
+    以只读内存映射方式打开测量数据文件，返回一维数组，数据只在访问时才从磁盘读入。
+    支持 .npy 文件（任意数值类型，多维数组按行展开）和原始 float64 二进制文件（小端字节序，无文件头）。
+    Args:
+        file_path (str): 文件路径，扩展名为 .npy 时按 NumPy 格式读取，否则按原始 float64 读取。
+    Returns:
+        np.ndarray: 一维只读数组 (np.memmap)。
+    """
+    if file_path.lower().endswith(".npy"):
+        try:
+            data = np.load(file_path, mmap_mode="r", allow_pickle=False)
+        except ValueError as e:
+            raise ValueError(f"无法读取 .npy 文件: {e}")
+        if data.dtype.kind not in "iuf":
+            raise ValueError(f"文件中的数据类型 {data.dtype} 不是实数。")
+        return data.reshape(-1)
+
+    file_size = os.path.getsize(file_path)
+    if file_size % 8:
+        raise ValueError(f"文件大小 ({file_size} 字节) 不是8的倍数，不是原始 float64 数据文件。")
+    if file_size == 0:
+        return np.empty(0)
+    return np.memmap(file_path, dtype="<f8", mode="r")
+
+
+def calculate_a_uncertainty_from_file(file_path: str, t_factor: float = DEFAULT_T_FACTOR,
+                                      chunk_size: int = FILE_CHUNK_SIZE,
+                                      confidence_level: float = None) -> tuple[float, float, float]:
+    """
+    从测量数据文件计算多次测量的A类不确定度，结果与 calculate_a_uncertainty_multiple_measurements 相同。
+    文件通过内存映射分块读取并用 RunningStatistics 累加，内存占用只与 chunk_size 有关，可处理大于内存的文件。
+    Args:
+        file_path (str): .npy 文件或原始 float64 (小端) 二进制文件的路径，见 open_measurement_file。
+        t_factor (float): t因子。
+        chunk_size (int): 每个分块的数据个数。
+        confidence_level (float, optional): 置信水平；提供时按数据个数自动确定 t因子，不再使用 t_factor。
+    Returns:
+        tuple[float, float, float]: (平均值, A类不确定度 u_A, 实验标准差 S_x)
+    """
+    if chunk_size < 1:
+        raise ValueError("分块大小必须是正整数。")
+    data = open_measurement_file(file_path)
+    stats = RunningStatistics()
+    for start in range(0, data.size, chunk_size):
+        stats.update(data[start:start + chunk_size])
+    del data # 释放内存映射，Windows 下映射存在时文件无法被删除或改写
+
+    mean_val, u_a, s_x = stats.result(_t_factor_for_count(stats.count, t_factor, confidence_level))
+    if not (math.isfinite(mean_val) and math.isfinite(s_x)):
+        raise ValueError("文件中包含 nan 或 inf 等非有限数值。")
     return mean_val, u_a, s_x
 
 
+# --- 分阶段计时 ---
+
+# 计时阶段及其显示名称
+TIMING_STAGES = {
+    'parse': '解析',
+    'differentiate': '求导',
+    'lambdify': '生成数值函数',
+    'evaluate': '数值求值',
+    'combine': '合成不确定度',
+    'format': '格式化',
+}
+
+
+class StageTimings:
+    """
+    各计算阶段的累计耗时与调用次数。
+    同一个对象可以在多次 collect_stage_timings 中重复使用，统计量会一直累计，直到调用 reset。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, list] = {} # 阶段 -> [调用次数, 累计耗时 (s)]
+
+    def __getstate__(self):
+        # 锁不能序列化；后台计算进程中记录的耗时需要传回界面进程
+        with self._lock:
+            return {stage: list(entry) for stage, entry in self._stats.items()}
+
+    def __setstate__(self, state):
+        self._lock = threading.Lock()
+        self._stats = state
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def as_dict(self) -> dict[str, dict[str, float]]:
+        """返回 {阶段: {'count': 调用次数, 'total_s': 累计耗时}}，按 TIMING_STAGES 的顺序排列。"""
+        with self._lock:
+            order = {stage: i for i, stage in enumerate(TIMING_STAGES)}
+            return {
+                stage: {'count': count, 'total_s': total}
+                for stage, (count, total) in sorted(self._stats.items(), key=lambda item: order.get(item[0], len(order)))
+            }
+
+    @property
+    def total_seconds(self) -> float:
+        with self._lock:
+            return sum(total for _, total in self._stats.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def format_summary(self) -> str:
+        """格式化为一行文字，例如 '解析 3.1 ms | 求导 12.0 ms | 数值求值 0.05 ms (共 15.2 ms)'。"""
+        stats = self.as_dict()
+        if not stats:
+            return "没有计时记录"
+        parts = []
+        for stage, entry in stats.items():
+            text = f"{TIMING_STAGES.get(stage, stage)} {entry['total_s'] * 1e3:.3g} ms"
+            if entry['count'] > 1:
+                text += f" ×{entry['count']}"
+            parts.append(text)
+        return " | ".join(parts) + f" (共 {self.total_seconds * 1e3:.3g} ms)"
+
+
+# 正在收集计时的 StageTimings 对象；为空时计时不产生额外开销
+_active_stage_timings: list[StageTimings] = []
+
+
+class _TimedStage:
+    """记录一个计算阶段耗时的上下文管理器，只在有 collect_stage_timings 生效时计时。"""
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.start = None
+
+    def __enter__(self):
+        if _active_stage_timings:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            elapsed = time.perf_counter() - self.start
+            for timings in tuple(_active_stage_timings):
+                timings.record(self.stage, elapsed)
+        return False
+
+
+@contextmanager
+def collect_stage_timings(timings: StageTimings = None):
+    """
+    在 with 语句块内记录 propagate_uncertainty 与 format_uncertainty_and_value 各阶段的耗时和调用次数。
+    计时对所有线程生效；可以嵌套使用，每个生效的对象都会记录。
+    Args:
+        timings (StageTimings, optional): 累计结果的对象，缺省时新建一个。
+    Returns:
+        StageTimings: 在 with 语句中得到的计时结果对象。
+    例如:
+        with collect_stage_timings() as timings:
+            propagate_uncertainty('x1*x2', {'x1': 1.0, 'x2': 2.0}, {'x1': 0.1, 'x2': 0.1})
+        print(timings.format_summary())
+    """
+    timings = StageTimings() if timings is None else timings
+    _active_stage_timings.append(timings)
+    try:
+        yield timings
+    finally:
+        _active_stage_timings.remove(timings)
+
+
 # --- 不确定度传递函数 ---
 
-def propagate_uncertainty(function_str: str, x_values: dict[str, float], u_x_values: dict[str, float]) -> tuple[float, float]:
+# 运算符与括号两侧的空白不影响表达式含义
+_OPERATOR_SPACING_RE = re.compile(r"\s*([-+*/(),])\s*")
+
+
+class CompiledKernel(NamedTuple):
+    """
+    编译后的不确定度传递内核。
+    value_func 与 value_grad_func 的参数顺序均为 var_names；
+    value_grad_func 一次返回 [函数值, used_names 中各变量的偏导数...]，公共子表达式只计算一次。
+    自动微分后端没有符号表达式，expr 为 None。
+    """
+    expr: sympy.Expr
+    var_names: tuple[str, ...]
+    used_names: tuple[str, ...]
+    value_func: Callable
+    value_grad_func: Callable
+
+
+@lru_cache(maxsize=KERNEL_CACHE_MAXSIZE)
+def _normalize_function_str(function_str: str) -> str:
+    """
+    去掉运算符两侧及首尾的空白并合并连续空白，使书写上的差异命中同一缓存项。
+    长表达式的正则替换耗时与一次标量求值相当，重复出现的表达式直接取缓存结果。
+    """
+    return _OPERATOR_SPACING_RE.sub(r"\1", " ".join(function_str.split()))
+
+
+# 磁盘缓存 (kernel_cache.KernelDiskCache)，默认关闭，由 enable_kernel_disk_cache 开启
+_kernel_disk_cache = None
+
+
+@lru_cache(maxsize=KERNEL_CACHE_MAXSIZE)
+def _compile_kernel(function_str: str, var_names: tuple[str, ...]) -> CompiledKernel:
+    """
+    解析函数表达式、求出全部偏导数并生成 NumPy 数值函数。结果由 LRU 缓存保存；
+    开启磁盘缓存时先从磁盘加载，编译得到的新内核也写入磁盘。
+    """
+    disk_cache = _kernel_disk_cache
+    if disk_cache is not None:
+        kernel = disk_cache.load(function_str, var_names)
+        if kernel is not None:
+            return kernel
+        kernel = _compile_kernel_uncached(function_str, var_names)
+        disk_cache.store(function_str, var_names, kernel)
+        return kernel
+    return _compile_kernel_uncached(function_str, var_names)
+
+
+def _parse_function_expr(function_str: str, symbols: list) -> sympy.Expr:
+    """把函数字符串解析为 SymPy 表达式，并检查其中的变量都已输入。"""
+    # 符号变量在解析时优先使用，避免与 SymPy 内置名称冲突
+    local_symbols = {str(sym): sym for sym in symbols}
+    try:
+        with _TimedStage('parse'):
+            expr = sympy.sympify(function_str, locals=local_symbols)
+    except (sympy.SympifyError, SyntaxError, TypeError) as e:
+        raise ValueError(f"函数表达式无效: {e}")
+    if not isinstance(expr, sympy.Expr):
+        raise ValueError(f"函数表达式无效: '{function_str}' 不是一个数学表达式。")
+
+    undefined = expr.free_symbols - set(symbols)
+    if undefined:
+        names = ", ".join(sorted(str(sym) for sym in undefined))
+        raise ValueError(f"函数表达式中包含未输入的物理量: {names}")
+    # 例如 1/0、0**-1、log(0)、sqrt(-1)：SymPy 化简为 zoo / nan / ±oo / I，无法生成实数值函数
+    if expr.has(sympy.zoo, sympy.nan, sympy.oo, -sympy.oo, sympy.I):
+        raise ValueError(f"函数表达式无效: '{function_str}' 中的常数运算无定义或结果不是有限实数。")
+    return expr
+
+
+def _compile_kernel_uncached(function_str: str, var_names: tuple[str, ...]) -> CompiledKernel:
+    # 1. 定义符号变量 (实数)
+    symbols = [sympy.Symbol(var_name, real=True) for var_name in var_names]
+
+    # 2. 将函数字符串转换为 SymPy 表达式
+    expr = _parse_function_expr(function_str, symbols)
+
+    # 3. 只对表达式中出现的变量求偏导数，未出现的变量偏导数为0
+    used_symbols = [sym for sym in symbols if sym in expr.free_symbols]
+    with _TimedStage('differentiate'):
+        partial_derivative_exprs = [sympy.diff(expr, sym) for sym in used_symbols]
+
+    # 4. 生成数值函数，之后的调用只做数值计算。
+    # 函数值与梯度合并为一个求值函数，并用 sympy.cse 提取公共子表达式，
+    # 变量多、子项共享多的表达式每次求值时共享部分只计算一次
+    with _TimedStage('lambdify'):
+        value_func = sympy.lambdify(symbols, expr, modules="numpy")
+        value_grad_func = sympy.lambdify(symbols, [expr, *partial_derivative_exprs], modules="numpy", cse=True)
+
+    return CompiledKernel(
+        expr=expr,
+        var_names=var_names,
+        used_names=tuple(str(sym) for sym in used_symbols),
+        value_func=value_func,
+        value_grad_func=value_grad_func,
+    )
+
+
+def get_compiled_kernel(function_str: str, var_names, backend: str = 'sympy') -> CompiledKernel:
+    """
+    获取函数表达式对应的编译内核，相同的（规范化后的）表达式与变量集合只编译一次。
+    Args:
+        function_str (str): 函数关系字符串，例如 'x1*x2 + sin(x3)'。
+        var_names: 全部输入物理量的变量名。
+        backend (str): 求导后端，'sympy' (符号求导) 或 'autodiff' (前向模式自动微分)。
+    Returns:
+        CompiledKernel: 编译内核，其 var_names 为排序后的变量名。
+    """
+    if backend == 'autodiff':
+        from autodiff import compile_autodiff_kernel # 仅在使用时导入
+        return compile_autodiff_kernel(function_str, var_names)
+    if backend != 'sympy':
+        raise ValueError(f"无效的求导后端 '{backend}'。请选择 {' 或 '.join(repr(b) for b in PROPAGATION_BACKENDS)}。")
+    return _compile_kernel(_normalize_function_str(function_str), tuple(sorted(var_names)))
+
+
+class MultiOutputKernel(NamedTuple):
+    """
+    多个输出函数共用同一组输入量时的编译内核。
+    value_jacobian_func 的参数顺序为 var_names，一次返回
+    [y_1, ..., y_m, ∂y_1/∂u_1, ..., ∂y_1/∂u_k, ..., ∂y_m/∂u_k]（u_1..u_k 为 used_names），
+    所有输出及其偏导数的公共子表达式只计算一次。
+    """
+    exprs: tuple
+    var_names: tuple[str, ...]
+    used_names: tuple[str, ...] # 至少在一个输出中出现的变量
+    value_jacobian_func: Callable
+
+
+@lru_cache(maxsize=KERNEL_CACHE_MAXSIZE)
+def _compile_multi_output_kernel(function_strs: tuple[str, ...], var_names: tuple[str, ...]) -> MultiOutputKernel:
+    symbols = [sympy.Symbol(var_name, real=True) for var_name in var_names]
+    exprs = []
+    for i, function_str in enumerate(function_strs):
+        try:
+            exprs.append(_parse_function_expr(function_str, symbols))
+        except ValueError as e:
+            raise ValueError(f"第 {i+1} 个输出: {e}")
+
+    free_symbols = set().union(*(expr.free_symbols for expr in exprs))
+    used_symbols = [sym for sym in symbols if sym in free_symbols]
+    with _TimedStage('differentiate'):
+        jacobian_exprs = [sympy.diff(expr, sym) for expr in exprs for sym in used_symbols]
+    with _TimedStage('lambdify'):
+        value_jacobian_func = sympy.lambdify(symbols, [*exprs, *jacobian_exprs], modules="numpy", cse=True)
+
+    return MultiOutputKernel(
+        exprs=tuple(exprs),
+        var_names=var_names,
+        used_names=tuple(str(sym) for sym in used_symbols),
+        value_jacobian_func=value_jacobian_func,
+    )
+
+
+def get_multi_output_kernel(function_strs, var_names) -> MultiOutputKernel:
+    """
+    获取多个输出函数的编译内核（只支持符号求导后端，不使用磁盘缓存）。
+    Args:
+        function_strs: 各输出的函数关系字符串列表。
+        var_names: 全部输入物理量的变量名。
+    Returns:
+        MultiOutputKernel: 编译内核，其 var_names 为排序后的变量名。
+    """
+    function_strs = list(function_strs)
+    if not function_strs:
+        raise ValueError("输出函数表达式列表不能为空。")
+    for i, function_str in enumerate(function_strs):
+        if not isinstance(function_str, str) or not function_str.strip():
+            raise ValueError(f"第 {i+1} 个输出的函数表达式不能为空。")
+    return _compile_multi_output_kernel(tuple(_normalize_function_str(f) for f in function_strs),
+                                        tuple(sorted(var_names)))
+
+
+def get_kernel_cache_info():
+    """返回编译内核缓存的统计信息 (hits, misses, maxsize, currsize)。"""
+    return _compile_kernel.cache_info()
+
+
+def clear_kernel_cache() -> None:
+    """清空编译内核缓存（包括多输出内核）并重置命中/未命中计数。"""
+    _compile_kernel.cache_clear()
+    _compile_multi_output_kernel.cache_clear()
+
+
+def enable_kernel_disk_cache(directory: str = None, max_bytes: int = None):
+    """
+    开启编译内核的磁盘缓存，使新进程可以直接加载以前编译过的函数表达式。
+    缓存项随 SymPy / NumPy / Python 版本自动失效，超出容量时淘汰最久未使用的项。
+    Args:
+        directory (str, optional): 缓存目录，缺省为 kernel_cache.default_cache_directory()。
+        max_bytes (int, optional): 缓存目录的容量上限 (字节)，缺省为 kernel_cache.DEFAULT_MAX_BYTES。
+    Returns:
+        KernelDiskCache: 缓存对象，可用于查询大小或清空缓存。
+    """
+    global _kernel_disk_cache
+    from kernel_cache import DEFAULT_MAX_BYTES, KernelDiskCache # 仅在使用时导入
+    _kernel_disk_cache = KernelDiskCache(directory, DEFAULT_MAX_BYTES if max_bytes is None else max_bytes)
+    _compile_kernel.cache_clear() # 内存中的缓存项不一定已写入磁盘
+    return _kernel_disk_cache
+
+
+def disable_kernel_disk_cache() -> None:
+    """关闭磁盘缓存，已保存的缓存文件保留。"""
+    global _kernel_disk_cache
+    _kernel_disk_cache = None
+
+
+def _as_square_matrix(matrix, n: int, matrix_label: str, allow_stacked: bool = False) -> np.ndarray:
+    """检查矩阵为 (n, n) 的对称矩阵；allow_stacked 时也接受按行堆叠的 (行数, n, n) 矩阵。"""
+    matrix = np.asarray(matrix, dtype=float)
+    valid_ndim = (2, 3) if allow_stacked else (2,)
+    if matrix.ndim not in valid_ndim or matrix.shape[-2:] != (n, n):
+        raise ValueError(f"{matrix_label}的形状应为 ({n}, {n})，实际为 {matrix.shape}。")
+    if not np.allclose(matrix, np.swapaxes(matrix, -1, -2), equal_nan=True):
+        raise ValueError(f"{matrix_label}必须是对称矩阵。")
+    return matrix
+
+
+def _check_correlation_matrix(correlation, n: int, allow_stacked: bool = False) -> np.ndarray:
+    correlation = _as_square_matrix(correlation, n, "相关系数矩阵", allow_stacked)
+    if not np.allclose(np.diagonal(correlation, axis1=-2, axis2=-1), 1.0):
+        raise ValueError("相关系数矩阵的对角元素必须为1。")
+    if np.any(np.abs(correlation) > 1 + 1e-12):
+        raise ValueError("相关系数的绝对值不能大于1。")
+    return correlation
+
+
+def _check_covariance_matrix(covariance, n: int, allow_stacked: bool = False) -> np.ndarray:
+    covariance = _as_square_matrix(covariance, n, "协方差矩阵", allow_stacked)
+    if np.any(np.diagonal(covariance, axis1=-2, axis2=-1) < 0):
+        raise ValueError("协方差矩阵的对角元素（方差）不能为负。")
+    return covariance
+
+
+def _sqrt_of_variance(variance, scale):
+    """
+    对 J Σ Jᵀ 开方。相关性很强时舍入误差可能使结果为极小的负数，按0处理；
+    明显为负说明矩阵不是半正定的，结果为 nan。scale 为 |J| |Σ| |J|ᵀ，用于判断误差量级。
+    """
+    variance = np.where((variance < 0) & (variance >= -1e-12 * scale), 0.0, variance)
+    with np.errstate(invalid="ignore"):
+        return np.sqrt(variance)
+
+
+def propagate_uncertainty(function_str: str, x_values: dict[str, float], u_x_values: dict[str, float],
+                          correlation=None, covariance=None, backend: str = 'sympy') -> tuple[float, float]:
     """
     计算不确定度传递。
+    输入量相互独立时 u_y² = Σ(∂f/∂xi · u_xi)²；提供相关系数矩阵或协方差矩阵 Σ 时 u_y² = J Σ Jᵀ，J 为各偏导数组成的行向量。
     Args:
         function_str (str): output物理量y与input物理量x_1, ..., x_n之间的函数关系字符串。
                              例如: 'x1*x2 + sin(x3)'
@@ -156,56 +690,415 @@ def propagate_uncertainty(function_str: str, x_values: dict[str, float], u_x_val
                          例如: {'x1': 10.0, 'x2': 2.0, 'x3': 0.5}
         u_x_values (dict): input物理量相应的不确定度字典，键为变量名，值为不确定度。
                            例如: {'x1': 0.1, 'x2': 0.05, 'x3': 0.01}
+        correlation (array-like, optional): 输入量的相关系数矩阵，行列顺序与 x_values 的键顺序一致。
+        covariance (array-like, optional): 输入量的协方差矩阵，行列顺序与 x_values 的键顺序一致；
+                                           提供时不再使用 u_x_values。与 correlation 只能提供一个。
+        backend (str): 求导后端，'sympy' (默认，符号求导) 或 'autodiff' (前向模式自动微分，适合很长的嵌套表达式)。
     Returns:
         tuple[float, float]: (output物理量的测量值 y_value, output物理量的不确定度 u_y)
     """
+    return _propagate_uncertainty(function_str, x_values, u_x_values, correlation, covariance, backend, False)
+
+
+def propagate_uncertainty_budget(function_str: str, x_values: dict[str, float], u_x_values: dict[str, float],
+                                 correlation=None, covariance=None, backend: str = 'sympy') -> tuple[float, float, list[dict]]:
+    """
+    计算不确定度传递，并给出各输入量的不确定度预算（与 propagate_uncertainty 使用同一次求值得到的偏导数）。
+    参数与 propagate_uncertainty 相同。
+    Returns:
+        tuple[float, float, list[dict]]: (y_value, u_y, budget)。budget 按 |variance| 从大到小排列，每项包含:
+            'variable': 变量名；'value': 测量值；
+            'sensitivity': 灵敏系数 c_i = ∂f/∂x_i；'uncertainty': 输入量的标准不确定度 u_i；
+            'contribution': 不确定度分量 |c_i|·u_i；
+            'variance': 对 u_y² 的贡献 c_i·(Σ Jᵀ)_i，各项之和为 u_y²，输入量负相关时可以为负；
+            'share': variance / u_y²。
+    """
+    return _propagate_uncertainty(function_str, x_values, u_x_values, correlation, covariance, backend, True)
+
+
+def _propagate_uncertainty(function_str: str, x_values, u_x_values, correlation, covariance, backend: str,
+                           with_budget: bool):
     if not function_str:
         raise ValueError("函数表达式不能为空。")
     if not x_values:
         raise ValueError("输入物理量测量值不能为空。")
-    if not u_x_values:
+    if not u_x_values and covariance is None:
         raise ValueError("输入物理量不确定度不能为空。")
+    if correlation is not None and covariance is not None:
+        raise ValueError("相关系数矩阵与协方差矩阵只能提供一个。")
 
-    # 1. 定义符号变量
-    symbols = []
-    for var_name in x_values.keys():
-        symbols.append(sympy.Symbol(var_name))
+    # 1. 获取编译内核（解析与求导结果已缓存）
+    kernel = get_compiled_kernel(function_str, x_values.keys(), backend)
+    # 以 NumPy 标量传入，除以0、log(0)、负数的分数次幂、溢出等按 NumPy 的规则得到 inf / nan，
+    # 由下面的 isfinite 检查统一给出错误信息（Python float 会直接抛出 ZeroDivisionError 等异常）
+    args = [np.float64(x_values[var_name]) for var_name in kernel.var_names]
 
-    # 2. 将函数字符串转换为 SymPy 表达式
+    # 2. 计算 output 物理量的测量值 y_value 及各偏导数
+    with _TimedStage('evaluate'), np.errstate(all="ignore"):
+        try:
+            y_value, *partial_derivative_values = kernel.value_grad_func(*args)
+            y_value = float(y_value)
+        except (ArithmeticError, TypeError):
+            raise ValueError("函数在给定测量值处无定义或结果不是有限实数。")
+    if not math.isfinite(y_value):
+        raise ValueError("函数在给定测量值处无定义或结果不是有限实数。")
+
+    with _TimedStage('combine'):
+        return _combine_propagated_uncertainty(kernel, partial_derivative_values, y_value, x_values, u_x_values,
+                                               correlation, covariance, with_budget)
+
+
+def _combine_propagated_uncertainty(kernel: CompiledKernel, partial_derivative_values, y_value: float,
+                                    x_values, u_x_values, correlation, covariance, with_budget: bool = False):
+    """
+    由偏导数与输入量的不确定度（或协方差矩阵）合成 u_y，供 propagate_uncertainty 使用。
+    with_budget 为 True 时返回 (y_value, u_y, 不确定度预算)，否则返回 (y_value, u_y)。
+    """
+    gradient = {}
+    for var_name, partial_derivative_value in zip(kernel.used_names, partial_derivative_values):
+        partial_derivative_value = float(partial_derivative_value)
+        if not math.isfinite(partial_derivative_value):
+            raise ValueError(f"函数对变量 '{var_name}' 的偏导数在给定测量值处无定义。")
+        gradient[var_name] = partial_derivative_value
+
+    # 3. 计算不确定度 u_y
+    if covariance is None:
+        # 获取对应变量的不确定度，未出现在表达式中的变量不需要
+        u_vector = {}
+        for var_name in x_values:
+            u_xi = u_x_values.get(var_name)
+            if u_xi is None and var_name in gradient:
+                raise ValueError(f"缺少变量 '{var_name}' 的不确定度。")
+            u_vector[var_name] = 0.0 if u_xi is None else float(u_xi)
+
+    if correlation is None and covariance is None:
+        sum_of_squares = 0.0
+        for var_name, partial_derivative_value in gradient.items():
+            sum_of_squares += (partial_derivative_value * u_vector[var_name])**2
+        u_y = math.sqrt(sum_of_squares)
+        if not with_budget:
+            return y_value, u_y
+        variance_terms = {var_name: (gradient.get(var_name, 0.0) * u_vector[var_name])**2 for var_name in x_values}
+        return y_value, u_y, _uncertainty_budget(x_values, gradient, u_vector, variance_terms, u_y)
+
+    n = len(x_values)
+    jacobian = np.array([gradient.get(var_name, 0.0) for var_name in x_values])
+    if covariance is not None:
+        sigma = _check_covariance_matrix(covariance, n)
+    else:
+        u_array = np.array([u_vector[var_name] for var_name in x_values])
+        sigma = _check_correlation_matrix(correlation, n) * np.outer(u_array, u_array)
+
+    u_y = float(_sqrt_of_variance(jacobian @ sigma @ jacobian, np.abs(jacobian) @ np.abs(sigma) @ np.abs(jacobian)))
+    if math.isnan(u_y):
+        raise ValueError("协方差矩阵不是半正定矩阵，J Σ Jᵀ 为负。")
+    if not with_budget:
+        return y_value, u_y
+    # J Σ Jᵀ = Σ_i J_i (Σ Jᵀ)_i，逐项即为各输入量（含其与其他输入量的相关项）对 u_y² 的贡献
+    variance_terms = dict(zip(x_values, (jacobian * (sigma @ jacobian)).tolist()))
+    u_vector = dict(zip(x_values, np.sqrt(np.diag(sigma)).tolist()))
+    return y_value, u_y, _uncertainty_budget(x_values, gradient, u_vector, variance_terms, u_y)
+
+
+def _uncertainty_budget(x_values, gradient: dict[str, float], u_vector: dict[str, float],
+                        variance_terms: dict[str, float], u_y: float) -> list[dict]:
+    """组装 propagate_uncertainty_budget 的不确定度预算表，按 |variance| 从大到小排列。"""
+    budget = []
+    for var_name in x_values:
+        sensitivity = gradient.get(var_name, 0.0)
+        variance = variance_terms[var_name]
+        budget.append({
+            'variable': var_name,
+            'value': float(x_values[var_name]),
+            'sensitivity': sensitivity,
+            'uncertainty': u_vector[var_name],
+            'contribution': abs(sensitivity) * u_vector[var_name],
+            'variance': variance,
+            'share': variance / u_y**2 if u_y > 0 else 0.0,
+        })
+    budget.sort(key=lambda entry: abs(entry['variance']), reverse=True)
+    return budget
+
+def _as_column_arrays(data, var_names, data_label: str) -> dict[str, np.ndarray]:
+    """
+    将批量输入统一为 {变量名: 一维浮点数组}。
+    data 可以是 {变量名: 数组} 字典，也可以是 (行数, 变量数) 的二维数组（此时必须提供 var_names 作为列名）。
+    """
+    if isinstance(data, dict):
+        return {name: np.asarray(column, dtype=float).ravel() for name, column in data.items()}
+
+    matrix = np.asarray(data, dtype=float)
+    if matrix.ndim != 2:
+        raise ValueError(f"{data_label}必须是字典或二维数组。")
+    if var_names is None:
+        raise ValueError(f"{data_label}为二维数组时必须提供列名 var_names。")
+    var_names = list(var_names)
+    if matrix.shape[1] != len(var_names):
+        raise ValueError(f"{data_label}的列数 ({matrix.shape[1]}) 与列名数量 ({len(var_names)}) 不一致。")
+    return {name: matrix[:, col] for col, name in enumerate(var_names)}
+
+
+def propagate_uncertainty_batch(function_str: str, x_values, u_x_values, var_names=None,
+                                correlation=None, covariance=None, backend: str = 'sympy', return_budget: bool = False):
+    """
+    批量计算不确定度传递：对所有行一次性进行向量化求值，结果与逐行调用 propagate_uncertainty 相同。
+    提供相关系数矩阵或协方差矩阵时，用 einsum 对所有行的 J Σ Jᵀ 一次性求值。
+    Args:
+        function_str (str): output物理量y与input物理量之间的函数关系字符串。
+        x_values: input物理量的测量值，{变量名: 数组} 字典或 (行数, 变量数) 二维数组。
+        u_x_values: input物理量的不确定度，格式同 x_values；标量或长度为1的数组会自动广播。
+        var_names (list[str], optional): x_values / u_x_values 为二维数组时的列名。
+        correlation (array-like, optional): 相关系数矩阵，(n, n) 为所有行共用，(行数, n, n) 为逐行给出；
+                                            行列顺序与 x_values 的变量顺序一致。
+        covariance (array-like, optional): 协方差矩阵，形状同 correlation；提供时不再使用 u_x_values。
+        backend (str): 求导后端，'sympy' 或 'autodiff'。
+        return_budget (bool): 为 True 时同时返回各输入量的不确定度预算。
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (y 数组, u_y 数组)。函数在某行无定义时，该行结果为 nan 或 inf。
+        return_budget 为 True 时返回 (y 数组, u_y 数组, budget)，budget 为 {变量名: {列名: 数组}}，
+        列名为 'sensitivity'、'contribution'、'variance'、'share'，含义同 propagate_uncertainty_budget。
+    """
+    if not function_str:
+        raise ValueError("函数表达式不能为空。")
+    if correlation is not None and covariance is not None:
+        raise ValueError("相关系数矩阵与协方差矩阵只能提供一个。")
+    x_columns = _as_column_arrays(x_values, var_names, "输入物理量测量值")
+    u_columns = {} if covariance is not None else _as_column_arrays(u_x_values, var_names, "输入物理量不确定度")
+    if not x_columns:
+        raise ValueError("输入物理量测量值不能为空。")
+    if not u_columns and covariance is None:
+        raise ValueError("输入物理量不确定度不能为空。")
+
+    kernel = get_compiled_kernel(function_str, x_columns.keys(), backend)
     try:
-        expr = sympy.sympify(function_str)
-    except (sympy.SympifyError, SyntaxError) as e:
-        raise ValueError(f"函数表达式无效: {e}")
+        shape = np.broadcast_shapes(*(column.shape for column in x_columns.values()),
+                                    *(column.shape for column in u_columns.values()))
+    except ValueError:
+        raise ValueError("各输入数组的长度不一致。")
+    args = [x_columns[var_name] for var_name in kernel.var_names]
 
-    # 3. 计算 output 物理量的测量值 y_value
-    # 将字典的键转换为 SymPy 符号，值保持不变
-    subs_dict = {sympy.Symbol(k): v for k, v in x_values.items()}
-    y_value = float(expr.subs(subs_dict))
-
-    # 4. 计算不确定度 u_y
-    sum_of_squares = 0.0
-    for var_name in x_values.keys():
-        sym_var = sympy.Symbol(var_name)
-        if sym_var not in expr.free_symbols:
-            # 如果变量不在表达式中，其偏导数为0，跳过
-            continue
+    with np.errstate(all="ignore"):
+        # 常数表达式或常数偏导数返回标量，需广播到统一形状
+        with _TimedStage('evaluate'):
+            y_values, *partial_derivative_values = kernel.value_grad_func(*args)
+        y_values = np.broadcast_to(y_values, shape).astype(float)
+
+        if correlation is None and covariance is None:
+            sum_of_squares = np.zeros(shape)
+            weighted_terms = {}
+            for var_name, partial_derivative_value in zip(kernel.used_names, partial_derivative_values):
+                u_xi = u_columns.get(var_name)
+                if u_xi is None:
+                    raise ValueError(f"缺少变量 '{var_name}' 的不确定度。")
+                weighted = np.asarray(partial_derivative_value, dtype=float) * u_xi
+                sum_of_squares += weighted**2
+                weighted_terms[var_name] = (partial_derivative_value, weighted)
+            u_y_values = np.sqrt(sum_of_squares)
+            if not return_budget:
+                return y_values, u_y_values
+            budget = {}
+            for var_name in x_columns:
+                sensitivity, weighted = weighted_terms.get(var_name, (0.0, 0.0))
+                budget[var_name] = _budget_columns(sensitivity, np.abs(weighted), weighted**2, u_y_values, shape)
+            return y_values, u_y_values, budget
+
+        # 按 x_values 的变量顺序组装 (行数, n) 的雅可比矩阵
+        column_index = {var_name: col for col, var_name in enumerate(x_columns)}
+        n = len(column_index)
+        jacobian = np.zeros(shape + (n,))
+        for var_name, partial_derivative_value in zip(kernel.used_names, partial_derivative_values):
+            jacobian[:, column_index[var_name]] = partial_derivative_value
+
+        if covariance is not None:
+            sigma = _check_covariance_matrix(covariance, n, allow_stacked=True)
+            weighted = jacobian
+        else:
+            # Σ_ij = r_ij u_i u_j，把 u 乘进雅可比矩阵，避免为每一行构造 Σ
+            sigma = _check_correlation_matrix(correlation, n, allow_stacked=True)
+            u_matrix = np.zeros(shape + (n,))
+            for var_name, col in column_index.items():
+                u_xi = u_columns.get(var_name)
+                if u_xi is None:
+                    if var_name in kernel.used_names:
+                        raise ValueError(f"缺少变量 '{var_name}' 的不确定度。")
+                    continue
+                u_matrix[:, col] = u_xi
+            weighted = jacobian * u_matrix
 
-        # 计算偏导数
-        partial_derivative_expr = sympy.diff(expr, sym_var)
+        if sigma.ndim == 3 and sigma.shape[0] != shape[0]:
+            raise ValueError(f"逐行给出的矩阵数量 ({sigma.shape[0]}) 与行数 ({shape[0]}) 不一致。")
+        subscripts = "ki,kij,kj->k" if sigma.ndim == 3 else "ki,ij,kj->k"
+        variance = np.einsum(subscripts, weighted, sigma, weighted, optimize=True)
+        scale = np.einsum(subscripts, np.abs(weighted), np.abs(sigma), np.abs(weighted), optimize=True)
+        u_y_values = _sqrt_of_variance(variance, scale)
+        if not return_budget:
+            return y_values, u_y_values
+        # 逐行的 (Σ Jᵀ)_i 与 J_i 相乘即为各输入量对 u_y² 的贡献；Σ 的对角线为各输入量 (或 u 加权后) 的方差
+        sigma_weighted = np.einsum("kij,kj->ki" if sigma.ndim == 3 else "ij,kj->ki", sigma, weighted)
+        contributions = np.abs(weighted) * np.sqrt(np.diagonal(sigma, axis1=-2, axis2=-1))
+        variance_terms = weighted * sigma_weighted
+        budget = {
+            var_name: _budget_columns(jacobian[:, col], contributions[:, col], variance_terms[:, col], u_y_values, shape)
+            for var_name, col in column_index.items()
+        }
+        return y_values, u_y_values, budget
 
-        # 代入数值
-        partial_derivative_value = float(partial_derivative_expr.subs(subs_dict))
 
-        # 获取对应变量的不确定度
-        u_xi = u_x_values.get(var_name)
+def _budget_columns(sensitivity, contribution, variance, u_y_values, shape) -> dict[str, np.ndarray]:
+    """propagate_uncertainty_batch 中一个输入量的不确定度预算列；u_y 为0的行占比记为0。"""
+    variance = np.broadcast_to(variance, shape).astype(float)
+    u_y_squared = u_y_values**2
+    return {
+        'sensitivity': np.broadcast_to(sensitivity, shape).astype(float),
+        'contribution': np.broadcast_to(contribution, shape).astype(float),
+        'variance': variance,
+        'share': np.divide(variance, u_y_squared, out=np.zeros(shape), where=u_y_squared > 0),
+    }
+
+# --- 多输出不确定度传递 ---
+
+def _evaluate_multi_output(kernel: MultiOutputKernel, x_columns: dict, shape: tuple) -> tuple[np.ndarray, np.ndarray]:
+    """
+    对所有行求出各输出值和雅可比矩阵。
+    Returns:
+        (values, jacobian)：形状分别为 shape + (m,) 和 shape + (m, n)，n 为 x_columns 的变量数，
+        雅可比矩阵的列顺序与 x_columns 一致，未出现在任何输出中的变量对应的列为0。
+    """
+    m = len(kernel.exprs)
+    args = [x_columns[var_name] for var_name in kernel.var_names]
+    with _TimedStage('evaluate'):
+        outputs = kernel.value_jacobian_func(*args)
+    k = len(kernel.used_names)
+    if not shape:
+        values = np.array(outputs[:m], dtype=float)
+        used_jacobian = np.array(outputs[m:], dtype=float).reshape(m, k)
+    else:
+        # 常数输出或常数偏导数返回标量，需广播到统一形状
+        values = np.empty(shape + (m,))
+        for i in range(m):
+            values[..., i] = outputs[i]
+        used_jacobian = np.empty(shape + (m, k))
+        for i in range(m):
+            for j in range(k):
+                used_jacobian[..., i, j] = outputs[m + i * k + j]
+    column_index = {var_name: col for col, var_name in enumerate(x_columns)}
+    jacobian = np.zeros(shape + (m, len(column_index)))
+    jacobian[..., [column_index[var_name] for var_name in kernel.used_names]] = used_jacobian
+    return values, jacobian
+
+
+def _output_covariance(weighted: np.ndarray, sigma) -> tuple[np.ndarray, np.ndarray]:
+    """
+    由 (加权) 雅可比矩阵 W (..., m, n) 与 Σ ((n, n) 或逐行的 (行数, n, n)) 计算输出协方差矩阵 W Σ Wᵀ 及各输出的不确定度。
+    sigma 为 None 时表示 W 已乘以各输入量的不确定度且输入量相互独立（Σ 为单位矩阵）。
+    矩阵很小，用按行广播的 matmul 计算，避免 einsum 每次调用寻找收缩顺序的开销。
+    """
+    weighted_t = np.swapaxes(weighted, -1, -2)
+    if sigma is None:
+        covariance = weighted @ weighted_t
+        return covariance, np.sqrt(np.diagonal(covariance, axis1=-2, axis2=-1))
+    covariance = weighted @ sigma @ weighted_t
+    abs_weighted = np.abs(weighted)
+    scale = np.sum((abs_weighted @ np.abs(sigma)) * abs_weighted, axis=-1)
+    return covariance, _sqrt_of_variance(np.diagonal(covariance, axis1=-2, axis2=-1), scale)
+
+
+def _multi_output_weights(kernel: MultiOutputKernel, jacobian: np.ndarray, x_columns: dict, u_columns: dict,
+                          correlation, covariance, shape: tuple, allow_stacked: bool):
+    """返回 (加权雅可比矩阵, Σ 或 None)，供 _output_covariance 使用。"""
+    n = len(x_columns)
+    if covariance is not None:
+        return jacobian, _check_covariance_matrix(covariance, n, allow_stacked=allow_stacked)
+
+    u_matrix = np.zeros(shape + (n,))
+    for col, var_name in enumerate(x_columns):
+        u_xi = u_columns.get(var_name)
         if u_xi is None:
-            raise ValueError(f"缺少变量 '{var_name}' 的不确定度。")
+            if var_name in kernel.used_names:
+                raise ValueError(f"缺少变量 '{var_name}' 的不确定度。")
+            continue
+        u_matrix[..., col] = u_xi
+    weighted = jacobian * u_matrix[..., np.newaxis, :]
+    if correlation is None:
+        return weighted, None
+    return weighted, _check_correlation_matrix(correlation, n, allow_stacked=allow_stacked)
+
+
+def propagate_uncertainty_multi(function_strs: list[str], x_values: dict[str, float], u_x_values: dict[str, float],
+                                correlation=None, covariance=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    多个输出量共用同一组输入量时的不确定度传递（例如由同一组质量和尺寸同时得到密度与体积）。
+    所有输出只解析、求导一次，公共子表达式只求值一次；输出量之间的协方差矩阵为 J Σ Jᵀ，J 为 (m, n) 雅可比矩阵。
+    Args:
+        function_strs (list[str]): m 个输出物理量的函数关系字符串，例如 ['m/(a*b*c)', 'a*b*c']。
+        x_values, u_x_values, correlation, covariance: 与 propagate_uncertainty 相同。
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (各输出的测量值 (m,), 各输出的不确定度 (m,), 输出协方差矩阵 (m, m))。
+    """
+    if not x_values:
+        raise ValueError("输入物理量测量值不能为空。")
+    if not u_x_values and covariance is None:
+        raise ValueError("输入物理量不确定度不能为空。")
+    if correlation is not None and covariance is not None:
+        raise ValueError("相关系数矩阵与协方差矩阵只能提供一个。")
+
+    kernel = get_multi_output_kernel(function_strs, x_values.keys())
+    # 使用 NumPy 标量，除以0等情形按 NumPy 的规则得到 inf / nan，再统一给出错误信息
+    x_columns = {var_name: np.float64(value) for var_name, value in x_values.items()}
+    u_columns = {} if covariance is not None else {var_name: float(u) for var_name, u in u_x_values.items()}
+
+    with np.errstate(all="ignore"):
+        values, jacobian = _evaluate_multi_output(kernel, x_columns, ())
+    for i, y_value in enumerate(values):
+        if not math.isfinite(y_value):
+            raise ValueError(f"第 {i+1} 个输出: 函数在给定测量值处无定义或结果不是有限实数。")
+    undefined = np.argwhere(~np.isfinite(jacobian))
+    if undefined.size:
+        i, col = undefined[0]
+        raise ValueError(f"第 {i+1} 个输出对变量 '{list(x_columns)[col]}' 的偏导数在给定测量值处无定义。")
+
+    with _TimedStage('combine'):
+        weighted, sigma = _multi_output_weights(kernel, jacobian, x_columns, u_columns, correlation, covariance, (), False)
+        output_covariance, u_y_values = _output_covariance(weighted, sigma)
+    if np.any(np.isnan(u_y_values)):
+        raise ValueError("协方差矩阵不是半正定矩阵，J Σ Jᵀ 为负。")
+    return values, u_y_values, output_covariance
+
 
-        sum_of_squares += (partial_derivative_value * u_xi)**2
+def propagate_uncertainty_multi_batch(function_strs: list[str], x_values, u_x_values, var_names=None,
+                                      correlation=None, covariance=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    propagate_uncertainty_multi 的批量版本：对所有行一次性向量化求值。
+    Args:
+        function_strs (list[str]): m 个输出物理量的函数关系字符串。
+        x_values, u_x_values, var_names, correlation, covariance: 与 propagate_uncertainty_batch 相同。
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (测量值 (行数, m), 不确定度 (行数, m), 输出协方差矩阵 (行数, m, m))。
+        函数在某行无定义时，该行结果为 nan 或 inf。
+    """
+    if correlation is not None and covariance is not None:
+        raise ValueError("相关系数矩阵与协方差矩阵只能提供一个。")
+    x_columns = _as_column_arrays(x_values, var_names, "输入物理量测量值")
+    u_columns = {} if covariance is not None else _as_column_arrays(u_x_values, var_names, "输入物理量不确定度")
+    if not x_columns:
+        raise ValueError("输入物理量测量值不能为空。")
+    if not u_columns and covariance is None:
+        raise ValueError("输入物理量不确定度不能为空。")
 
-    u_y = math.sqrt(sum_of_squares)
+    kernel = get_multi_output_kernel(function_strs, x_columns.keys())
+    try:
+        shape = np.broadcast_shapes(*(column.shape for column in x_columns.values()),
+                                    *(column.shape for column in u_columns.values()))
+    except ValueError:
+        raise ValueError("各输入数组的长度不一致。")
 
-    return y_value, u_y
+    with np.errstate(all="ignore"):
+        values, jacobian = _evaluate_multi_output(kernel, x_columns, shape)
+        weighted, sigma = _multi_output_weights(kernel, jacobian, x_columns, u_columns, correlation, covariance, shape, True)
+        if sigma is not None and sigma.ndim == 3 and sigma.shape[0] != shape[0]:
+            raise ValueError(f"逐行给出的矩阵数量 ({sigma.shape[0]}) 与行数 ({shape[0]}) 不一致。")
+        output_covariance, u_y_values = _output_covariance(weighted, sigma)
+    return values, u_y_values, output_covariance
 
 # --- 辅助函数：尝试将字符串转换为浮点数列表 ---
 def parse_float_list(data_str: str) -> list[float]:
@@ -230,21 +1123,82 @@ def parse_float_list(data_str: str) -> list[float]:
             raise ValueError(f"数据列表中包含非数字项: '{elem}'。请确保输入的是有效的数字。")
     return float_list
 
-# 重要的格式化函数
-def format_uncertainty_and_value(value: float, uncertainty: float) -> tuple[str, str]:
+_WHITESPACE_AND_COMMA = string.whitespace + ','
+
+
+def _whitespace_token_count_is(text: str, count: int) -> bool:
     """
-    根据国际惯例格式化不确定度和测量值：
-    1. 不确定度保留两位有效数字。
-    2. 测量值的小数点后位数与不确定度相同，并采用“四舍六入五成双”及“5后若有数字就入”的舍入规则。
+    text（首尾没有空白）按空白分隔后是否恰好有 count 项。
+    count 来自 np.fromstring 的结果，不会多于实际项数；各项之间只隔一个 ASCII 空白字符时，
+    分隔符个数 + 1 即为项数，二者相等就不必拆分字符串；否则（如 '\r\n' 换行、连续空格）用 str.split 计数。
     """
-    if uncertainty == 0:
-        # 如果不确定度为0，则测量值可以保留固定位数，这里假设为4位小数
-        return f"{value:.4f}", f"{uncertainty:.2g}"
+    if text.isascii() and sum(map(text.count, string.whitespace)) + 1 == count:
+        return True
+    return len(text.split()) == count
 
-    # 1. 格式化不确定度为两位有效数字
-    formatted_uncertainty_str = f"{uncertainty:.2g}"
-    
-    # 2. 确定不确定度的小数点后位数
+
+def _float_array_from_elements(elements) -> np.ndarray:
+    """逐项转换为浮点数，出错时指出第一个非数字项的序号（从1开始）。"""
+    result = np.empty(len(elements), dtype=float)
+    for i, elem in enumerate(elements):
+        try:
+            result[i] = float(elem)
+        except ValueError:
+            raise ValueError(f"数据列表中第 {i + 1} 项不是有效的数字: '{elem}'。请确保输入的是有效的数字。")
+    return result
+
+
+def parse_float_array(data_str: str) -> np.ndarray:
+    """
+    将字符串解析为浮点数数组，分隔规则与 parse_float_list 相同（支持中文逗号和全角空格；
+    没有逗号时按空白分隔，空白除空格外也可以是换行或制表符）。
+    数据直接解析为 NumPy 数组，不生成中间的字符串列表，适合粘贴或读入大量数据。
+    Args:
+        data_str (str): 例如 '1.2, 3.4, 5.6' 或 '1.2 3.4 5.6'。
+    Returns:
+        np.ndarray: 一维 float64 数组，没有数据时为空数组。
+    Raises:
+        ValueError: 含有非数字项时，信息中给出第一个非数字项的序号与内容。
+    """
+    # 替换中文逗号和全角空格（只在出现时替换，避免复制大字符串）
+    if '，' in data_str:
+        data_str = data_str.replace('，', ',')
+    if '　' in data_str:
+        data_str = data_str.replace('　', ' ')
+
+    # 首尾的逗号和空白不影响结果；去掉后中间若还有逗号，则按逗号分隔，
+    # 否则与 parse_float_list 相同，只有一项且其中含有空白时改为按空白分隔
+    text = data_str.strip(_WHITESPACE_AND_COMMA)
+    if not text:
+        return np.empty(0)
+    use_whitespace = ',' not in text and len(text.split(None, 1)) > 1
+
+    # 快速路径: NumPy 直接解析，不生成中间的字符串列表。
+    # NumPy 把逗号之间只有空白的空项解析为 -1，且接受 float() 不接受的 "nan(...)"；
+    # 旧版 NumPy (< 2.0) 遇到非数字项时只给出警告并返回之前已解析的部分，因此两种分隔方式都核对项数。
+    # 出现这些情况或解析失败时改为逐项解析，以得到与 parse_float_list 相同的结果和准确的出错位置
+    if '(' not in text:
+        try:
+            result = np.fromstring(text, dtype=float, sep=' ' if use_whitespace else ',')
+        except ValueError:
+            result = None # 含有非数字项或 NumPy 不接受的写法（如 '1e999'、'1_000'）
+        if result is not None:
+            if use_whitespace:
+                complete = _whitespace_token_count_is(text, len(result))
+            else:
+                complete = len(result) == text.count(',') + 1 and not (result == -1).any()
+            if complete:
+                return result
+
+    if use_whitespace:
+        elements = text.split()
+    else:
+        elements = [e.strip() for e in text.split(',') if e.strip()]
+    return _float_array_from_elements(elements)
+
+
+def _decimal_places_of_formatted_uncertainty(formatted_uncertainty_str: str) -> int:
+    """根据两位有效数字格式化后的不确定度字符串，确定其小数点后位数。"""
     decimal_places_uncertainty = 0
     try:
         # 使用Decimal进行精确转换，避免浮点数精度问题影响字符串解析
@@ -282,6 +1236,30 @@ def format_uncertainty_and_value(value: float, uncertainty: float) -> tuple[str,
         decimal_places_uncertainty = 4 # 安全默认值
         print(f"警告: 无法精确确定不确定度 '{formatted_uncertainty_str}' 的小数点位数，将使用默认 {decimal_places_uncertainty} 位。")
 
+    return decimal_places_uncertainty
+
+
+# 重要的格式化函数
+def format_uncertainty_and_value(value: float, uncertainty: float) -> tuple[str, str]:
+    """
+    根据国际惯例格式化不确定度和测量值：
+    1. 不确定度保留两位有效数字。
+    2. 测量值的小数点后位数与不确定度相同，并采用“四舍六入五成双”及“5后若有数字就入”的舍入规则。
+    """
+    with _TimedStage('format'):
+        return _format_uncertainty_and_value(value, uncertainty)
+
+
+def _format_uncertainty_and_value(value: float, uncertainty: float) -> tuple[str, str]:
+    if uncertainty == 0:
+        # 如果不确定度为0，则测量值可以保留固定位数，这里假设为4位小数
+        return f"{value:.4f}", f"{uncertainty:.2g}"
+
+    # 1. 格式化不确定度为两位有效数字
+    formatted_uncertainty_str = f"{uncertainty:.2g}"
+    
+    # 2. 确定不确定度的小数点后位数
+    decimal_places_uncertainty = _decimal_places_of_formatted_uncertainty(formatted_uncertainty_str)
 
     # 3. 使用 custom_round_decimal 舍入测量值到指定的小数位数
     formatted_value_float = custom_round_decimal(value, decimal_places_uncertainty)
@@ -292,4 +1270,76 @@ def format_uncertainty_and_value(value: float, uncertainty: float) -> tuple[str,
     # 这里只是为了确保输出字符串的位数正确。
     formatted_value_str = f"{formatted_value_float:.{decimal_places_uncertainty}f}"
 
-    return formatted_value_str, formatted_uncertainty_str
\ No newline at end of file
+    return formatted_value_str, formatted_uncertainty_str
+
+
+def uncertainty_decimal_places(uncertainties) -> np.ndarray:
+    """
+    批量确定不确定度（保留两位有效数字后）的小数点后位数，结果与 format_uncertainty_and_value 一致。
+    用整数 log10 运算代替字符串解析：设两位有效数字为 m (10~99)、数量级为 e，
+    则位数为 1-e；若 m 的末位为0（格式化时会被省略），则为 -e；负数取0。
+    接近舍入边界的元素退回到精确的字符串方法。
+    Args:
+        uncertainties: 不确定度数组。
+    Returns:
+        np.ndarray: 与输入形状相同的整数数组。
+    """
+    u = np.abs(np.asarray(uncertainties, dtype=float))
+    decimals = np.zeros(u.shape, dtype=np.int64)
+    # 0、nan、inf 的位数均为0；极大或极小的数量级留给精确方法处理
+    regular = np.isfinite(u) & (u > 1e-300) & (u < 1e300)
+    exact = np.zeros(u.shape, dtype=bool)
+
+    u_regular = u[regular]
+    with np.errstate(all="ignore"):
+        exponent = np.floor(np.log10(u_regular)).astype(np.int64)
+        scaled = u_regular / 10.0**(exponent - 1) # 约在 [10, 100) 内
+    # 修正 log10 在10的整数次幂附近的误差
+    too_large = scaled >= 100
+    exponent[too_large] += 1
+    scaled[too_large] /= 10
+    too_small = scaled < 10
+    exponent[too_small] -= 1
+    scaled[too_small] *= 10
+
+    # 两位有效数字恰好落在 xx.5 附近时，浮点除法的误差可能改变舍入方向
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-9
+    mantissa = np.rint(scaled).astype(np.int64)
+    carried = mantissa == 100 # 例如 0.0996 -> 0.10
+    mantissa[carried] = 10
+    exponent[carried] += 1
+    decimals[regular] = np.maximum(0, np.where(mantissa % 10 == 0, -exponent, 1 - exponent))
+    exact[regular] = near_tie
+    exact |= ~regular & np.isfinite(u) & (u > 0)
+
+    for index in zip(*np.nonzero(exact)):
+        decimals[index] = _decimal_places_of_formatted_uncertainty(f"{u[index]:.2g}")
+    return decimals
+
+
+def format_uncertainty_and_value_batch(values, uncertainties) -> tuple[list[str], list[str]]:
+    """
+    批量格式化测量值和不确定度，规则与 format_uncertainty_and_value 完全相同，适用于生成大表格。
+    Args:
+        values: 测量值数组。
+        uncertainties: 不确定度数组，长度与 values 相同。
+    Returns:
+        tuple[list[str], list[str]]: (格式化后的测量值列表, 格式化后的不确定度列表)
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    uncertainties = np.asarray(uncertainties, dtype=float).ravel()
+    if values.shape != uncertainties.shape:
+        raise ValueError("测量值与不确定度的数量不一致。")
+
+    decimals = uncertainty_decimal_places(uncertainties)
+    rounded_values = custom_round_decimal_array(values, decimals)
+    formatted_values = []
+    formatted_uncertainties = []
+    for value, rounded_value, uncertainty, decimal_places in zip(
+            values.tolist(), rounded_values.tolist(), uncertainties.tolist(), decimals.tolist()):
+        if uncertainty == 0:
+            formatted_values.append(f"{value:.4f}")
+        else:
+            formatted_values.append(f"{rounded_value:.{decimal_places}f}")
+        formatted_uncertainties.append(f"{uncertainty:.2g}")
+    return formatted_values, formatted_uncertainties
@@ -0,0 +1,346 @@
+"""
+不确定度计算的本地 HTTP 服务（JSON 接口，仅依赖标准库与计算核心）。
+
+其他机器或脚本不必安装图形界面，只需向本服务发送 JSON 请求即可得到计算结果。
+所有接口均为 POST，请求体与响应体都是 JSON 对象；出错时返回 400 和 {"error": 错误信息}。
+
+  POST /propagate  {"function": "x1*x2", "values": {"x1": 1.0, "x2": 2.0}, "uncertainties": {"x1": 0.1, "x2": 0.2}}
+                   -> {"y": "2.00", "u_y": "0.28", "y_raw": 2.0, "u_y_raw": 0.2828...}
+  POST /type_a     {"data": [1.01, 1.02, 0.99], "t_factor": 1.0}      -> {"mean": ..., "u_a": ..., "s_x": ...}
+  POST /type_b     {"limit": 0.02, "distribution": "均匀分布"}          -> {"u_b": ...}
+  POST /combined   {"u_a": 0.01, "u_b": 0.02}                          -> {"u_c": ...}
+  GET  /health     -> {"status": "ok", "kernel_cache": {...}, "batches": ..., "batched_requests": ...}
+
+所有请求共用同一个进程内的编译内核缓存。同一时刻到达的、函数表达式与变量相同的传递请求默认会合并
+（等待窗口 DEFAULT_BATCH_WINDOW，可用 --batch-window-ms 调整，0 表示不合并），批次不少于 MIN_VECTORIZED_BATCH
+个时用一次 propagate_uncertainty_batch 向量化求值。
+
+用法: python calculation_server.py [--host 127.0.0.1] [--port 8765] [--batch-window-ms 2] [--kernel-cache [DIR]]
+"""
+import argparse
+import json
+import math
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np # 用于向量化计算，需要安装 pip install numpy
+from calculation_formulas import (
+    _normalize_function_str,
+    calculate_a_uncertainty_multiple_measurements,
+    calculate_b_uncertainty_from_limit,
+    calculate_combined_uncertainty,
+    enable_kernel_disk_cache,
+    format_uncertainty_and_value,
+    get_kernel_cache_info,
+    propagate_uncertainty,
+    propagate_uncertainty_batch,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# 合并请求时，第一个请求等待同批其他请求到达的时间 (s)；为0时不合并。
+# 服务中的请求都已加入批次时立即开始计算，单个客户端的顺序请求不会因等待而变慢；测量结果见 BATCHING_NOTE
+DEFAULT_BATCH_WINDOW = 0.002
+# 每批最多合并的请求数
+MAX_BATCH_SIZE = 4096
+# 向量化求值的最小行数：NumPy 对很短的数组逐个运算的固定开销比标量计算大，批次较小时逐个计算更快
+MIN_VECTORIZED_BATCH = 8
+# 请求体大小上限 (字节)
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+BATCHING_NOTE = """\
+请求合并 (benchmarks/load_test_server.py，单核机器，3 个变量的函数):
+  16 个客户端并发: 不合并 1327 req/s、p99 42.9 ms；合并窗口 1~5 ms 1199~1539 req/s、p99 17~25 ms
+  64 个客户端并发同一函数: 不合并 1492 req/s、p99 225 ms；合并 1453 req/s、p99 178 ms（平均每批 12 个请求）
+  单个客户端顺序请求: 不合并 p50 0.64 ms；合并 p50 0.73 ms（不等待窗口）
+HTTP 与 JSON 处理占每个请求的大部分时间，合并对吞吐量的影响在测量误差范围内，主要是降低高并发时的尾延迟；
+函数越复杂、并发的同一函数请求越多，合并的收益越大。"""
+
+
+# --- 传递请求的合并 ---
+
+class _Batch:
+    __slots__ = ("items", "results", "done")
+
+    def __init__(self):
+        self.items = [] # [(x_values, u_x_values), ...]
+        self.results = None # 与 items 对应的 (y, u_y) 或异常
+        self.done = threading.Event()
+
+
+class PropagationBatcher:
+    """
+    把并发到达的同一函数表达式（规范化后相同且变量相同）的传递请求合并为一次向量化求值。
+    第一个到达的请求负责计算：最多等待 batch_window 秒收集同批请求后调用 propagate_uncertainty_batch，
+    其余请求等待结果。服务中正在处理的请求（由 request_started / request_finished 统计）都已加入某个批次时，
+    不会再有请求加入，立即开始计算；因此单个客户端的顺序请求不会增加延迟。
+    """
+
+    def __init__(self, batch_window: float = DEFAULT_BATCH_WINDOW, max_batch_size: int = MAX_BATCH_SIZE):
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock) # 有请求加入批次或结束时通知
+        self._open_batches: dict[tuple, _Batch] = {}
+        self._active_requests = 0 # 服务中正在处理的请求数
+        self._waiting_requests = 0 # 已加入尚未开始计算的批次的请求数
+        self.batches = 0 # 已完成的批次数
+        self.batched_requests = 0 # 这些批次包含的请求总数
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._active_requests += 1
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self._active_requests -= 1
+            self._changed.notify_all()
+
+    def _all_requests_waiting(self) -> bool:
+        return self._waiting_requests >= self._active_requests
+
+    def propagate(self, function_str: str, x_values: dict[str, float], u_x_values: dict[str, float]) -> tuple[float, float]:
+        """与 propagate_uncertainty 的结果和错误信息相同。"""
+        if not function_str:
+            raise ValueError("函数表达式不能为空。")
+        if not x_values:
+            raise ValueError("输入物理量测量值不能为空。")
+        if self.batch_window <= 0:
+            return propagate_uncertainty(function_str, x_values, u_x_values)
+
+        key = (_normalize_function_str(function_str), tuple(sorted(x_values)))
+        with self._lock:
+            batch = self._open_batches.get(key)
+            is_leader = batch is None or len(batch.items) >= self.max_batch_size
+            if is_leader:
+                batch = _Batch()
+                self._open_batches[key] = batch
+            index = len(batch.items)
+            batch.items.append((x_values, u_x_values))
+            self._waiting_requests += 1
+            self._changed.notify_all()
+
+        if is_leader:
+            with self._lock:
+                self._changed.wait_for(self._all_requests_waiting, timeout=self.batch_window)
+                if self._open_batches.get(key) is batch:
+                    del self._open_batches[key] # 之后到达的请求开始新的批次
+                self._waiting_requests -= len(batch.items)
+            self._run(function_str, batch)
+        else:
+            batch.done.wait()
+
+        result = batch.results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _run(self, function_str: str, batch: _Batch) -> None:
+        try:
+            batch.results = self._evaluate(function_str, batch.items)
+        except Exception as e:
+            batch.results = [e] * len(batch.items)
+        finally:
+            with self._lock:
+                self.batches += 1
+                self.batched_requests += len(batch.items)
+            batch.done.set()
+
+    @staticmethod
+    def _evaluate(function_str: str, items: list) -> list:
+        if len(items) < MIN_VECTORIZED_BATCH:
+            return [_propagate_or_error(function_str, x_values, u_x_values) for x_values, u_x_values in items]
+
+        var_names = list(items[0][0])
+        x_columns = {name: np.array([x_values[name] for x_values, _ in items], dtype=float) for name in var_names}
+        # 缺少的不确定度记为 nan：若该变量出现在表达式中，该行结果为 nan，再逐个计算以给出准确的错误信息
+        u_columns = {name: np.array([u_x_values.get(name, math.nan) for _, u_x_values in items], dtype=float)
+                     for name in var_names}
+        # 表达式本身有误时抛出的异常对整批请求相同，由 _run 返回给每个请求
+        y_values, u_y_values = propagate_uncertainty_batch(function_str, x_columns, u_columns)
+
+        results = []
+        for row, (y, u_y) in enumerate(zip(y_values.tolist(), u_y_values.tolist())):
+            if math.isfinite(y) and math.isfinite(u_y):
+                results.append((y, u_y))
+            else:
+                results.append(_propagate_or_error(function_str, *items[row]))
+        return results
+
+
+def _propagate_or_error(function_str: str, x_values: dict, u_x_values: dict):
+    try:
+        return propagate_uncertainty(function_str, x_values, u_x_values)
+    except Exception as e:
+        return e
+
+
+# --- 接口 ---
+
+def _to_float_dict(data, name: str) -> dict[str, float]:
+    if not isinstance(data, dict):
+        raise ValueError(f"'{name}' 必须是 {{变量名: 数值}} 形式。")
+    try:
+        return {str(k): float(v) for k, v in data.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' 中包含非数字项。")
+
+
+def _to_float(payload: dict, name: str, default=None) -> float:
+    value = payload.get(name, default)
+    if value is None:
+        raise ValueError(f"缺少字段 '{name}'。")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' 必须是有效的数字。")
+
+
+def handle_propagate(payload: dict, batcher: PropagationBatcher) -> dict:
+    function_str = str(payload.get("function", "")).strip()
+    x_values = _to_float_dict(payload.get("values", {}), "values")
+    u_x_values = _to_float_dict(payload.get("uncertainties", {}), "uncertainties")
+    y_value, u_y = batcher.propagate(function_str, x_values, u_x_values)
+    formatted_value, formatted_uncertainty = format_uncertainty_and_value(y_value, u_y)
+    return {"y": formatted_value, "u_y": formatted_uncertainty, "y_raw": y_value, "u_y_raw": u_y}
+
+
+def handle_type_a(payload: dict, batcher: PropagationBatcher) -> dict:
+    data = payload.get("data")
+    if not isinstance(data, list):
+        raise ValueError("'data' 必须是数值列表。")
+    try:
+        data_array = np.asarray(data, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("'data' 中包含非数字项。")
+    mean_val, u_a, s_x = calculate_a_uncertainty_multiple_measurements(data_array, _to_float(payload, "t_factor", 1.0))
+    return {"mean": mean_val, "u_a": u_a, "s_x": s_x}
+
+
+def handle_type_b(payload: dict, batcher: PropagationBatcher) -> dict:
+    u_b = calculate_b_uncertainty_from_limit(_to_float(payload, "limit"), str(payload.get("distribution", "均匀分布")))
+    return {"u_b": u_b}
+
+
+def handle_combined(payload: dict, batcher: PropagationBatcher) -> dict:
+    return {"u_c": calculate_combined_uncertainty(_to_float(payload, "u_a"), _to_float(payload, "u_b"))}
+
+
+_ENDPOINTS = {
+    "/propagate": handle_propagate,
+    "/type_a": handle_type_a,
+    "/type_b": handle_type_b,
+    "/combined": handle_combined,
+}
+
+
+# --- HTTP 服务 ---
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # 支持长连接，客户端可以复用同一个连接发送多个请求
+    disable_nagle_algorithm = True # 响应头与响应体分两次写出，不关闭 Nagle 算法时长连接上每个响应会延迟约 40 ms
+    server: "CalculationServer"
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": f"未知的接口: {self.path}"})
+            return
+        batcher = self.server.batcher
+        self._send_json(200, {
+            "status": "ok",
+            "kernel_cache": get_kernel_cache_info()._asdict(),
+            "batches": batcher.batches,
+            "batched_requests": batcher.batched_requests,
+        })
+
+    def do_POST(self):
+        handler = _ENDPOINTS.get(self.path)
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_REQUEST_BYTES:
+            self.close_connection = True
+            self._send_json(413 if length > MAX_REQUEST_BYTES else 400, {"error": "请求体长度无效或过大。"})
+            return
+        body = self.rfile.read(length)
+        if handler is None:
+            self._send_json(404, {"error": f"未知的接口: {self.path}"})
+            return
+
+        batcher = self.server.batcher
+        batcher.request_started()
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("请求体必须是 JSON 对象。")
+            result = handler(payload, batcher)
+        except json.JSONDecodeError as e:
+            self._send_json(400, {"error": f"请求体不是有效的 JSON: {e}"})
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": f"发生未知错误: {e}"})
+        else:
+            self._send_json(200, result)
+        finally:
+            batcher.request_finished()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class CalculationServer(ThreadingHTTPServer):
+    """每个连接一个线程的计算服务；所有线程共用同一个 PropagationBatcher 和编译内核缓存。"""
+    daemon_threads = True
+    request_queue_size = 128 # 默认的 listen 队列长度为 5，并发连接较多时会被重置
+
+    def __init__(self, address: tuple[str, int], batch_window: float = DEFAULT_BATCH_WINDOW, verbose: bool = False):
+        super().__init__(address, _RequestHandler)
+        self.batcher = PropagationBatcher(batch_window)
+        self.verbose = verbose
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="不确定度计算本地 HTTP 服务", epilog=BATCHING_NOTE,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"监听地址 (默认 {DEFAULT_HOST}，仅本机可访问)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"端口 (默认 {DEFAULT_PORT}，0 表示自动选择)")
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW * 1e3,
+                        help=f"合并同一函数请求的等待时间 (默认 {DEFAULT_BATCH_WINDOW * 1e3:g} ms，0 表示不合并)")
+    parser.add_argument("--kernel-cache", nargs="?", const="", metavar="DIR",
+                        help="开启编译内核磁盘缓存；不给出目录时使用默认缓存目录。"
+                             "缓存文件中的代码会被加载执行，目录必须只有当前用户可写（新建时权限为 0700），"
+                             "不要使用共享或来源不可信的目录；其他用户可写的目录会被拒绝")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出每个请求的访问日志")
+    args = parser.parse_args(argv)
+
+    if args.kernel_cache is not None:
+        try:
+            enable_kernel_disk_cache(args.kernel_cache)
+        except (OSError, ValueError) as e:
+            parser.error(f"--kernel-cache: {e}")
+    server = CalculationServer((args.host, args.port), args.batch_window_ms / 1e3, args.verbose)
+    host, port = server.server_address[:2]
+    print(f"计算服务已启动: http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
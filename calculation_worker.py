@@ -0,0 +1,178 @@
+"""
+界面使用的后台计算进程。
+
+计算在一个长期存在的子进程中进行，界面线程只负责提交任务和定时 (after) 查询结果，不会被计算阻塞：
+- 提交的任务只包含从输入框读取好的数值快照，计算进程不接触任何 Tk 组件；
+- 同一时刻最多运行一个任务；运行中提交的新任务取代尚未开始的旧任务，旧任务的结果被丢弃；
+- 取消任务、或新任务到达时正在运行的任务已超过 SUPERSEDE_RESTART_AFTER 秒（例如化简很大的表达式），
+  直接终止计算进程并重新启动。线程无法被强制停止，因此使用进程；
+- 计算进程中的编译内核缓存在任务之间保留，同一函数表达式的重复计算不必重新求导。
+"""
+import multiprocessing
+import time
+from typing import Callable, NamedTuple, Optional
+
+from calculation_formulas import collect_stage_timings
+
+# 新任务到达时，正在运行的任务超过该时间 (s) 仍未完成，则终止计算进程而不再等待其结果
+SUPERSEDE_RESTART_AFTER = 0.5
+# 关闭计算进程时等待其正常退出的时间 (s)
+SHUTDOWN_TIMEOUT = 1.0
+
+
+class JobResult(NamedTuple):
+    """
+    job_id: submit 返回的任务编号；
+    value: 任务函数的返回值，出错时为 None；
+    error: 出错时为 (标题, 错误信息)，与界面中 messagebox.showerror 的参数一致；
+    timings: 任务在计算进程中记录的各阶段耗时 (StageTimings)。
+    """
+    job_id: int
+    value: object
+    error: Optional[tuple[str, str]]
+    timings: object
+
+
+def _worker_main(connection) -> None:
+    """计算进程的主循环：依次接收 (任务编号, 函数, 参数) 并返回 JobResult，收到 None 时退出。"""
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            return # 界面进程已退出
+        if message is None:
+            return
+        job_id, func, args = message
+        value, error = None, None
+        with collect_stage_timings() as timings:
+            try:
+                value = func(*args)
+            except ValueError as e:
+                error = ("输入错误", str(e))
+            except Exception as e:
+                error = ("计算错误", f"发生未知错误: {e}")
+        try:
+            connection.send(JobResult(job_id, value, error, timings))
+        except Exception as e:
+            # 返回值无法序列化
+            connection.send(JobResult(job_id, None, ("计算错误", f"无法返回计算结果: {e}"), timings))
+
+
+class CalculationWorker:
+    """
+    后台计算进程的界面端。所有方法都应在界面线程中调用；
+    界面通过 after 定时调用 poll 取得结果，busy 为 False 时可以停止轮询。
+    """
+
+    def __init__(self, restart_after: float = SUPERSEDE_RESTART_AFTER):
+        self.restart_after = restart_after
+        # Tk 进程中含有多个线程，fork 出的子进程可能死锁，因此总是使用 spawn
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._connection = None
+        self._next_job_id = 0
+        self._latest_job_id = None # 最近一次提交的任务，只有它的结果会被返回
+        self._running = None # (任务编号, 开始时间)
+        self._pending = None # (任务编号, 函数, 参数)，等待当前任务完成后运行
+
+    def start(self) -> None:
+        """启动计算进程（已在运行时不做任何事）。进入页面时调用，可以提前完成进程启动与模块导入。"""
+        if self._process is not None and self._process.is_alive():
+            return
+        parent_connection, child_connection = self._context.Pipe()
+        self._process = self._context.Process(target=_worker_main, args=(child_connection,), daemon=True)
+        self._process.start()
+        child_connection.close()
+        self._connection = parent_connection
+        self._running = None
+
+    def _terminate(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(SHUTDOWN_TIMEOUT)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+        if self._connection is not None:
+            self._connection.close()
+        self._process = None
+        self._connection = None
+        self._running = None
+
+    @property
+    def busy(self) -> bool:
+        """是否有正在运行或等待运行的任务。"""
+        return self._running is not None or self._pending is not None
+
+    def submit(self, func: Callable, *args) -> int:
+        """
+        提交任务 func(*args)，返回任务编号。func 和参数需能被 pickle（模块级函数与数值快照）。
+        之前提交的、尚未返回的任务都被取代，其结果不会再由 poll 返回。
+        """
+        self._next_job_id += 1
+        job_id = self._next_job_id
+        self._latest_job_id = job_id
+        self._pending = (job_id, func, args)
+        if self._running is not None and time.monotonic() - self._running[1] > self.restart_after:
+            self._terminate() # 正在运行的旧任务耗时过长，不再等待
+        self._dispatch()
+        return job_id
+
+    def cancel(self) -> None:
+        """取消所有任务；正在运行的任务通过终止计算进程立即停止，随后重新启动进程。"""
+        self._pending = None
+        self._latest_job_id = None
+        if self._running is not None:
+            self._terminate()
+            self.start()
+
+    def _dispatch(self) -> None:
+        if self._running is not None or self._pending is None:
+            return
+        self.start()
+        job_id, func, args = self._pending
+        self._pending = None
+        try:
+            self._connection.send((job_id, func, args))
+        except (OSError, ValueError):
+            # 计算进程已经退出，重新启动后再发送一次
+            self._terminate()
+            self.start()
+            self._connection.send((job_id, func, args))
+        self._running = (job_id, time.monotonic())
+
+    def poll(self) -> Optional[JobResult]:
+        """
+        不阻塞地检查计算进程，返回最近一次提交的任务的结果；没有新结果时返回 None。
+        计算进程意外退出（例如内存不足）时返回带错误信息的结果，下次提交任务时重新启动进程。
+        """
+        if self._running is None:
+            return None
+        result = None
+        try:
+            if self._connection.poll():
+                result = self._connection.recv()
+        except (EOFError, OSError):
+            job_id = self._running[0]
+            self._terminate()
+            result = JobResult(job_id, None, ("计算错误", "计算进程意外退出，请检查输入后重试。"), None)
+        if result is None:
+            return None
+
+        self._running = None
+        self._dispatch()
+        return result if result.job_id == self._latest_job_id else None
+
+    def close(self) -> None:
+        """通知计算进程退出；离开页面或关闭程序时调用。"""
+        self._pending = None
+        self._latest_job_id = None
+        if self._process is None:
+            return
+        if self._running is None:
+            try:
+                self._connection.send(None)
+                self._process.join(SHUTDOWN_TIMEOUT)
+            except (OSError, ValueError):
+                pass
+        self._terminate()
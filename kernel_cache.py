@@ -0,0 +1,248 @@
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import stat
+import sys
+import tempfile
+from types import CodeType, ModuleType
+
+import sympy # 用于符号计算和求导，需要安装 pip install sympy
+from calculation_formulas import CompiledKernel
+
+# --- 编译内核的磁盘缓存 ---
+# 把符号求导得到的表达式和 lambdify 生成的数值函数源代码保存到磁盘，
+# 新进程遇到用过的函数表达式时直接加载，不必重新解析、求导和生成代码。
+# 缓存文件用 pickle 保存，加载时会执行其中的代码，因此只使用当前用户独占的缓存目录：
+# 目录以 0o700 创建，其他用户可写的目录（或可被其他用户替换的上级目录）拒绝使用，
+# 不属于当前用户或可被其他用户写入的缓存文件不会被加载。
+
+# 缓存文件格式版本，修改保存内容时递增，旧文件自动失效
+CACHE_FORMAT_VERSION = 1
+# 缓存目录的默认容量上限 (字节)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+CACHE_FILE_SUFFIX = ".pkl"
+
+
+def default_cache_directory() -> str:
+    """默认缓存目录: $XDG_CACHE_HOME/uncertainty_calculator/kernels，缺省为 ~/.cache 下的同名目录。"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "uncertainty_calculator", "kernels")
+
+
+def _writable_by_others(mode: int) -> bool:
+    return bool(mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _check_cache_directory(directory: str) -> None:
+    """
+    检查缓存目录只有当前用户可写；目录属于当前用户但权限过宽时收紧为 0o700。
+    上级目录须属于当前用户或 root，且其他用户不可写（设置了粘滞位的目录如 /tmp 除外），否则其他用户可以替换缓存目录。
+    不支持 POSIX 权限的系统 (Windows) 不检查。
+    """
+    if not hasattr(os, "getuid"):
+        return
+    uid = os.getuid()
+    directory = os.path.realpath(directory)
+    info = os.stat(directory)
+    if info.st_uid != uid:
+        raise ValueError(f"缓存目录 {directory} 不属于当前用户，拒绝使用。")
+    if _writable_by_others(info.st_mode):
+        os.chmod(directory, 0o700)
+
+    parent = os.path.dirname(directory)
+    while True:
+        info = os.stat(parent)
+        if info.st_uid not in (uid, 0) or _writable_by_others(info.st_mode) and not info.st_mode & stat.S_ISVTX:
+            raise ValueError(f"缓存目录的上级目录 {parent} 可被其他用户修改，拒绝使用。")
+        if os.path.dirname(parent) == parent:
+            break
+        parent = os.path.dirname(parent)
+
+
+def prepare_cache_directory(directory: str = None) -> str:
+    """
+    创建缓存目录（权限 0o700）并检查只有当前用户可写，不加载或写入任何缓存项。
+    Args:
+        directory (str, optional): 缓存目录，缺省为 default_cache_directory()。
+    Returns:
+        str: 缓存目录。
+    Raises:
+        OSError: 无法创建目录。
+        ValueError: 目录或其上级目录可被其他用户修改，见 _check_cache_directory。
+    """
+    directory = directory or default_cache_directory()
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    _check_cache_directory(directory)
+    return directory
+
+
+def _is_trusted_file(info: os.stat_result) -> bool:
+    """缓存文件属于当前用户且其他用户不可写时才加载。"""
+    if not hasattr(os, "getuid"):
+        return True
+    return info.st_uid == os.getuid() and not _writable_by_others(info.st_mode)
+
+
+def _environment_tag() -> str:
+    """SymPy、NumPy 或 Python 版本变化时，求导结果和生成的代码可能不同，缓存项随之失效。"""
+    import numpy as np
+    return f"sympy-{sympy.__version__}/numpy-{np.__version__}/py-{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def _global_names(code: CodeType) -> set[str]:
+    """生成的函数（包括其中的嵌套函数）引用的全局名称。"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _serialize_function(func) -> tuple[str, str, dict]:
+    """把 lambdify 生成的函数保存为 (函数名, 源代码, 依赖的全局名称)；模块按名称保存，其余对象直接 pickle。"""
+    namespace = {}
+    for name in _global_names(func.__code__):
+        if name not in func.__globals__:
+            continue # 内置名称
+        value = func.__globals__[name]
+        namespace[name] = ("module", value.__name__) if isinstance(value, ModuleType) else ("object", value)
+    return func.__name__, inspect.getsource(func), namespace
+
+
+def _deserialize_function(serialized):
+    name, source, namespace = serialized
+    globals_dict = {}
+    for key, (kind, value) in namespace.items():
+        globals_dict[key] = importlib.import_module(value) if kind == "module" else value
+    exec(compile(source, f"<cached kernel {name}>", "exec"), globals_dict)
+    return globals_dict[name]
+
+
+class KernelDiskCache:
+    """
+    编译内核的磁盘缓存。
+    - 键为规范化函数表达式、排序后的变量名和运行环境版本的 SHA-256 摘要，每个键对应目录中的一个文件；
+    - 命中时更新文件的修改时间，超出容量上限时按修改时间淘汰最久未使用的文件 (LRU)；
+    - 写入先写临时文件再用 os.replace 原子替换，多个进程同时写同一项时读者只会看到完整的文件；
+    - 文件损坏或版本不符时视为未命中并删除该文件；
+    - 缓存目录与缓存文件须只有当前用户可写（见 _check_cache_directory），否则拒绝使用或不加载。
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes <= 0:
+            raise ValueError("缓存容量上限必须是正整数。")
+        self.directory = prepare_cache_directory(directory)
+        self.max_bytes = max_bytes
+        self.environment_tag = _environment_tag()
+
+    def _key(self, function_str: str, var_names: tuple[str, ...]) -> str:
+        canonical = json.dumps([CACHE_FORMAT_VERSION, self.environment_tag, function_str, list(var_names)])
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_FILE_SUFFIX)
+
+    def load(self, function_str: str, var_names: tuple[str, ...]):
+        """读取缓存项，未命中时返回 None。"""
+        key = self._key(function_str, var_names)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                # 检查已打开的文件本身，避免检查后被替换
+                if not _is_trusted_file(os.fstat(f.fileno())):
+                    raise ValueError("缓存文件可被其他用户修改。")
+                entry = pickle.load(f)
+            if entry["key"] != key:
+                raise ValueError("缓存项与键不符。")
+            kernel = CompiledKernel(
+                expr=entry["expr"],
+                var_names=var_names,
+                used_names=entry["used_names"],
+                value_func=_deserialize_function(entry["value_func"]),
+                value_grad_func=_deserialize_function(entry["value_grad_func"]),
+            )
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # 文件损坏、被截断或由不兼容的版本写入：删除后按未命中处理
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path) # 记录最近使用时间，供 LRU 淘汰
+        except OSError:
+            pass
+        return kernel
+
+    def store(self, function_str: str, var_names: tuple[str, ...], kernel: CompiledKernel) -> None:
+        """保存缓存项并在超出容量时淘汰旧项。写入失败（如磁盘已满）不影响计算。"""
+        key = self._key(function_str, var_names)
+        try:
+            data = pickle.dumps({
+                "key": key,
+                "expr": kernel.expr,
+                "used_names": kernel.used_names,
+                "value_func": _serialize_function(kernel.value_func),
+                "value_grad_func": _serialize_function(kernel.value_grad_func),
+            }, protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, TypeError, AttributeError, pickle.PicklingError):
+            return # 无法序列化的表达式不缓存
+
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=key, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, self._path(key))
+            except BaseException:
+                self._remove(temp_path)
+                raise
+        except OSError:
+            return
+        self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(CACHE_FILE_SUFFIX):
+                        continue
+                    try:
+                        info = entry.stat()
+                    except FileNotFoundError:
+                        continue # 已被其他进程淘汰
+                    entries.append((info.st_mtime, info.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _evict(self) -> None:
+        """按修改时间从旧到新删除缓存文件，直到总大小不超过容量上限。"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def size(self) -> tuple[int, int]:
+        """返回 (缓存项数, 总字节数)。"""
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    def clear(self) -> None:
+        """删除全部缓存项，例如在升级 SymPy 后手动清理旧版本留下的文件。"""
+        for _, _, path in self._entries():
+            self._remove(path)
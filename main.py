@@ -2,9 +2,7 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox
 
-# 导入所有功能模块
-from single_quantity import SingleQuantityCalculator
-from uncertainty_propagation import UncertaintyPropagationCalculator
+# 功能模块在进入对应页面时才导入，使主菜单尽快显示
 
 class UncertaintyCalculatorApp(ctk.CTk):
     def __init__(self):
@@ -72,12 +70,14 @@ class UncertaintyCalculatorApp(ctk.CTk):
         self.propagation_button.grid(row=3, column=0, pady=30)
 
     def show_single_quantity_calculator(self):
+        from single_quantity import SingleQuantityCalculator
         self.clear_frame()
         self.current_page = SingleQuantityCalculator(self.main_frame, self)
         self.current_page.grid(row=0, column=0, columnspan=1, rowspan=5, sticky="nsew")
 
 
     def show_uncertainty_propagation_calculator(self):
+        from uncertainty_propagation import UncertaintyPropagationCalculator
         self.clear_frame()
         self.current_page = UncertaintyPropagationCalculator(self.main_frame, self)
         self.current_page.grid(row=0, column=0, columnspan=1, rowspan=5, sticky="nsew")
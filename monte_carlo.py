@@ -0,0 +1,217 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+import math
+import numpy as np # 用于随机抽样和向量化计算，需要安装 pip install numpy
+from calculation_formulas import K_UNIFORM, K_TRIANGULAR, VALID_DISTRIBUTIONS, RunningStatistics, get_compiled_kernel
+
+# --- 蒙特卡洛法 (GUM 补充文件1) 不确定度传递 ---
+
+# 每个分块的样本数：内存占用约为 分块样本数 × 变量数 × 8 字节
+DEFAULT_CHUNK_SIZE = 500_000
+# 默认样本数
+DEFAULT_N_SAMPLES = 1_000_000
+# 默认包含概率
+DEFAULT_COVERAGE_PROBABILITY = 0.95
+# 未指定分布类型时使用的分布
+DEFAULT_DISTRIBUTION = '正态分布'
+
+
+class MonteCarloResult(NamedTuple):
+    """蒙特卡洛传递的结果。"""
+    y_value: float # 输出量样本的平均值
+    u_y: float # 输出量样本的标准差，即标准不确定度
+    coverage_interval: tuple[float, float] # 概率对称的包含区间
+    n_samples: int
+
+
+def _draw_samples(rng: np.random.Generator, x: float, u: float, distribution_type: str, size: int) -> np.ndarray:
+    """
+    按分布类型抽取样本，分布的标准差等于输入的标准不确定度 u。
+    与 calculate_b_uncertainty_from_limit 对应：均匀分布半宽为 u*√3，三角形分布半宽为 u*√6。
+    """
+    if distribution_type == '正态分布':
+        return rng.normal(x, u, size)
+    elif distribution_type == '均匀分布':
+        half_width = u * K_UNIFORM
+        return rng.uniform(x - half_width, x + half_width, size)
+    elif distribution_type == '三角形分布':
+        half_width = u * K_TRIANGULAR
+        if half_width == 0:
+            return np.full(size, x)
+        return rng.triangular(x - half_width, x, x + half_width, size)
+    else:
+        raise ValueError("无效的分布类型。请选择 '均匀分布', '正态分布' 或 '三角形分布'。")
+
+
+# --- 包含区间 ---
+# 包含区间取全部样本（而不是各分块）的分位数。区间端点只由样本两端的少数值决定：
+# 下限在排序后的第 ⌊q(N-1)⌋ 与其后一个位置之间插值 (q = (1-p)/2)，只需要最小的 ⌊q(N-1)⌋+2 个样本，上限同理。
+# 各分块只返回两端的这么多个值，主进程逐块合并，内存占用约为 N(1-p) 个样本，
+# 结果与对全部样本调用 np.quantile 相同。
+
+def _tail_count(n_samples: int, coverage_probability: float) -> int:
+    """计算包含区间所需的每一端的样本数（多留一个，避免端点位置的舍入误差）。"""
+    return min(n_samples, math.floor((1 - coverage_probability) / 2 * (n_samples - 1)) + 3)
+
+
+def _smallest(values: np.ndarray, count: int) -> np.ndarray:
+    return values if values.size <= count else np.partition(values, count - 1)[:count]
+
+
+def _largest(values: np.ndarray, count: int) -> np.ndarray:
+    return values if values.size <= count else np.partition(values, values.size - count)[values.size - count:]
+
+
+class _TailBuffer:
+    """逐块收集样本的一端，只保留最小（或最大）的 count 个值；缓冲超过 2·count 个时才截取，合并的总开销为线性。"""
+
+    def __init__(self, count: int, select):
+        self.count = count
+        self.select = select # _smallest 或 _largest
+        self.parts = []
+        self.size = 0
+
+    def add(self, values: np.ndarray) -> None:
+        self.parts.append(values)
+        self.size += values.size
+        if self.size > 2 * self.count:
+            self.parts = [self.select(np.concatenate(self.parts), self.count)]
+            self.size = self.parts[0].size
+
+    def sorted_values(self) -> np.ndarray:
+        return np.sort(self.select(np.concatenate(self.parts), self.count))
+
+
+def _interpolate_quantile(sorted_tail: np.ndarray, offset: int, n_samples: int, probability: float) -> float:
+    """
+    由排序后全部样本中从位置 offset 开始的一段 sorted_tail，按 np.quantile 的默认方法 (linear) 求分位数。
+    """
+    position = probability * (n_samples - 1)
+    index = math.floor(position)
+    fraction = position - index
+    a = sorted_tail[index - offset]
+    b = sorted_tail[min(index + 1, n_samples - 1) - offset]
+    # 与 NumPy 的插值公式相同，保证结果逐位一致
+    return float(b - (b - a) * (1 - fraction) if fraction >= 0.5 else a + (b - a) * fraction)
+
+
+def _run_chunk(task) -> tuple[RunningStatistics, np.ndarray, np.ndarray]:
+    """
+    计算一个分块：抽样、向量化求值并汇总。
+    该函数在进程池的工作进程中执行，编译内核由各进程自己的缓存复用。
+    Returns:
+        tuple: (该分块的统计量, 最小的 tail_count 个样本, 最大的 tail_count 个样本)
+    """
+    function_str, var_names, inputs, seed_sequence, size, tail_count, backend = task
+    kernel = get_compiled_kernel(function_str, var_names, backend)
+    rng = np.random.default_rng(seed_sequence)
+
+    args = []
+    for var_name in kernel.var_names:
+        x, u, distribution_type = inputs[var_name]
+        if var_name in kernel.used_names:
+            args.append(_draw_samples(rng, x, u, distribution_type, size))
+        else:
+            args.append(x) # 未出现在表达式中的变量不需要抽样
+
+    with np.errstate(all="ignore"):
+        y_samples = np.broadcast_to(kernel.value_func(*args), (size,)).astype(float)
+
+    n_invalid = size - int(np.count_nonzero(np.isfinite(y_samples)))
+    if n_invalid:
+        raise ValueError(f"有 {n_invalid} 个样本使函数无定义或结果不是有限实数，请检查输入分布是否超出函数定义域。")
+
+    return RunningStatistics().update(y_samples), _smallest(y_samples, tail_count), _largest(y_samples, tail_count)
+
+
+def propagate_uncertainty_monte_carlo(
+    function_str: str,
+    x_values: dict[str, float],
+    u_x_values: dict[str, float],
+    distributions: Optional[dict[str, str]] = None,
+    n_samples: int = DEFAULT_N_SAMPLES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: Optional[int] = None,
+    n_workers: int = 1,
+    coverage_probability: float = DEFAULT_COVERAGE_PROBABILITY,
+    backend: str = 'sympy',
+) -> MonteCarloResult:
+    """
+    用蒙特卡洛法 (GUM 补充文件1) 计算不确定度传递，适用于线性化不成立的强非线性函数。
+    样本按固定大小分块抽取与求值，内存占用约为 chunk_size 与 n_samples·(1-coverage_probability) 个样本；
+    包含区间为全部样本的分位数，与分块方式无关。
+    Args:
+        function_str (str): output物理量y与input物理量之间的函数关系字符串。
+        x_values (dict): input物理量的测量值字典。
+        u_x_values (dict): input物理量的标准不确定度字典。
+        distributions (dict, optional): 各变量的分布类型 ('均匀分布', '正态分布', '三角形分布')，缺省为正态分布。
+        n_samples (int): 总样本数。
+        chunk_size (int): 每个分块的样本数；不足一个分块的余数并入最后一个分块。
+        seed (int, optional): 随机种子。给定种子时结果可复现，且与 n_workers 无关。
+        n_workers (int): 进程数，大于1时各分块分发到进程池中计算。
+        coverage_probability (float): 包含区间的包含概率。
+        backend (str): 表达式求值后端，'sympy' 或 'autodiff'。
+    Returns:
+        MonteCarloResult: (平均值 y_value, 标准不确定度 u_y, 包含区间, 样本数)
+    """
+    if not function_str:
+        raise ValueError("函数表达式不能为空。")
+    if not x_values:
+        raise ValueError("输入物理量测量值不能为空。")
+    if n_samples < 2:
+        raise ValueError("样本数至少为2。")
+    if chunk_size < 1:
+        raise ValueError("分块大小必须是正整数。")
+    if not 0 < coverage_probability < 1:
+        raise ValueError("包含概率必须在 0 和 1 之间。")
+    distributions = distributions or {}
+
+    # 先在主进程中编译，表达式错误可以尽早报告
+    kernel = get_compiled_kernel(function_str, x_values.keys(), backend)
+    inputs = {}
+    for var_name in kernel.var_names:
+        u_xi = u_x_values.get(var_name)
+        if u_xi is None:
+            if var_name in kernel.used_names:
+                raise ValueError(f"缺少变量 '{var_name}' 的不确定度。")
+            u_xi = 0.0
+        distribution_type = distributions.get(var_name, DEFAULT_DISTRIBUTION)
+        if distribution_type not in VALID_DISTRIBUTIONS:
+            raise ValueError("无效的分布类型。请选择 '均匀分布', '正态分布' 或 '三角形分布'。")
+        inputs[var_name] = (float(x_values[var_name]), float(u_xi), distribution_type)
+
+    # 每个分块使用独立的子种子，结果不依赖于分块的执行顺序和进程数
+    chunk_sizes = [chunk_size] * max(1, n_samples // chunk_size)
+    chunk_sizes[-1] += n_samples - sum(chunk_sizes)
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    tail_count = _tail_count(n_samples, coverage_probability)
+    tasks = [
+        (function_str, tuple(kernel.var_names), inputs, seed_sequence, size, tail_count, backend)
+        for seed_sequence, size in zip(seed_sequences, chunk_sizes)
+    ]
+
+    if n_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as executor:
+            return _merge_chunks(executor.map(_run_chunk, tasks), n_samples, tail_count, coverage_probability)
+    return _merge_chunks(map(_run_chunk, tasks), n_samples, tail_count, coverage_probability)
+
+
+def _merge_chunks(chunk_results, n_samples: int, tail_count: int, coverage_probability: float) -> MonteCarloResult:
+    """逐块合并平均值、离差平方和以及两端的样本（chunk_results 可以是迭代器，不必同时保存所有分块的结果）。"""
+    total = RunningStatistics()
+    lowest, highest = _TailBuffer(tail_count, _smallest), _TailBuffer(tail_count, _largest)
+    for chunk_stats, chunk_lowest, chunk_highest in chunk_results:
+        total.merge(chunk_stats)
+        lowest.add(chunk_lowest)
+        highest.add(chunk_highest)
+
+    return MonteCarloResult(
+        y_value=total.mean,
+        u_y=total.s_x,
+        coverage_interval=(
+            _interpolate_quantile(lowest.sorted_values(), 0, n_samples, (1 - coverage_probability) / 2),
+            _interpolate_quantile(highest.sorted_values(), n_samples - tail_count, n_samples,
+                                  (1 + coverage_probability) / 2),
+        ),
+        n_samples=total.count,
+    )
@@ -0,0 +1,142 @@
+from typing import Callable, NamedTuple
+import math
+import numpy as np # 用于向量化计算，需要安装 pip install numpy
+from calculation_formulas import DEFAULT_T_FACTOR, calculate_a_uncertainty_multiple_measurements
+from t_distribution import _t_two_sided_tail
+
+# --- 异常值剔除 ---
+# 迭代剔除：每次检验剩余数据中离平均值最远的一个，是异常值则剔除后继续，否则停止。
+# 数据排序后离平均值最远的数据总在两端，剩余数据始终是有序数组中连续的一段 [lo, hi]。
+# 以中位数为起点向两侧累加的偏差和与偏差平方和在排序后一次算出，每次剔除后的平均值与标准差都可以 O(1) 得到，
+# 总复杂度为排序的 O(n log n)。累加从中位数向外进行，剩余数据的求和不包含已剔除的（可能很大的）异常值，
+# 不会像从总和中逐个减去异常值那样损失精度。
+
+# 判别准则及其显示名称
+OUTLIER_METHODS = {
+    'grubbs': 'Grubbs 准则',
+    'chauvenet': 'Chauvenet 准则',
+    '3sigma': '3σ 准则',
+}
+# Grubbs 准则的默认显著性水平
+DEFAULT_SIGNIFICANCE = 0.05
+# 3σ 准则（拉依达准则）的倍数
+SIGMA_CRITERION = 3.0
+# 剩余数据少于该个数时停止检验
+MIN_REMAINING = 3
+
+
+class OutlierRejection(NamedTuple):
+    kept: np.ndarray # 剔除异常值后的数据，保持原来的顺序
+    rejected_indices: np.ndarray # 被剔除的数据在原数组中的下标，按剔除的先后顺序
+
+
+def _is_grubbs_outlier(z: float, count: int, significance: float) -> bool:
+    # G = z 换算为自由度 n-2 的 t 统计量；双侧检验的临界值对应尾概率 α/n
+    denominator = (count - 1)**2 - count * z * z
+    if denominator <= 0:
+        return True # G 已达到理论最大值 (n-1)/√n
+    t = math.sqrt(count * (count - 2) * z * z / denominator)
+    return count * float(_t_two_sided_tail(t, count - 2)) < significance
+
+
+def _is_chauvenet_outlier(z: float, count: int, significance: float) -> bool:
+    # 偏差不小于 z 的数据的期望个数不足半个
+    return count * math.erfc(z / math.sqrt(2)) < 0.5
+
+
+def _is_3sigma_outlier(z: float, count: int, significance: float) -> bool:
+    return z > SIGMA_CRITERION
+
+
+_CRITERIA: dict[str, Callable[[float, int, float], bool]] = {
+    'grubbs': _is_grubbs_outlier,
+    'chauvenet': _is_chauvenet_outlier,
+    '3sigma': _is_3sigma_outlier,
+}
+
+
+def _sums_from_median(deviations: np.ndarray, mid: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    返回 (left, right)：left[i] = Σ deviations[i:mid] (i = 0..mid)，right[i] = Σ deviations[mid:mid+i+1]，
+    两者都从中位数向外累加。
+    """
+    left = np.zeros(mid + 1)
+    left[:mid] = np.cumsum(deviations[mid - 1::-1])[::-1] if mid > 0 else []
+    return left, np.cumsum(deviations[mid:])
+
+
+def reject_outliers(data, method: str = 'grubbs', significance: float = DEFAULT_SIGNIFICANCE) -> OutlierRejection:
+    """
+    迭代剔除测量数据中的异常值。
+    Args:
+        data: 测量数据（列表、NumPy 数组或 open_measurement_file 返回的内存映射数组）。
+        method (str): 判别准则，'grubbs'、'chauvenet' 或 '3sigma'，见 OUTLIER_METHODS。
+        significance (float): Grubbs 准则的显著性水平 α，其他准则不使用。
+    Returns:
+        OutlierRejection: (剩余数据, 被剔除数据的下标)。只在剩余数据不少于 MIN_REMAINING 个时检验
+                          （每次检验最多剔除一个，因此剔除后可以只剩 MIN_REMAINING - 1 个），且不会剔除中位数。
+    """
+    is_outlier = _CRITERIA.get(method)
+    if is_outlier is None:
+        raise ValueError(f"未知的异常值判别准则: {method}")
+    if not 0 < significance < 1:
+        raise ValueError("显著性水平必须在0和1之间。")
+    values = np.asarray(data, dtype=float).ravel()
+    if values.size == 0:
+        raise ValueError("数据列表不能为空。")
+    if not np.all(np.isfinite(values)):
+        raise ValueError("测量数据中包含 nan 或 inf 等非有限数值。")
+
+    order = np.argsort(values, kind="stable")
+    mid = values.size // 2
+    # 相对中位数的偏差，减小平方和相减时的舍入误差
+    deviations = values[order] - values[order[mid]]
+    left_sums, right_sums = _sums_from_median(deviations, mid)
+    left_squares, right_squares = _sums_from_median(deviations**2, mid)
+
+    lo, hi = 0, values.size - 1
+    rejected = []
+    while hi - lo + 1 >= MIN_REMAINING:
+        count = hi - lo + 1
+        total = left_sums[lo] + right_sums[hi - mid]
+        mean = total / count
+        variance = (left_squares[lo] + right_squares[hi - mid] - total * mean) / (count - 1)
+        if variance <= 0:
+            break # 剩余数据全部相同
+        # 离平均值最远的数据在两端之一
+        take_high = deviations[hi] - mean >= mean - deviations[lo]
+        if take_high and hi == mid or not take_high and lo == mid:
+            break
+        z = (deviations[hi] - mean if take_high else mean - deviations[lo]) / math.sqrt(variance)
+        if not is_outlier(z, count, significance):
+            break
+        if take_high:
+            rejected.append(order[hi])
+            hi -= 1
+        else:
+            rejected.append(order[lo])
+            lo += 1
+
+    rejected_indices = np.array(rejected, dtype=np.intp)
+    kept = np.ones(values.size, dtype=bool)
+    kept[rejected_indices] = False
+    return OutlierRejection(values[kept], rejected_indices)
+
+
+def calculate_a_uncertainty_with_outlier_rejection(data_list, method: str = 'grubbs',
+                                                   t_factor: float = DEFAULT_T_FACTOR, confidence_level: float = None,
+                                                   significance: float = DEFAULT_SIGNIFICANCE
+                                                   ) -> tuple[float, float, float, np.ndarray]:
+    """
+    先剔除异常值，再计算多次测量的A类不确定度。
+    Args:
+        data_list: 测量数据。
+        method (str): 判别准则，见 reject_outliers。
+        t_factor, confidence_level: 与 calculate_a_uncertainty_multiple_measurements 相同，t因子按剔除后的数据个数确定。
+        significance (float): Grubbs 准则的显著性水平。
+    Returns:
+        tuple[float, float, float, np.ndarray]: (平均值, A类不确定度 u_A, 实验标准差 S_x, 被剔除数据的下标)
+    """
+    kept, rejected_indices = reject_outliers(data_list, method, significance)
+    mean_val, u_a, s_x = calculate_a_uncertainty_multiple_measurements(kept, t_factor, confidence_level)
+    return mean_val, u_a, s_x, rejected_indices
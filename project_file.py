@@ -0,0 +1,209 @@
+"""
+不确定度传递的项目文件。
+
+项目文件为 UTF-8 编码的 JSON-lines 文本，第一行为文件头，其后每行一条记录，记录的顺序不限：
+    {"format": "uncertainty-project", "version": 1}
+    {"type": "formula", "name": "y", "expression": "x1*x2 + sin(x3)"}
+    {"type": "variable", "name": "x1", "value": 10.0, "uncertainty": 0.1, "distribution": "均匀分布", "dof": 9}
+    {"type": "correlation", "variables": ["x1", "x2"], "coefficient": 0.5}
+- formula 可以有多条，name 可省略（默认为 y1, y2, ...）；
+- variable 的 distribution（分布类型，见 calculation_formulas.VALID_DISTRIBUTIONS）和 dof（自由度）可省略，
+  value / uncertainty 为 null 表示尚未填写；
+- correlation 只记录相关系数不为0的变量对，变量很多时文件大小与非零相关系数的个数成正比。
+读取时逐行解析，不会把整个文件读入内存；也可以读取旧版的 .txt 配置文件
+（第一行为函数表达式，其后每行为 "测量值,不确定度"，变量依次命名为 x1, x2, ...）。
+"""
+import json
+from typing import NamedTuple, Optional
+
+from calculation_formulas import VALID_DISTRIBUTIONS
+
+PROJECT_FORMAT = "uncertainty-project"
+# 当前写入的版本；读取时接受不高于该版本的文件
+PROJECT_FORMAT_VERSION = 1
+PROJECT_FILE_EXTENSION = ".jsonl"
+
+
+class Formula(NamedTuple):
+    name: str
+    expression: str
+
+
+class Variable(NamedTuple):
+    name: str
+    value: Optional[float] # 测量值，None 表示尚未填写
+    uncertainty: Optional[float] # 标准不确定度，None 表示尚未填写
+    distribution: Optional[str] = None # 分布类型，None 表示未指定
+    dof: Optional[float] = None # 自由度，None 表示无穷大（未指定）
+
+
+class Project(NamedTuple):
+    formulas: list[Formula]
+    variables: list[Variable]
+    correlations: dict[tuple[str, str], float] # (变量名, 变量名) -> 相关系数，两个变量名按字母顺序排列
+
+
+def correlation_matrix(correlations: dict[tuple[str, str], float], var_names):
+    """
+    按 var_names 的顺序返回相关系数矩阵 (NumPy 数组)，可直接作为 propagate_uncertainty 的 correlation 参数；
+    没有涉及这些变量的相关系数时返回 None。
+    """
+    index = {var_name: i for i, var_name in enumerate(var_names)}
+    pairs = [(index[a], index[b], r) for (a, b), r in correlations.items() if a in index and b in index]
+    if not pairs:
+        return None
+    import numpy as np # 仅在使用时导入
+    matrix = np.eye(len(index))
+    for i, j, r in pairs:
+        matrix[i, j] = matrix[j, i] = r
+    return matrix
+
+
+def _correlation_key(a: str, b: str) -> tuple[str, str]:
+    return (a, b) if a <= b else (b, a)
+
+
+def _optional_float(value, field: str, line_number: int) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"第 {line_number} 行: '{field}' 必须是数字或 null。")
+    return float(value)
+
+
+def _parse_record(record, line_number: int, formulas: list, variables: list, correlations: dict) -> None:
+    if not isinstance(record, dict):
+        raise ValueError(f"第 {line_number} 行不是 JSON 对象。")
+    record_type = record.get("type")
+    if record_type == "formula":
+        expression = record.get("expression")
+        if not isinstance(expression, str):
+            raise ValueError(f"第 {line_number} 行: 函数关系缺少 'expression'。")
+        formulas.append(Formula(str(record.get("name") or f"y{len(formulas) + 1}"), expression))
+    elif record_type == "variable":
+        name = record.get("name")
+        if not isinstance(name, str) or not name.isidentifier():
+            raise ValueError(f"第 {line_number} 行: 物理量名称 {name!r} 不是有效的变量名。")
+        distribution = record.get("distribution")
+        if distribution is not None and distribution not in VALID_DISTRIBUTIONS:
+            raise ValueError(f"第 {line_number} 行: 无效的分布类型 {distribution!r}。")
+        dof = _optional_float(record.get("dof"), "dof", line_number)
+        if dof is not None and not dof >= 1:
+            raise ValueError(f"第 {line_number} 行: 自由度必须不小于1。")
+        variables.append(Variable(
+            name,
+            _optional_float(record.get("value"), "value", line_number),
+            _optional_float(record.get("uncertainty"), "uncertainty", line_number),
+            distribution,
+            dof,
+        ))
+    elif record_type == "correlation":
+        pair = record.get("variables")
+        if not (isinstance(pair, list) and len(pair) == 2 and all(isinstance(name, str) for name in pair)):
+            raise ValueError(f"第 {line_number} 行: 'variables' 必须是两个变量名组成的列表。")
+        if pair[0] == pair[1]:
+            raise ValueError(f"第 {line_number} 行: 相关系数的两个变量不能相同。")
+        coefficient = _optional_float(record.get("coefficient"), "coefficient", line_number)
+        if coefficient is None or not -1 <= coefficient <= 1:
+            raise ValueError(f"第 {line_number} 行: 相关系数必须在 -1 和 1 之间。")
+        correlations[_correlation_key(*pair)] = coefficient
+    else:
+        raise ValueError(f"第 {line_number} 行: 未知的记录类型 {record_type!r}。")
+
+
+def _check_project(project: Project) -> Project:
+    names = set()
+    for variable in project.variables:
+        if variable.name in names:
+            raise ValueError(f"物理量 '{variable.name}' 重复出现。")
+        names.add(variable.name)
+    for pair in project.correlations:
+        for name in pair:
+            if name not in names:
+                raise ValueError(f"相关系数中的物理量 '{name}' 不存在。")
+    return project
+
+
+def _read_jsonl_project(file, header_line: str) -> Project:
+    header = json.loads(header_line)
+    version = header.get("version")
+    if not isinstance(version, int) or version < 1:
+        raise ValueError("第 1 行: 文件头缺少有效的版本号。")
+    if version > PROJECT_FORMAT_VERSION:
+        raise ValueError(f"项目文件的版本 ({version}) 高于本程序支持的版本 ({PROJECT_FORMAT_VERSION})，请更新程序。")
+
+    formulas, variables, correlations = [], [], {}
+    for line_number, line in enumerate(file, start=2):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"第 {line_number} 行不是有效的 JSON: {e}")
+        _parse_record(record, line_number, formulas, variables, correlations)
+    return _check_project(Project(formulas, variables, correlations))
+
+
+def _read_legacy_project(file, first_line: str) -> Project:
+    """旧版配置文件：第一行为函数表达式，其后每行为 '测量值,不确定度'。"""
+    variables = []
+    for line_number, line in enumerate(file, start=2):
+        line = line.strip()
+        if not line:
+            continue
+        parts = [part.strip() for part in line.split(',')]
+        if len(parts) != 2:
+            raise ValueError(f"第 {line_number} 行: 物理量行格式不正确: {line}。应为 '值,不确定度'。")
+        try:
+            value, uncertainty = (float(part) if part else None for part in parts)
+        except ValueError:
+            raise ValueError(f"第 {line_number} 行: 测量值或不确定度必须是有效数字。")
+        variables.append(Variable(f"x{len(variables) + 1}", value, uncertainty))
+    if not variables:
+        raise ValueError("文件内容格式不正确。至少需要函数表达式和一组物理量数据。")
+    return Project([Formula("y", first_line)], variables, {})
+
+
+def read_project(file_path: str) -> Project:
+    """
+    读取项目文件，根据第一行自动识别 JSON-lines 项目文件与旧版 .txt 配置文件。
+    Args:
+        file_path (str): 文件路径。
+    Returns:
+        Project: (函数关系列表, 物理量列表, 相关系数字典)
+    """
+    # utf-8-sig: 兼容 Windows 记事本保存时加入的 BOM
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        first_line = f.readline().strip()
+        if not first_line:
+            raise ValueError("文件为空。")
+        if first_line.startswith("{"):
+            try:
+                header = json.loads(first_line)
+            except json.JSONDecodeError:
+                header = None
+            if isinstance(header, dict) and header.get("format") == PROJECT_FORMAT:
+                return _read_jsonl_project(f, first_line)
+        return _read_legacy_project(f, first_line)
+
+
+def write_project(file_path: str, project: Project) -> None:
+    """按当前版本的 JSON-lines 格式写入项目文件，逐条记录写出。"""
+    _check_project(project)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"format": PROJECT_FORMAT, "version": PROJECT_FORMAT_VERSION}) + "\n")
+        for formula in project.formulas:
+            f.write(json.dumps({"type": "formula", "name": formula.name, "expression": formula.expression},
+                               ensure_ascii=False) + "\n")
+        for variable in project.variables:
+            record = {"type": "variable", "name": variable.name, "value": variable.value,
+                      "uncertainty": variable.uncertainty}
+            if variable.distribution is not None:
+                record["distribution"] = variable.distribution
+            if variable.dof is not None:
+                record["dof"] = variable.dof
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        for (a, b), coefficient in project.correlations.items():
+            f.write(json.dumps({"type": "correlation", "variables": [a, b], "coefficient": coefficient},
+                               ensure_ascii=False) + "\n")
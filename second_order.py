@@ -0,0 +1,218 @@
+from functools import lru_cache
+from typing import Callable, NamedTuple
+import math
+import numpy as np # 用于向量化计算，需要安装 pip install numpy
+import sympy # 用于符号计算和求导，需要安装 pip install sympy
+from calculation_formulas import (
+    KERNEL_CACHE_MAXSIZE,
+    _TimedStage,
+    _as_column_arrays,
+    _check_correlation_matrix,
+    _check_covariance_matrix,
+    _normalize_function_str,
+    _parse_function_expr,
+    _sqrt_of_variance,
+)
+
+# --- 二阶泰勒展开不确定度传递 ---
+# 输入量服从（多元）正态分布时，把 f 展开到二阶：
+#   E[y]   ≈ f(x) + ½ tr(H Σ)
+#   Var[y] ≈ J Σ Jᵀ + ½ tr(H Σ H Σ)
+# J、H 为 f 在测量值处的梯度与黑塞矩阵。相对不确定度较大的非线性函数（如 x1/x2、exp(x1)）
+# 一阶公式有偏，二阶结果与蒙特卡洛法更接近，而计算量只相当于一次求值。
+
+# 二阶与一阶结果之差超过一阶不确定度的这一比例时，认为线性化（一阶公式）不够准确
+LINEARIZATION_TOLERANCE = 0.05
+
+
+class HessianKernel(NamedTuple):
+    """
+    二阶传递的编译内核。value_func 的参数顺序为 var_names，一次返回
+    [f, ∂f/∂u_1, ..., ∂f/∂u_k, H_11, H_12, ..., H_1k, H_22, ..., H_kk]（u_1..u_k 为 used_names，
+    黑塞矩阵只含上三角），函数值、梯度与黑塞矩阵的公共子表达式只计算一次。
+    """
+    expr: sympy.Expr
+    var_names: tuple[str, ...]
+    used_names: tuple[str, ...]
+    value_func: Callable
+
+
+class SecondOrderResult(NamedTuple):
+    """二阶传递的结果；批量计算时各字段为数组。"""
+    y_value: float # 二阶近似的期望 f(x) + ½ tr(HΣ)
+    u_y: float # 二阶近似的标准不确定度 √(JΣJᵀ + ½ tr(HΣHΣ))
+    y_first_order: float # 一阶结果 f(x)
+    u_y_first_order: float # 一阶结果 √(JΣJᵀ)
+    relative_difference: float # max(|y_value - y_first_order|, |u_y - u_y_first_order|) / u_y_first_order
+
+    @property
+    def linearization_adequate(self):
+        """二阶与一阶结果之差不超过 LINEARIZATION_TOLERANCE 时为 True，此时一阶公式足够准确。"""
+        return self.relative_difference <= LINEARIZATION_TOLERANCE
+
+
+@lru_cache(maxsize=KERNEL_CACHE_MAXSIZE)
+def _compile_hessian_kernel(function_str: str, var_names: tuple[str, ...]) -> HessianKernel:
+    symbols = [sympy.Symbol(var_name, real=True) for var_name in var_names]
+    expr = _parse_function_expr(function_str, symbols)
+    used_symbols = [sym for sym in symbols if sym in expr.free_symbols]
+
+    with _TimedStage('differentiate'):
+        gradient_exprs = [sympy.diff(expr, sym) for sym in used_symbols]
+        hessian_exprs = [sympy.diff(gradient_exprs[i], used_symbols[j])
+                         for i in range(len(used_symbols)) for j in range(i, len(used_symbols))]
+    with _TimedStage('lambdify'):
+        value_func = sympy.lambdify(symbols, [expr, *gradient_exprs, *hessian_exprs], modules="numpy", cse=True)
+
+    return HessianKernel(
+        expr=expr,
+        var_names=var_names,
+        used_names=tuple(str(sym) for sym in used_symbols),
+        value_func=value_func,
+    )
+
+
+def get_hessian_kernel(function_str: str, var_names) -> HessianKernel:
+    """获取函数表达式的二阶编译内核，黑塞矩阵对每个（规范化后的）表达式与变量集合只推导一次。"""
+    if not function_str:
+        raise ValueError("函数表达式不能为空。")
+    return _compile_hessian_kernel(_normalize_function_str(function_str), tuple(sorted(var_names)))
+
+
+def get_hessian_kernel_cache_info():
+    """返回二阶编译内核缓存的统计信息 (hits, misses, maxsize, currsize)。"""
+    return _compile_hessian_kernel.cache_info()
+
+
+def _evaluate(kernel: HessianKernel, x_columns: dict, shape: tuple) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """对所有行求出 (f, 梯度 (行数, k), 黑塞矩阵 (行数, k, k))，k 为 used_names 的变量数。"""
+    k = len(kernel.used_names)
+    with _TimedStage('evaluate'):
+        outputs = kernel.value_func(*(x_columns[var_name] for var_name in kernel.var_names))
+    # 常数项返回标量，需广播到统一形状
+    values = np.broadcast_to(outputs[0], shape).astype(float)
+    gradient = np.empty(shape + (k,))
+    for i in range(k):
+        gradient[:, i] = outputs[1 + i]
+    hessian = np.empty(shape + (k, k))
+    position = 1 + k
+    for i in range(k):
+        for j in range(i, k):
+            hessian[:, i, j] = outputs[position]
+            hessian[:, j, i] = outputs[position]
+            position += 1
+    return values, gradient, hessian
+
+
+def _second_order_moments(kernel: HessianKernel, x_columns: dict, u_columns: dict, correlation, covariance,
+                          shape: tuple) -> SecondOrderResult:
+    values, gradient, hessian = _evaluate(kernel, x_columns, shape)
+    used_index = [list(x_columns).index(var_name) for var_name in kernel.used_names]
+    n = len(x_columns)
+
+    if covariance is not None:
+        # w = J, G = H, R = Σ
+        weighted, scaled_hessian = gradient, hessian
+        sigma = _check_covariance_matrix(covariance, n, allow_stacked=True)
+    else:
+        # 把不确定度乘进梯度与黑塞矩阵: w_i = J_i u_i, G_ij = H_ij u_i u_j, R 为相关系数矩阵（独立时为单位矩阵）
+        u_matrix = np.empty(shape + (len(used_index),))
+        for col, var_name in enumerate(kernel.used_names):
+            u_xi = u_columns.get(var_name)
+            if u_xi is None:
+                raise ValueError(f"缺少变量 '{var_name}' 的不确定度。")
+            u_matrix[:, col] = u_xi
+        weighted = gradient * u_matrix
+        scaled_hessian = hessian * u_matrix[:, :, np.newaxis] * u_matrix[:, np.newaxis, :]
+        sigma = None if correlation is None else _check_correlation_matrix(correlation, n, allow_stacked=True)
+
+    if sigma is None:
+        linear_variance = np.sum(weighted**2, axis=-1)
+        linear_scale = linear_variance
+        trace_1 = np.trace(scaled_hessian, axis1=-2, axis2=-1)
+        trace_2 = np.sum(scaled_hessian**2, axis=(-2, -1)) # G 对称: tr(G G) = Σ G_ij²
+    else:
+        if sigma.ndim == 3 and sigma.shape[0] != shape[0]:
+            raise ValueError(f"逐行给出的矩阵数量 ({sigma.shape[0]}) 与行数 ({shape[0]}) 不一致。")
+        # 只保留表达式中出现的变量对应的行和列
+        sigma = sigma[..., used_index, :][..., used_index]
+        linear_variance = np.sum((weighted[:, np.newaxis, :] @ sigma)[:, 0, :] * weighted, axis=-1)
+        linear_scale = np.sum((np.abs(weighted)[:, np.newaxis, :] @ np.abs(sigma))[:, 0, :] * np.abs(weighted), axis=-1)
+        product = scaled_hessian @ sigma # G R
+        trace_1 = np.trace(product, axis1=-2, axis2=-1)
+        trace_2 = np.sum(product * np.swapaxes(product, -1, -2), axis=(-2, -1)) # tr(G R G R)
+
+    u_first = _sqrt_of_variance(linear_variance, linear_scale)
+    y_second = values + 0.5 * trace_1
+    u_second = _sqrt_of_variance(linear_variance + 0.5 * trace_2, linear_scale + 0.5 * np.abs(trace_2))
+    difference = np.maximum(np.abs(y_second - values), np.abs(u_second - u_first))
+    relative_difference = np.divide(difference, u_first, out=np.where(difference > 0, np.inf, 0.0), where=u_first > 0)
+    return SecondOrderResult(y_second, u_second, values, u_first, relative_difference)
+
+
+def propagate_uncertainty_second_order(function_str: str, x_values: dict[str, float], u_x_values: dict[str, float],
+                                       correlation=None, covariance=None) -> SecondOrderResult:
+    """
+    用二阶泰勒展开计算不确定度传递（假设输入量服从正态分布），同时给出一阶结果以便比较。
+    Args:
+        function_str (str): output物理量y与input物理量之间的函数关系字符串。
+        x_values (dict): input物理量的测量值字典。
+        u_x_values (dict): input物理量的标准不确定度字典。
+        correlation (array-like, optional): 输入量的相关系数矩阵，行列顺序与 x_values 的键顺序一致。
+        covariance (array-like, optional): 输入量的协方差矩阵；提供时不再使用 u_x_values。
+    Returns:
+        SecondOrderResult: (二阶期望, 二阶不确定度, 一阶测量值, 一阶不确定度, 二者的相对差异)
+    """
+    if not x_values:
+        raise ValueError("输入物理量测量值不能为空。")
+    if not u_x_values and covariance is None:
+        raise ValueError("输入物理量不确定度不能为空。")
+    if correlation is not None and covariance is not None:
+        raise ValueError("相关系数矩阵与协方差矩阵只能提供一个。")
+
+    kernel = get_hessian_kernel(function_str, x_values.keys())
+    # 按只有一行的批量计算，除以0等情形按 NumPy 的规则得到 inf / nan，再统一给出错误信息
+    x_columns = {var_name: np.array([float(value)]) for var_name, value in x_values.items()}
+    u_columns = {} if covariance is not None else {var_name: float(u) for var_name, u in u_x_values.items()}
+
+    with np.errstate(all="ignore"):
+        values, gradient, hessian = _evaluate(kernel, x_columns, (1,))
+        if not math.isfinite(values[0]):
+            raise ValueError("函数在给定测量值处无定义或结果不是有限实数。")
+        if not (np.all(np.isfinite(gradient)) and np.all(np.isfinite(hessian))):
+            raise ValueError("函数的一阶或二阶偏导数在给定测量值处无定义。")
+        with _TimedStage('combine'):
+            result = _second_order_moments(kernel, x_columns, u_columns, correlation, covariance, (1,))
+    if math.isnan(result.u_y[0]):
+        raise ValueError("协方差矩阵不是半正定矩阵，J Σ Jᵀ 为负。")
+    return SecondOrderResult(*(float(field[0]) for field in result))
+
+
+def propagate_uncertainty_second_order_batch(function_str: str, x_values, u_x_values, var_names=None,
+                                             correlation=None, covariance=None) -> SecondOrderResult:
+    """
+    propagate_uncertainty_second_order 的批量版本：黑塞矩阵只推导一次，所有行一次性向量化求值。
+    Args:
+        function_str (str): output物理量y与input物理量之间的函数关系字符串。
+        x_values, u_x_values, var_names, correlation, covariance: 与 propagate_uncertainty_batch 相同。
+    Returns:
+        SecondOrderResult: 各字段为长度等于行数的数组。函数在某行无定义时，该行结果为 nan 或 inf。
+    """
+    if correlation is not None and covariance is not None:
+        raise ValueError("相关系数矩阵与协方差矩阵只能提供一个。")
+    x_columns = _as_column_arrays(x_values, var_names, "输入物理量测量值")
+    u_columns = {} if covariance is not None else _as_column_arrays(u_x_values, var_names, "输入物理量不确定度")
+    if not x_columns:
+        raise ValueError("输入物理量测量值不能为空。")
+    if not u_columns and covariance is None:
+        raise ValueError("输入物理量不确定度不能为空。")
+
+    kernel = get_hessian_kernel(function_str, x_columns.keys())
+    try:
+        shape = np.broadcast_shapes(*(column.shape for column in x_columns.values()),
+                                    *(column.shape for column in u_columns.values()))
+    except ValueError:
+        raise ValueError("各输入数组的长度不一致。")
+
+    with np.errstate(all="ignore"):
+        return _second_order_moments(kernel, x_columns, u_columns, correlation, covariance, shape)
@@ -1,13 +1,36 @@
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 from calculation_formulas import (
     calculate_b_uncertainty_from_limit,
     calculate_a_uncertainty_multiple_measurements,
+    calculate_a_uncertainty_from_file,
     calculate_combined_uncertainty,
-    parse_float_list,
-    format_uncertainty_and_value
+    open_measurement_file,
+    parse_float_array,
+    format_uncertainty_and_value,
+    DEFAULT_T_FACTOR,
 )
 import math
+import os
+
+# t因子来源: 选项 -> 置信水平，None 为手动输入
+MANUAL_T_FACTOR_MODE = "手动输入"
+T_FACTOR_MODES = {
+    MANUAL_T_FACTOR_MODE: None,
+    "自动 (P=68.27%)": 0.6827,
+    "自动 (P=95%)": 0.95,
+    "自动 (P=99%)": 0.99,
+}
+# 异常值剔除: 选项 -> outlier_rejection.reject_outliers 的判别准则，None 为不剔除
+NO_OUTLIER_REJECTION_MODE = "不剔除"
+OUTLIER_MODES = {
+    NO_OUTLIER_REJECTION_MODE: None,
+    "Grubbs 准则 (α=0.05)": 'grubbs',
+    "Chauvenet 准则": 'chauvenet',
+    "3σ 准则": '3sigma',
+}
+# 结果中最多列出的被剔除数据个数
+OUTLIER_DISPLAY_LIMIT = 10
 
 # 如果要使用图片图标，请取消注释并确保图片文件存在
 # from PIL import Image
@@ -36,6 +59,7 @@ class SingleQuantityCalculator(ctk.CTkFrame):
         self.grid_rowconfigure(11, weight=1) # 底部弹性空间，确保内容不贴边
 
         self.entry_widgets = {}
+        self.data_file_path = None # 多次测量数据文件 (.npy 或原始 float64)，选择后代替输入框中的数据
 
         self.create_widgets()
         self.show_measurement_options() # 确保初始时显示正确的测量选项
@@ -96,6 +120,11 @@ class SingleQuantityCalculator(ctk.CTkFrame):
         self.result_value_label.grid(row=0, column=0, padx=15, pady=8, sticky="w")
         self.result_uncertainty_label = ctk.CTkLabel(self.result_frame, text="不确定度: ", font=("Arial", 22, "bold")) # 字号更大
         self.result_uncertainty_label.grid(row=0, column=1, padx=15, pady=8, sticky="w")
+        # 多次测量剔除异常值时，列出被剔除的数据
+        self.outlier_info_label = ctk.CTkLabel(
+            self.result_frame, text="", font=("Arial", 14), text_color=("gray40", "gray60"), wraplength=600, justify="left"
+        )
+        self.outlier_info_label.grid(row=1, column=0, columnspan=2, padx=15, pady=(0, 8), sticky="w")
 
         # --- 计算按钮 ---
         self.calculate_button = ctk.CTkButton(
@@ -183,13 +212,48 @@ class SingleQuantityCalculator(ctk.CTkFrame):
             self.entry_widgets['data_list'].grid(row=row_idx, column=1, padx=10, pady=5, sticky="ew")
             row_idx += 1
 
-            # --- t因子 ---
+            # --- 或从文件读取测量数据 (适合大量数据) ---
+            self.data_file_path = None
+            self.data_file_button = ctk.CTkButton(
+                self.measurement_options_frame, text="从文件读取...", command=self.toggle_data_file,
+                width=130, height=32, font=("Arial", 15)
+            )
+            self.data_file_button.grid(row=row_idx, column=0, padx=10, pady=5, sticky="w")
+            self.data_file_label = ctk.CTkLabel(
+                self.measurement_options_frame, text="未选择文件 (.npy 或原始 float64 数据)", font=("Arial", 13),
+                text_color=("gray40", "gray60")
+            )
+            self.data_file_label.grid(row=row_idx, column=1, padx=10, pady=5, sticky="w")
+            row_idx += 1
+
+            # --- t因子：手动输入，或按测量次数和置信水平自动查表 ---
+            self.t_factor_mode_label = ctk.CTkLabel(self.measurement_options_frame, text="t因子来源:", font=("Arial", 15))
+            self.t_factor_mode_label.grid(row=row_idx, column=0, padx=10, pady=5, sticky="w")
+            self.t_factor_mode_combobox = ctk.CTkComboBox(
+                self.measurement_options_frame, values=list(T_FACTOR_MODES), state="readonly", width=180, height=32,
+                font=("Arial", 15), command=self.on_t_factor_mode_changed
+            )
+            self.t_factor_mode_combobox.set(MANUAL_T_FACTOR_MODE)
+            self.t_factor_mode_combobox.grid(row=row_idx, column=1, padx=10, pady=5, sticky="w")
+            row_idx += 1
+
             self.t_factor_label = ctk.CTkLabel(self.measurement_options_frame, text="t因子 (默认1):", font=("Arial", 15))
             self.t_factor_label.grid(row=row_idx, column=0, padx=10, pady=5, sticky="w")
             self.entry_widgets['t_factor'] = ctk.CTkEntry(self.measurement_options_frame, width=180, height=32, font=("Arial", 15))
             self.entry_widgets['t_factor'].insert(0, "1.0")
             self.entry_widgets['t_factor'].grid(row=row_idx, column=1, padx=10, pady=5, sticky="w")
             row_idx += 1
+
+            # --- 异常值剔除 ---
+            self.outlier_mode_label = ctk.CTkLabel(self.measurement_options_frame, text="异常值剔除:", font=("Arial", 15))
+            self.outlier_mode_label.grid(row=row_idx, column=0, padx=10, pady=5, sticky="w")
+            self.outlier_mode_combobox = ctk.CTkComboBox(
+                self.measurement_options_frame, values=list(OUTLIER_MODES), state="readonly", width=180, height=32,
+                font=("Arial", 15)
+            )
+            self.outlier_mode_combobox.set(NO_OUTLIER_REJECTION_MODE)
+            self.outlier_mode_combobox.grid(row=row_idx, column=1, padx=10, pady=5, sticky="w")
+            row_idx += 1
             
             # --- 仪器的不确定度限值 (U_B2) ---
             self.instrument_uncertainty_limit_label = ctk.CTkLabel(self.measurement_options_frame, text="仪器的不确定度限值:", font=("Arial", 15))
@@ -247,15 +311,57 @@ class SingleQuantityCalculator(ctk.CTkFrame):
             raise ValueError(f"'{name}' 必须是有效的数字。")
 
     def get_float_list_input(self, key, name):
-        """从 self.entry_widgets 字典中获取Entry并尝试解析为浮点数列表"""
+        """从 self.entry_widgets 字典中获取Entry并尝试解析为浮点数数组"""
         entry_widget = self.entry_widgets.get(key)
         if not entry_widget or not entry_widget.winfo_exists():
             raise ValueError(f"'{name}' 输入框未找到或已销毁。")
         try:
-            return parse_float_list(entry_widget.get())
+            return parse_float_array(entry_widget.get())
         except ValueError as e:
             raise ValueError(f"'{name}' 输入有误: {e}")
 
+    def toggle_data_file(self):
+        """选择测量数据文件；已选择文件时清除选择，改用输入框中的数据。"""
+        if self.data_file_path:
+            self.data_file_path = None
+            self.data_file_button.configure(text="从文件读取...")
+            self.data_file_label.configure(text="未选择文件 (.npy 或原始 float64 数据)")
+            return
+
+        file_path = filedialog.askopenfilename(
+            title="选择测量数据文件",
+            filetypes=[("NumPy 数组", "*.npy"), ("原始 float64 数据", "*.bin *.dat *.f64 *.raw"), ("All files", "*.*")]
+        )
+        if file_path:
+            self.data_file_path = file_path
+            self.data_file_button.configure(text="清除文件")
+            self.data_file_label.configure(text=f"使用文件: {os.path.basename(file_path)}")
+
+    def on_t_factor_mode_changed(self, mode):
+        """自动查表时 t因子输入框只用于显示查得的值，切换回手动输入时恢复默认值。"""
+        entry = self.entry_widgets['t_factor']
+        entry.configure(state="normal")
+        entry.delete(0, "end")
+        if T_FACTOR_MODES[mode] is None:
+            entry.insert(0, "1.0")
+        else:
+            entry.configure(state="disabled")
+
+    def _show_t_factor(self, t_factor):
+        entry = self.entry_widgets['t_factor']
+        entry.configure(state="normal")
+        entry.delete(0, "end")
+        entry.insert(0, f"{t_factor:.4g}")
+        entry.configure(state="disabled")
+
+    def _describe_rejected(self, data, rejected_indices):
+        """被剔除数据的说明文字，序号从1开始，与输入数据的顺序一致。"""
+        if len(rejected_indices) == 0:
+            return "未发现异常值。"
+        items = [f"第 {index + 1} 个 ({data[index]:g})" for index in rejected_indices[:OUTLIER_DISPLAY_LIMIT]]
+        more = " 等" if len(rejected_indices) > OUTLIER_DISPLAY_LIMIT else ""
+        return f"已剔除 {len(rejected_indices)} 个异常值: " + "，".join(items) + more
+
     def get_reading_factor(self):
         factor_str = self.reading_factor_combobox.get()
         if '/' in factor_str:
@@ -271,6 +377,7 @@ class SingleQuantityCalculator(ctk.CTkFrame):
             
             final_measurement_value = 0.0
             final_uncertainty = 0.0
+            outlier_info = ""
 
             if measurement_type == "单次测量":
                 min_division = self.get_float_input('min_division', "仪器的最小分度值")
@@ -301,14 +408,51 @@ class SingleQuantityCalculator(ctk.CTkFrame):
                     final_uncertainty = calculate_combined_uncertainty(u_B2_instrument, u_B_reading_combined)
 
             elif measurement_type == "多次测量":
-                data_list = self.get_float_list_input('data_list', "测量数据列表")
-                if not data_list:
-                    raise ValueError("测量数据列表不能为空。")
-
-                t_factor = self.get_float_input('t_factor', "t因子")
+                data_file_path = self.data_file_path
+                if data_file_path is None:
+                    data_list = self.get_float_list_input('data_list', "测量数据列表")
+                    if data_list.size == 0:
+                        raise ValueError("测量数据列表不能为空。")
+
+                outlier_method = OUTLIER_MODES[self.outlier_mode_combobox.get()]
+                if outlier_method is not None:
+                    from outlier_rejection import reject_outliers # 仅在使用时导入，加快程序启动
+                    if data_file_path is not None:
+                        # 剔除异常值需要对数据排序，文件中的数据会整个读入内存
+                        try:
+                            data_list = open_measurement_file(data_file_path)
+                        except OSError as e:
+                            raise ValueError(f"无法读取数据文件: {e}")
+                        data_file_path = None
+                    measured_data = data_list
+                    data_list, rejected_indices = reject_outliers(measured_data, outlier_method)
+                    outlier_info = self._describe_rejected(measured_data, rejected_indices)
+
+                confidence_level = T_FACTOR_MODES[self.t_factor_mode_combobox.get()]
+                if confidence_level is None:
+                    t_factor = self.get_float_input('t_factor', "t因子")
+                else:
+                    from t_distribution import student_t_factor # 仅在使用时导入，加快程序启动
+                    # 自由度为测量次数减1；文件只读取数据个数，不读入数据
+                    if data_file_path is None:
+                        count = data_list.size
+                    else:
+                        try:
+                            count = open_measurement_file(data_file_path).size
+                        except OSError as e:
+                            raise ValueError(f"无法读取数据文件: {e}")
+                    t_factor = student_t_factor(count - 1, confidence_level) if count >= 2 else DEFAULT_T_FACTOR
+                    self._show_t_factor(t_factor)
                 instrument_uncertainty_limit = self.get_float_input('instrument_uncertainty_limit', "仪器的不确定度限值")
 
-                mean_val, u_A_stats, _ = calculate_a_uncertainty_multiple_measurements(data_list, t_factor)
+                if data_file_path is None:
+                    mean_val, u_A_stats, _ = calculate_a_uncertainty_multiple_measurements(data_list, t_factor)
+                else:
+                    # 文件通过内存映射分块读取，不会整个读入内存
+                    try:
+                        mean_val, u_A_stats, _ = calculate_a_uncertainty_from_file(data_file_path, t_factor)
+                    except OSError as e:
+                        raise ValueError(f"无法读取数据文件: {e}")
                 final_measurement_value = mean_val
 
                 u_B_instrument = calculate_b_uncertainty_from_limit(instrument_uncertainty_limit, distribution_type)
@@ -319,6 +463,7 @@ class SingleQuantityCalculator(ctk.CTkFrame):
 
             self.result_value_label.configure(text=f"测量值: {formatted_value}")
             self.result_uncertainty_label.configure(text=f"不确定度: {formatted_uncertainty}")
+            self.outlier_info_label.configure(text=outlier_info)
 
         except ValueError as e:
             messagebox.showerror("输入错误", str(e))
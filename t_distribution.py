@@ -0,0 +1,205 @@
+from functools import lru_cache
+from statistics import NormalDist
+from typing import NamedTuple
+import math
+import numpy as np # 用于向量化计算，需要安装 pip install numpy
+from calculation_formulas import propagate_uncertainty_batch, propagate_uncertainty_budget
+
+# --- t 分布分位数 (t因子) ---
+# 对每个置信水平只求一次分位数表，之后的查询都是对表的向量化插值，
+# 批量计算时不会对每一行调用求根算法。
+# 自由度 ν ≤ 30 时表中逐个整数给出；更大的自由度按 1/ν 线性插值（t_p(ν) 近似为 1/ν 的线性函数，
+# 误差小于 1e-3），1/ν = 0 处为正态分布的分位数。
+
+# 默认置信水平
+DEFAULT_CONFIDENCE_LEVEL = 0.95
+# 分位数表的自由度节点
+T_TABLE_DOF = (*range(1, 31), 40, 50, 60, 80, 100, 120, 200, 500, 1000)
+# 同时保留的置信水平个数
+T_TABLE_CACHE_MAXSIZE = 16
+# 不完全贝塔函数连分式的收敛判据与最大迭代次数（所需迭代次数约为 √ν 的量级）
+_BETA_CF_EPS = 1e-15
+_BETA_CF_MAX_ITERATIONS = 1_000_000
+_BETA_CF_TINY = 1e-300
+
+
+def _beta_continued_fraction(a: float, b: float, x: float) -> float:
+    """正则化不完全贝塔函数的连分式部分 (修正 Lentz 算法)，x < (a+1)/(a+b+2) 时收敛较快。"""
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > _BETA_CF_TINY else _BETA_CF_TINY)
+    h = d
+    for m in range(1, _BETA_CF_MAX_ITERATIONS + 1):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((a - 1 + m2) * (a + m2)),
+                          -(a + m) * (a + b + m) * x / ((a + m2) * (a + 1 + m2))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > _BETA_CF_TINY else _BETA_CF_TINY)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > _BETA_CF_TINY else _BETA_CF_TINY
+            h *= d * c
+        if abs(d * c - 1.0) < _BETA_CF_EPS:
+            return h
+    raise ValueError("不完全贝塔函数的连分式不收敛。")
+
+
+def _regularized_incomplete_beta(a: float, b: float, x: float, y: float) -> float:
+    """正则化不完全贝塔函数 I_x(a, b)，y = 1 - x 单独给出以避免舍入误差。"""
+    if x <= 0.0:
+        return 0.0
+    if y <= 0.0:
+        return 1.0
+    log_front = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(y)
+    if x < (a + 1) / (a + b + 2):
+        return math.exp(log_front) * _beta_continued_fraction(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _beta_continued_fraction(b, a, y) / b
+
+
+def _t_two_sided_tail(t: float, dof: float) -> float:
+    """自由度为 dof 的 t 分布的双侧尾概率 P(|T| > t)。"""
+    # P(|T| > t) = I_{ν/(ν+t²)}(ν/2, 1/2)，随 t 单调递减
+    t_squared = t * t
+    return _regularized_incomplete_beta(dof / 2, 0.5, dof / (dof + t_squared), t_squared / (dof + t_squared))
+
+
+def _t_quantile(confidence_level: float, dof: float) -> float:
+    """自由度为 dof 的 t 分布的双侧分位数：P(|T| ≤ t) = confidence_level。"""
+    tail = 1.0 - confidence_level
+    lower, upper = 0.0, 1.0
+    while _t_two_sided_tail(upper, dof) > tail:
+        lower, upper = upper, upper * 4
+    # 二分法，直到区间宽度达到浮点数精度
+    while True:
+        middle = 0.5 * (lower + upper)
+        if not lower < middle < upper:
+            return upper
+        if _t_two_sided_tail(middle, dof) > tail:
+            lower = middle
+        else:
+            upper = middle
+
+
+@lru_cache(maxsize=T_TABLE_CACHE_MAXSIZE)
+def _t_quantile_table(confidence_level: float) -> tuple[np.ndarray, np.ndarray]:
+    """返回按 1/ν 递增排列的 (1/ν, t) 分位数表，第一项 1/ν = 0 为正态分布的分位数。"""
+    inverse_dof = [0.0]
+    quantiles = [NormalDist().inv_cdf(0.5 + confidence_level / 2)]
+    for dof in reversed(T_TABLE_DOF):
+        inverse_dof.append(1.0 / dof)
+        quantiles.append(_t_quantile(confidence_level, dof))
+    return np.array(inverse_dof), np.array(quantiles)
+
+
+def student_t_factor(dof, confidence_level: float = DEFAULT_CONFIDENCE_LEVEL):
+    """
+    由自由度和置信水平查询 t因子 t_p(ν)。
+    Args:
+        dof: 自由度 ν（标量或数组），可以为 inf（对应正态分布）。
+             按 GUM 的做法，非整数的自由度（例如有效自由度）向下取整后查表。
+        confidence_level (float): 置信水平 p，例如 0.6827、0.95、0.99。
+    Returns:
+        float 或 np.ndarray: t因子。数组中自由度小于1或为 nan 的元素结果为 nan。
+    """
+    if not 0 < confidence_level < 1:
+        raise ValueError("置信水平必须在0和1之间。")
+    inverse_dof, quantiles = _t_quantile_table(float(confidence_level))
+    dof_array = np.asarray(dof, dtype=float)
+    valid = dof_array >= 1
+    with np.errstate(all="ignore"):
+        t_values = np.interp(1.0 / np.floor(np.where(valid, dof_array, 1.0)), inverse_dof, quantiles)
+    if dof_array.ndim == 0:
+        if not valid:
+            raise ValueError("自由度必须不小于1。")
+        return float(t_values)
+    return np.where(valid, t_values, np.nan)
+
+
+# --- Welch–Satterthwaite 有效自由度 ---
+
+class DofPropagationResult(NamedTuple):
+    """带自由度的不确定度传递结果；批量计算时各字段为数组。"""
+    y_value: float # output物理量的测量值
+    u_y: float # 合成标准不确定度
+    effective_dof: float # 有效自由度 ν_eff，所有分量的自由度都为无穷大时为 inf
+    t_factor: float # 由 ν_eff 和置信水平查得的 t因子
+    expanded_uncertainty: float # 扩展不确定度 U = t · u_y
+
+
+def welch_satterthwaite(u_y, contributions: dict, dof_values: dict):
+    """
+    用 Welch–Satterthwaite 公式计算有效自由度 ν_eff = u_y⁴ / Σ (|c_i| u_i)⁴ / ν_i。
+    Args:
+        u_y: 合成标准不确定度（标量或数组）。
+        contributions (dict): {变量名: 不确定度分量 |c_i|·u_i}，值为标量或数组。
+        dof_values (dict): {变量名: 自由度 ν_i}；缺少的变量视为自由度无穷大（例如由可靠的仪器限值得到的B类分量）。
+    Returns:
+        float 或 np.ndarray: ν_eff；所有分量的自由度都为无穷大或分量都为0时为 inf。
+    """
+    u_y = np.asarray(u_y, dtype=float)
+    denominator = np.zeros(u_y.shape)
+    with np.errstate(all="ignore"):
+        for var_name, contribution in contributions.items():
+            dof = dof_values.get(var_name)
+            if dof is None:
+                continue
+            # ν_i 为 inf 时该项为0
+            denominator = denominator + np.asarray(contribution, dtype=float)**4 / np.asarray(dof, dtype=float)
+        effective_dof = np.divide(u_y**4, denominator, out=np.full(np.broadcast_shapes(u_y.shape, denominator.shape), np.inf),
+                                  where=denominator > 0)
+    return float(effective_dof) if effective_dof.ndim == 0 else effective_dof
+
+
+def _check_dof_values(dof_values: dict) -> dict[str, float]:
+    checked = {}
+    for var_name, dof in dof_values.items():
+        dof = float(dof)
+        if not dof >= 1:
+            raise ValueError(f"变量 '{var_name}' 的自由度必须不小于1。")
+        checked[var_name] = dof
+    return checked
+
+
+def propagate_uncertainty_with_dof(function_str: str, x_values: dict[str, float], u_x_values: dict[str, float],
+                                   dof_values: dict[str, float], confidence_level: float = DEFAULT_CONFIDENCE_LEVEL,
+                                   backend: str = 'sympy') -> DofPropagationResult:
+    """
+    计算不确定度传递，并由各输入量的自由度给出 u_y 的有效自由度与扩展不确定度。
+    Welch–Satterthwaite 公式要求输入量相互独立，因此不支持相关系数矩阵。
+    Args:
+        function_str, x_values, u_x_values, backend: 与 propagate_uncertainty 相同。
+        dof_values (dict): 各输入量不确定度的自由度，例如 n 次测量的A类不确定度为 n-1；
+                           缺少的变量视为自由度无穷大。
+        confidence_level (float): 扩展不确定度的置信水平。
+    Returns:
+        DofPropagationResult: (y_value, u_y, 有效自由度, t因子, 扩展不确定度)
+    """
+    dof_values = _check_dof_values(dof_values)
+    y_value, u_y, budget = propagate_uncertainty_budget(function_str, x_values, u_x_values, backend=backend)
+    effective_dof = welch_satterthwaite(u_y, {entry['variable']: entry['contribution'] for entry in budget}, dof_values)
+    t_factor = student_t_factor(effective_dof, confidence_level)
+    return DofPropagationResult(y_value, u_y, effective_dof, t_factor, t_factor * u_y)
+
+
+def propagate_uncertainty_with_dof_batch(function_str: str, x_values, u_x_values, dof_values: dict, var_names=None,
+                                         confidence_level: float = DEFAULT_CONFIDENCE_LEVEL,
+                                         backend: str = 'sympy') -> DofPropagationResult:
+    """
+    propagate_uncertainty_with_dof 的批量版本：传递与 t因子查表都对所有行一次性向量化计算。
+    Args:
+        function_str, x_values, u_x_values, var_names, backend: 与 propagate_uncertainty_batch 相同。
+        dof_values (dict): {变量名: 自由度}，值为标量（所有行共用）或长度等于行数的数组。
+        confidence_level (float): 扩展不确定度的置信水平。
+    Returns:
+        DofPropagationResult: 各字段为长度等于行数的数组。函数无定义或自由度小于1的行结果为 nan。
+    """
+    y_values, u_y_values, budget = propagate_uncertainty_batch(function_str, x_values, u_x_values, var_names,
+                                                               backend=backend, return_budget=True)
+    dof_columns = {var_name: np.asarray(dof, dtype=float) for var_name, dof in dof_values.items()}
+    invalid = np.isnan(u_y_values)
+    for dof in dof_columns.values():
+        invalid |= ~(dof >= 1)
+    effective_dof = welch_satterthwaite(
+        u_y_values, {var_name: columns['contribution'] for var_name, columns in budget.items()}, dof_columns)
+    effective_dof = np.where(invalid, np.nan, effective_dof)
+    t_factors = student_t_factor(effective_dof, confidence_level)
+    return DofPropagationResult(y_values, u_y_values, effective_dof, t_factors, t_factors * u_y_values)
@@ -0,0 +1,29 @@
+"""自动微分后端：公共子表达式与常数运算。"""
+import ast
+
+import pytest
+
+from autodiff import _build_tape
+from calculation_formulas import propagate_uncertainty
+
+X = {"x1": 1.3, "x2": 2.1}
+U_X = {"x1": 0.01, "x2": 0.02}
+
+
+def test_shared_subexpressions_emitted_once():
+    tape = _build_tape(ast.parse("sin(x1*x2) + sin(x1*x2)*cos(x1*x2) + 2*3", mode="eval"), {"x1": 0, "x2": 1})
+    # x1*x2, sin, cos, sin*cos, 两个 + 各一条；2*3 在建表时折叠为常数
+    assert sum(kind == "op" for kind, _, _ in tape) == 6
+
+
+@pytest.mark.parametrize("function_str", ["x1*x2", "sin(x1)**2 + log(x2, 2) - 2*pi*x1", "(x1 + x2)/(x1 + x2)**2"])
+def test_matches_sympy_backend(function_str):
+    expected = propagate_uncertainty(function_str, X, U_X)
+    assert propagate_uncertainty(function_str, X, U_X, backend="autodiff") == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize("backend", ["sympy", "autodiff"])
+@pytest.mark.parametrize("function_str", ["1/0 + x1 + x2", "x1 + log(0)*x2", "x1*x2 + sqrt(-1)"])
+def test_undefined_constant_raises_value_error(backend, function_str):
+    with pytest.raises(ValueError):
+        propagate_uncertainty(function_str, X, U_X, backend=backend)
@@ -0,0 +1,44 @@
+"""批量计算命令行工具：编译内核磁盘缓存的开启次数与目录检查。"""
+import json
+import os
+
+import pytest
+
+import batch_cli
+
+JOB = {"id": "a1", "function": "x1*x2", "values": {"x1": 1.0, "x2": 2.0}, "uncertainties": {"x1": 0.1, "x2": 0.2}}
+
+
+@pytest.fixture
+def enable_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(batch_cli, "enable_kernel_disk_cache", calls.append)
+    return calls
+
+
+def _write_jobs(tmp_path) -> str:
+    jobs_path = str(tmp_path / "jobs.jsonl")
+    with open(jobs_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(JOB) + "\n")
+    return jobs_path
+
+
+def test_kernel_cache_enabled_once_in_single_process(tmp_path, enable_calls):
+    cache_dir = str(tmp_path / "cache")
+    output_path = str(tmp_path / "results.jsonl")
+    assert batch_cli.main([_write_jobs(tmp_path), "-o", output_path, "--workers", "1", "--kernel-cache", cache_dir]) == 0
+    assert enable_calls == [cache_dir]
+    # main() 只创建并检查目录
+    assert oct(os.stat(cache_dir).st_mode & 0o777) == oct(0o700)
+    with open(output_path, encoding="utf-8") as f:
+        assert json.loads(f.readline())["id"] == "a1"
+
+
+def test_untrusted_kernel_cache_directory_rejected(tmp_path, enable_calls):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(SystemExit) as excinfo:
+        batch_cli.main([_write_jobs(tmp_path), "--workers", "1", "--kernel-cache", str(shared / "kernels")])
+    assert excinfo.value.code == 2
+    assert enable_calls == []
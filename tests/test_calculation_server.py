@@ -0,0 +1,77 @@
+"""计算服务默认配置下的请求合并。"""
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from calculation_formulas import propagate_uncertainty
+from calculation_server import DEFAULT_BATCH_WINDOW, CalculationServer
+
+FUNCTION = "x1*sin(x2) + x3"
+N_REQUESTS = 16
+
+
+def _inputs(i):
+    x_values = {"x1": 1.0 + i, "x2": 0.5, "x3": 2.0}
+    u_x_values = {"x1": 0.1, "x2": 0.01, "x3": 0.2}
+    return x_values, u_x_values
+
+
+@pytest.fixture
+def server():
+    server = CalculationServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_default_configuration_batches():
+    assert DEFAULT_BATCH_WINDOW > 0
+    server = CalculationServer(("127.0.0.1", 0))
+    server.server_close()
+    assert server.batcher.batch_window == DEFAULT_BATCH_WINDOW
+
+
+def test_concurrent_requests_are_coalesced(server):
+    batcher = server.batcher
+    results = [None] * N_REQUESTS
+
+    def request(i):
+        try:
+            results[i] = batcher.propagate(FUNCTION, *_inputs(i))
+        finally:
+            batcher.request_finished()
+
+    # 与 HTTP 处理线程相同：先登记为正在处理的请求（此处已持有锁，直接计数），再调用 propagate。
+    # 持有锁直到所有线程都已启动，使它们同时到达
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(N_REQUESTS)]
+    with batcher._lock:
+        for thread in threads:
+            batcher._active_requests += 1
+            thread.start()
+        time.sleep(0.2)
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert batcher.batched_requests == N_REQUESTS
+    assert batcher.batches < N_REQUESTS
+    for i, (y, u_y) in enumerate(results):
+        expected_y, expected_u_y = propagate_uncertainty(FUNCTION, *_inputs(i))
+        assert y == pytest.approx(expected_y, rel=1e-12)
+        assert u_y == pytest.approx(expected_u_y, rel=1e-12)
+
+
+def test_http_request_with_default_configuration(server):
+    host, port = server.server_address[:2]
+    x_values, u_x_values = _inputs(0)
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    connection.request("POST", "/propagate", json.dumps(
+        {"function": FUNCTION, "values": x_values, "uncertainties": u_x_values}))
+    body = json.loads(connection.getresponse().read())
+    connection.close()
+    assert body["y_raw"] == pytest.approx(propagate_uncertainty(FUNCTION, x_values, u_x_values)[0], rel=1e-12)
+    assert server.batcher.batches == 1
@@ -0,0 +1,66 @@
+"""批量格式化与 format_uncertainty_and_value 的差分检验。"""
+import numpy as np
+import pytest
+
+from calculation_formulas import format_uncertainty_and_value, format_uncertainty_and_value_batch
+
+CORPUS_SIZE = 100_000
+SEED = 20240501
+
+
+def build_corpus(n: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """覆盖多个数量级、正负号、两位有效数字的舍入边界、判断位恰好为5以及不确定度为0的情形。"""
+    rng = np.random.default_rng(seed)
+    quarter = n // 4
+
+    # 1. 任意数量级的测量值与不确定度
+    values = rng.choice([-1, 1], n) * 10.0**rng.uniform(-6, 6, n)
+    uncertainties = 10.0**rng.uniform(-8, 4, n)
+
+    # 2. 不确定度恰好在两位有效数字的舍入边界附近，例如 0.0995、0.125、9.95
+    mantissa = rng.integers(100, 1000, quarter) + 0.5
+    uncertainties[:quarter] = mantissa * 10.0**rng.integers(-9, 2, quarter).astype(float)
+
+    # 3. 测量值的判断位恰好为5（"五成双"）或5后还有数字（"5后有数就入"）
+    digits = rng.integers(0, 10**6, quarter)
+    tails = rng.choice(["5", "50", "51", "500001", "4", "6"], quarter)
+    signs = rng.choice(["", "-"], quarter)
+    values[quarter:2 * quarter] = [float(f"{s}{d / 1000:.3f}{t}") for s, d, t in zip(signs, digits, tails)]
+    uncertainties[quarter:2 * quarter] = 0.012
+
+    # 4. 不确定度为0的特殊情形
+    uncertainties[2 * quarter:2 * quarter + quarter // 10] = 0.0
+    return values, uncertainties
+
+
+def test_batch_matches_scalar_on_random_corpus():
+    values, uncertainties = build_corpus(CORPUS_SIZE, SEED)
+    batch_values, batch_uncertainties = format_uncertainty_and_value_batch(values, uncertainties)
+    assert len(batch_values) == len(batch_uncertainties) == CORPUS_SIZE
+
+    mismatches = []
+    for i, (value, uncertainty) in enumerate(zip(values.tolist(), uncertainties.tolist())):
+        expected = format_uncertainty_and_value(value, uncertainty)
+        if expected != (batch_values[i], batch_uncertainties[i]):
+            mismatches.append((value, uncertainty, expected, (batch_values[i], batch_uncertainties[i])))
+    assert not mismatches, f"{len(mismatches)} 条不一致，例如: {mismatches[:5]}"
+
+
+@pytest.mark.parametrize("value, uncertainty", [
+    (1.2345, 0.0123),  # 判断位为4，舍去
+    (1.2350, 0.012),  # 恰好为5，五成双（舍）
+    (1.2450, 0.012),  # 恰好为5，五成双（入）
+    (1.23501, 0.012),  # 5后有数字，进位
+    (-1.2350, 0.012),
+    (123456.7, 0.0996),  # 不确定度进位为 0.10
+    (9.87, 150.0),  # 不确定度 1.5e+02
+    (3.0, 0.0),
+])
+def test_batch_matches_scalar_on_edge_cases(value, uncertainty):
+    batch_values, batch_uncertainties = format_uncertainty_and_value_batch([value], [uncertainty])
+    assert (batch_values[0], batch_uncertainties[0]) == format_uncertainty_and_value(value, uncertainty)
+
+
+def test_length_mismatch_rejected():
+    with pytest.raises(ValueError):
+        format_uncertainty_and_value_batch([1.0, 2.0], [0.1])
@@ -0,0 +1,44 @@
+"""启动耗时：计算核心与主程序在导入阶段不加载重量级依赖，导入时间不超过预算。"""
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# calculation_formulas 的累计导入时间预算 (ms)，取多次运行的最小值比较
+IMPORT_TIME_BUDGET_MS = 100.0
+IMPORT_TIME_RUNS = 3
+
+
+def _import_in_subprocess(module: str, watched: tuple[str, ...]) -> tuple[float, list[str]]:
+    """
+    用 python -X importtime 在新的解释器中导入模块。
+    Returns:
+        tuple[float, list[str]]: (模块的累计导入时间 ms, watched 中已被加载的模块)
+    """
+    code = f"import {module}, sys; print(','.join(m for m in {watched!r} if m in sys.modules))"
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                               cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    cumulative_us = None
+    for line in completed.stderr.splitlines():
+        # 格式: "import time:  self [us] | cumulative | imported package"
+        fields = [field.strip() for field in line.removeprefix("import time:").split("|")]
+        if line.startswith("import time:") and len(fields) == 3 and fields[2] == module:
+            cumulative_us = int(fields[1])
+    assert cumulative_us is not None, f"-X importtime 输出中没有模块 {module}"
+    return cumulative_us / 1000, [name for name in completed.stdout.strip().split(",") if name]
+
+
+def test_calculation_formulas_import_is_light_and_within_budget():
+    timings = []
+    for _ in range(IMPORT_TIME_RUNS):
+        elapsed_ms, loaded = _import_in_subprocess("calculation_formulas", ("numpy", "sympy", "tkinter", "customtkinter"))
+        assert loaded == [], f"导入 calculation_formulas 时加载了 {loaded}"
+        timings.append(elapsed_ms)
+    assert min(timings) <= IMPORT_TIME_BUDGET_MS, f"导入时间 {min(timings):.1f} ms 超出预算 {IMPORT_TIME_BUDGET_MS:.0f} ms"
+
+
+def test_main_does_not_import_pages_at_load_time():
+    # 功能页面（以及它们依赖的 numpy / sympy）在进入页面时才导入
+    _, loaded = _import_in_subprocess("main", ("single_quantity", "uncertainty_propagation", "calculation_formulas",
+                                               "numpy", "sympy"))
+    assert loaded == []
@@ -0,0 +1,67 @@
+"""编译内核磁盘缓存的目录与文件权限检查。"""
+import os
+import stat
+
+import pytest
+
+from calculation_formulas import get_compiled_kernel
+from kernel_cache import KernelDiskCache
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "getuid"), reason="需要 POSIX 文件权限")
+
+FUNCTION = "x1*x2"
+VAR_NAMES = ("x1", "x2")
+
+
+def _store_entry(cache):
+    cache.store(FUNCTION, VAR_NAMES, get_compiled_kernel(FUNCTION, VAR_NAMES))
+    return cache._path(cache._key(FUNCTION, VAR_NAMES))
+
+
+def test_new_directory_is_private_and_round_trips(tmp_path):
+    directory = tmp_path / "kernels"
+    cache = KernelDiskCache(str(directory))
+    assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+    _store_entry(cache)
+    kernel = cache.load(FUNCTION, VAR_NAMES)
+    assert kernel is not None and kernel.value_func(2.0, 3.0) == 6.0
+
+
+def test_own_directory_with_loose_permissions_is_tightened(tmp_path):
+    directory = tmp_path / "kernels"
+    directory.mkdir(mode=0o777)
+    directory.chmod(0o777)
+    KernelDiskCache(str(directory))
+    assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+
+
+def test_directory_under_writable_parent_is_refused(tmp_path):
+    parent = tmp_path / "shared"
+    parent.mkdir()
+    parent.chmod(0o777) # 其他用户可写且没有粘滞位
+    with pytest.raises(ValueError):
+        KernelDiskCache(str(parent / "kernels"))
+
+
+def test_writable_cache_file_is_not_loaded(tmp_path):
+    cache = KernelDiskCache(str(tmp_path / "kernels"))
+    path = _store_entry(cache)
+    os.chmod(path, 0o666)
+    assert cache.load(FUNCTION, VAR_NAMES) is None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid") or os.getuid() != 0, reason="需要 root 权限修改文件所有者")
+def test_file_owned_by_other_user_is_not_loaded(tmp_path):
+    cache = KernelDiskCache(str(tmp_path / "kernels"))
+    path = _store_entry(cache)
+    os.chown(path, 12345, 12345)
+    assert cache.load(FUNCTION, VAR_NAMES) is None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid") or os.getuid() != 0, reason="需要 root 权限修改目录所有者")
+def test_directory_owned_by_other_user_is_refused(tmp_path):
+    directory = tmp_path / "kernels"
+    directory.mkdir(mode=0o700)
+    os.chown(directory, 12345, 12345)
+    with pytest.raises(ValueError):
+        KernelDiskCache(str(directory))
@@ -0,0 +1,62 @@
+"""从内存映射文件分块计算A类不确定度，结果与一次性计算相同。"""
+import numpy as np
+import pytest
+
+from calculation_formulas import (
+    calculate_a_uncertainty_from_file,
+    calculate_a_uncertainty_multiple_measurements,
+    open_measurement_file,
+)
+
+DATA = np.random.default_rng(7).normal(12.5, 0.03, 10_001)
+CHUNK_SIZE = 997  # 不整除数据个数，最后一块较小
+
+
+@pytest.fixture(params=["raw", "npy"])
+def data_file(request, tmp_path):
+    if request.param == "npy":
+        path = tmp_path / "data.npy"
+        np.save(path, DATA)
+    else:
+        path = tmp_path / "data.bin"
+        DATA.astype("<f8").tofile(path)
+    return str(path)
+
+
+def test_open_measurement_file_round_trips(data_file):
+    np.testing.assert_array_equal(open_measurement_file(data_file), DATA)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"t_factor": 2.0}, {"confidence_level": 0.95}])
+def test_chunked_file_matches_in_memory(data_file, kwargs):
+    expected = calculate_a_uncertainty_multiple_measurements(DATA, **kwargs)
+    result = calculate_a_uncertainty_from_file(data_file, chunk_size=CHUNK_SIZE, **kwargs)
+    assert result == pytest.approx(expected, rel=1e-10)
+
+
+def test_npy_integers_and_2d(tmp_path):
+    data = np.arange(12, dtype=np.int32).reshape(3, 4)
+    path = str(tmp_path / "data.npy")
+    np.save(path, data)
+    expected = calculate_a_uncertainty_multiple_measurements(data.ravel().astype(float))
+    assert calculate_a_uncertainty_from_file(path, chunk_size=5) == pytest.approx(expected, rel=1e-12)
+
+
+def test_invalid_files(tmp_path):
+    truncated = tmp_path / "truncated.bin"
+    truncated.write_bytes(b"\0" * 12)
+    with pytest.raises(ValueError):
+        calculate_a_uncertainty_from_file(str(truncated))
+
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError):
+        calculate_a_uncertainty_from_file(str(empty))
+
+    with_nan = tmp_path / "nan.bin"
+    np.array([1.0, np.nan, 2.0]).tofile(with_nan)
+    with pytest.raises(ValueError):
+        calculate_a_uncertainty_from_file(str(with_nan))
+
+    with pytest.raises(ValueError):
+        calculate_a_uncertainty_from_file(str(with_nan), chunk_size=0)
@@ -0,0 +1,43 @@
+"""蒙特卡洛传递的包含区间。"""
+import numpy as np
+import pytest
+
+from monte_carlo import propagate_uncertainty_monte_carlo
+
+FUNCTION = "exp(x1)"
+X = {"x1": 0.0}
+U_X = {"x1": 1.0}
+
+
+def _pooled_samples(n_samples, chunk_size, seed):
+    """按 propagate_uncertainty_monte_carlo 的分块与子种子重新生成全部样本。"""
+    sizes = [chunk_size] * max(1, n_samples // chunk_size)
+    sizes[-1] += n_samples - sum(sizes)
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(sizes))
+    return np.exp(np.concatenate([np.random.default_rng(s).normal(0.0, 1.0, size)
+                                  for s, size in zip(seed_sequences, sizes)]))
+
+
+@pytest.mark.parametrize("n_samples, chunk_size", [
+    (10_003, 1_000), # 余数只有3个样本，并入最后一个分块
+    (10_000, 777),
+    (5_000, 100_000), # 分块大于样本数
+    (20_000, 10), # 分块比每一端所需的样本数还小
+])
+@pytest.mark.parametrize("coverage_probability", [0.95, 0.6827])
+def test_interval_is_quantile_of_pooled_sample(n_samples, chunk_size, coverage_probability):
+    result = propagate_uncertainty_monte_carlo(FUNCTION, X, U_X, n_samples=n_samples, chunk_size=chunk_size,
+                                               seed=1, coverage_probability=coverage_probability)
+    samples = _pooled_samples(n_samples, chunk_size, 1)
+    expected = np.quantile(samples, [(1 - coverage_probability) / 2, (1 + coverage_probability) / 2])
+    assert result.n_samples == n_samples
+    assert result.coverage_interval == pytest.approx(tuple(expected), rel=1e-12)
+    assert result.y_value == pytest.approx(samples.mean(), rel=1e-12)
+    assert result.u_y == pytest.approx(samples.std(ddof=1), rel=1e-12)
+
+
+def test_interval_independent_of_workers():
+    kwargs = dict(n_samples=30_001, chunk_size=4_000, seed=3)
+    serial = propagate_uncertainty_monte_carlo(FUNCTION, X, U_X, **kwargs)
+    parallel = propagate_uncertainty_monte_carlo(FUNCTION, X, U_X, n_workers=2, **kwargs)
+    assert serial.coverage_interval == parallel.coverage_interval
@@ -0,0 +1,91 @@
+"""异常值剔除：排序 + 累加和的实现与每次剔除后重新计算平均值和标准差的朴素实现一致。"""
+import numpy as np
+import pytest
+
+from outlier_rejection import _CRITERIA, MIN_REMAINING, OUTLIER_METHODS, reject_outliers
+
+
+def naive_reject_outliers(data, method, significance=0.05):
+    """
+    朴素实现：每轮对剩余数据重新计算平均值和标准差，检验离平均值最远的数据。
+    取值相同时与 reject_outliers 的约定一致：最大值取下标最大的一个，最小值取下标最小的一个，
+    两端偏差相等时检验最大值；不剔除排序后位于中间位置 (n // 2) 的数据。
+    """
+    values = np.asarray(data, dtype=float)
+    median_index = np.argsort(values, kind="stable")[values.size // 2]
+    remaining = list(range(values.size))
+    rejected = []
+    while len(remaining) >= MIN_REMAINING:
+        remaining_values = values[remaining]
+        mean = remaining_values.mean()
+        std = remaining_values.std(ddof=1)
+        if std == 0:
+            break
+        high = max(remaining, key=lambda i: (values[i], i))
+        low = min(remaining, key=lambda i: (values[i], i))
+        take_high = values[high] - mean >= mean - values[low]
+        candidate = high if take_high else low
+        if candidate == median_index:
+            break
+        if not _CRITERIA[method](abs(values[candidate] - mean) / std, len(remaining), significance):
+            break
+        rejected.append(candidate)
+        remaining.remove(candidate)
+    return rejected
+
+
+def _planted_glitches(seed: int, size: int, n_glitches: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    data = rng.normal(10.0, 0.1, size)
+    positions = rng.choice(size, n_glitches, replace=False)
+    data[positions] += rng.choice([-1, 1], n_glitches) * rng.uniform(0.5, 3.0, n_glitches)
+    return data
+
+
+def _assert_matches_naive(data, method):
+    kept, rejected_indices = reject_outliers(data, method)
+    expected = naive_reject_outliers(data, method)
+    assert rejected_indices.tolist() == expected
+    np.testing.assert_array_equal(kept, np.delete(np.asarray(data, dtype=float), expected))
+
+
+@pytest.mark.parametrize("method", OUTLIER_METHODS)
+@pytest.mark.parametrize("seed, size, n_glitches", [(0, 20, 2), (1, 50, 5), (2, 200, 10), (3, 1000, 30), (4, 7, 1)])
+def test_matches_naive_on_planted_glitches(method, seed, size, n_glitches):
+    _assert_matches_naive(_planted_glitches(seed, size, n_glitches), method)
+
+
+@pytest.mark.parametrize("method", OUTLIER_METHODS)
+@pytest.mark.parametrize("data", [
+    [10, 10, 10, 10, 10, 10, 10, 10, 10, 50, 50],  # 相同的异常值
+    [-30, 10, 10, 10, 10, 10, 10, 10, 10, 10, 50],  # 两端偏差相等
+    [1, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 3, 3, 3, 40, 40, 40],
+    [5.0] * 10,  # 全部相同
+    [5.0] * 9 + [5.1],
+])
+def test_matches_naive_with_ties(method, data):
+    _assert_matches_naive(data, method)
+
+
+@pytest.mark.parametrize("method", OUTLIER_METHODS)
+@pytest.mark.parametrize("data", [[1.0], [1.0, 100.0], [1.0, 1.0001, 100.0], [1.0, 2.0, 3.0], [7.0, 7.0, 7.0]])
+def test_matches_naive_for_three_or_fewer(method, data):
+    _assert_matches_naive(data, method)
+
+
+def test_grubbs_rejects_from_three_values():
+    # n = 3 时也进行检验，剔除后剩余两个数据
+    kept, rejected_indices = reject_outliers([1.0, 1.0001, 100.0], "grubbs")
+    assert rejected_indices.tolist() == [2]
+    assert kept.tolist() == [1.0, 1.0001]
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        reject_outliers([1.0, 2.0, 3.0], "dixon")
+    with pytest.raises(ValueError):
+        reject_outliers([1.0, 2.0, 3.0], significance=0.0)
+    with pytest.raises(ValueError):
+        reject_outliers([])
+    with pytest.raises(ValueError):
+        reject_outliers([1.0, np.nan, 3.0])
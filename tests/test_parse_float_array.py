@@ -0,0 +1,59 @@
+"""parse_float_array：结果与 parse_float_list 一致，非数字项给出准确的序号。"""
+import numpy
+import numpy as np
+import pytest
+
+from calculation_formulas import parse_float_array, parse_float_list
+
+
+@pytest.mark.parametrize("data_str", [
+    "1.2, 3.4, 5.6",
+    "1.2 3.4 5.6",
+    "1.2  3.4   5.6",
+    "1.2，3.4，5.6",
+    "1.2　3.4　5.6",
+    " ,1.2, 3.4,, 5.6, ",
+    "1e-3 -2.5E+4 inf -0",
+    "42",
+    "",
+])
+def test_matches_parse_float_list(data_str):
+    np.testing.assert_array_equal(parse_float_array(data_str), parse_float_list(data_str))
+
+
+def test_any_whitespace_separates_without_commas():
+    # 与 parse_float_list 不同，换行和制表符也可以分隔各项
+    np.testing.assert_array_equal(parse_float_array("1.2\n3.4\r\n5.6\t7.8"), [1.2, 3.4, 5.6, 7.8])
+
+
+@pytest.mark.parametrize("data_str, index, elem", [
+    ("1, 2, abc, 3", 3, "abc"),
+    ("1 2 abc 3", 3, "abc"),
+    ("1\n2\n3\nx4", 4, "x4"),
+    ("1 2 3 4,5", 1, "1 2 3 4"),  # 有逗号时按逗号分隔
+    ("abc 1 2", 1, "abc"),
+])
+def test_bad_token_reports_first_index(data_str, index, elem):
+    with pytest.raises(ValueError, match=f"第 {index} 项不是有效的数字: '{elem}'"):
+        parse_float_array(data_str)
+
+
+@pytest.mark.parametrize("data_str, index, elem", [
+    ("1 2 abc 3", 3, "abc"),
+    ("1.5 2.5\r\n3.5 4.5 bad", 5, "bad"),
+    ("1, 2, abc, 3", 3, "abc"),
+])
+def test_truncated_numpy_result_not_accepted(monkeypatch, data_str, index, elem):
+    # NumPy < 2.0 遇到非数字项时只给出警告，返回之前已解析的部分而不抛出异常
+    def truncating_fromstring(text, dtype=float, sep=" "):
+        values = []
+        for token in (text.split() if sep == " " else text.split(sep)):
+            try:
+                values.append(float(token))
+            except ValueError:
+                break
+        return np.array(values, dtype=dtype)
+
+    monkeypatch.setattr(numpy, "fromstring", truncating_fromstring)
+    with pytest.raises(ValueError, match=f"第 {index} 项不是有效的数字: '{elem}'"):
+        parse_float_array(data_str)
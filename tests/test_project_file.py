@@ -0,0 +1,104 @@
+"""项目文件模块：读写往返、旧版 .txt 导入、版本检查与出错行号。"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from project_file import (
+    PROJECT_FORMAT,
+    PROJECT_FORMAT_VERSION,
+    Formula,
+    Project,
+    Variable,
+    correlation_matrix,
+    read_project,
+    write_project,
+)
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROJECT = Project(
+    [Formula("y", "x1*x2 + sin(长度)"), Formula("area", "x1**2"), Formula("ratio", "x2/长度")],
+    [
+        Variable("x1", 10.0, 0.1, "均匀分布", 9.0),
+        Variable("x2", -2.5e-7, 3e-9, "正态分布", None),
+        Variable("长度", 1.25, 0.01, None, 4.0),
+        Variable("x4", None, None),
+    ],
+    {("x1", "x2"): 0.5, ("x2", "长度"): -0.25},
+)
+
+
+def test_import_does_not_load_numerical_modules():
+    # 打开或保存项目不需要 numpy / sympy 以及蒙特卡洛模块
+    code = "import sys, project_file; print(','.join(m for m in ('numpy', 'sympy', 'monte_carlo') if m in sys.modules))"
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == ""
+
+
+def _write_lines(path, lines, encoding="utf-8") -> str:
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "project.jsonl")
+    write_project(path, PROJECT)
+    assert read_project(path) == PROJECT
+
+
+def test_correlation_matrix_from_read_project(tmp_path):
+    path = str(tmp_path / "project.jsonl")
+    write_project(path, PROJECT)
+    matrix = correlation_matrix(read_project(path).correlations, ["长度", "x1", "x2"])
+    assert matrix.tolist() == [[1.0, 0.0, -0.25], [0.0, 1.0, 0.5], [-0.25, 0.5, 1.0]]
+    assert correlation_matrix(PROJECT.correlations, ["x1", "x4"]) is None
+
+
+def test_legacy_txt_with_bom_and_blank_fields(tmp_path):
+    path = _write_lines(tmp_path / "legacy.txt", ["x1*x2 + x3", "1.5, 0.1", "", "2.0,", ",0.3"], encoding="utf-8-sig")
+    assert read_project(path) == Project(
+        [Formula("y", "x1*x2 + x3")],
+        [Variable("x1", 1.5, 0.1), Variable("x2", 2.0, None), Variable("x3", None, 0.3)],
+        {},
+    )
+
+
+def test_jsonl_with_bom(tmp_path):
+    header = json.dumps({"format": PROJECT_FORMAT, "version": 1})
+    record = json.dumps({"type": "variable", "name": "x1", "value": 1.0, "uncertainty": 0.1})
+    path = _write_lines(tmp_path / "bom.jsonl", [header, record], encoding="utf-8-sig")
+    assert read_project(path).variables == [Variable("x1", 1.0, 0.1)]
+
+
+def test_newer_version_rejected(tmp_path):
+    header = json.dumps({"format": PROJECT_FORMAT, "version": PROJECT_FORMAT_VERSION + 1})
+    path = _write_lines(tmp_path / "newer.jsonl", [header])
+    with pytest.raises(ValueError, match="版本"):
+        read_project(path)
+
+
+@pytest.mark.parametrize("bad_record, message", [
+    ('{"type": "variable", "name": "1x", "value": 1.0, "uncertainty": 0.1}', "有效的变量名"),
+    ('{"type": "variable", "name": "x2", "value": "abc", "uncertainty": 0.1}', "'value' 必须是数字"),
+    ('{"type": "variable", "name": "x2", "value": 1, "uncertainty": 0.1, "distribution": "泊松分布"}', "分布类型"),
+    ('{"type": "correlation", "variables": ["x1", "x1"], "coefficient": 0.5}', "不能相同"),
+    ('{"type": "correlation", "variables": ["x1", "x2"], "coefficient": 1.5}', "-1 和 1 之间"),
+    ('{"type": "unknown"}', "未知的记录类型"),
+    ('{"type": "variable", "name": ', "不是有效的 JSON"),
+])
+def test_error_names_line_number(tmp_path, bad_record, message):
+    header = json.dumps({"format": PROJECT_FORMAT, "version": 1})
+    good = json.dumps({"type": "variable", "name": "x1", "value": 1.0, "uncertainty": 0.1})
+    path = _write_lines(tmp_path / "bad.jsonl", [header, good, "", bad_record])
+    with pytest.raises(ValueError, match=f"第 4 行.*{message}"):
+        read_project(path)
+
+
+def test_legacy_error_names_line_number(tmp_path):
+    path = _write_lines(tmp_path / "legacy.txt", ["x1 + x2", "1.0,0.1", "abc,0.2"])
+    with pytest.raises(ValueError, match="第 3 行"):
+        read_project(path)
@@ -0,0 +1,75 @@
+"""批量不确定度传递与逐行调用 propagate_uncertainty 的结果一致。"""
+import numpy as np
+import pytest
+
+from calculation_formulas import propagate_uncertainty, propagate_uncertainty_batch
+
+N_ROWS = 50
+VAR_NAMES = ["x1", "x2", "x3"]
+
+
+def _random_columns(seed: int):
+    rng = np.random.default_rng(seed)
+    x_columns = {name: rng.uniform(0.5, 5.0, N_ROWS) for name in VAR_NAMES}
+    u_columns = {name: rng.uniform(0.001, 0.1, N_ROWS) for name in VAR_NAMES}
+    return x_columns, u_columns
+
+
+def _row(columns, i):
+    return {name: float(column[i]) for name, column in columns.items()}
+
+
+def _assert_rows_match(function_str, x_columns, u_columns, y_values, u_y_values, backend="sympy", **kwargs):
+    assert y_values.shape == u_y_values.shape == (N_ROWS,)
+    for i in range(N_ROWS):
+        y_value, u_y = propagate_uncertainty(function_str, _row(x_columns, i), _row(u_columns, i),
+                                             backend=backend, **kwargs)
+        assert y_values[i] == pytest.approx(y_value, rel=1e-12, abs=1e-300)
+        assert u_y_values[i] == pytest.approx(u_y, rel=1e-12, abs=1e-300)
+
+
+@pytest.mark.parametrize("backend", ["sympy", "autodiff"])
+@pytest.mark.parametrize("function_str", [
+    "x1*x2 + sin(x3)",
+    "x1**2/x2 - sqrt(x3)*exp(-x1)",
+    "log(x1*x2, 10) + atan(x3/x1)",
+    "x1 + 2*x2",  # x3 未使用
+    "x1",  # x2、x3 未使用
+    "2*pi + 1",  # 常数表达式：y 为常数，u_y 为0
+])
+def test_batch_matches_scalar_rows(backend, function_str):
+    x_columns, u_columns = _random_columns(0)
+    y_values, u_y_values = propagate_uncertainty_batch(function_str, x_columns, u_columns, backend=backend)
+    _assert_rows_match(function_str, x_columns, u_columns, y_values, u_y_values, backend)
+
+
+def test_constant_expression_has_zero_uncertainty():
+    x_columns, u_columns = _random_columns(1)
+    y_values, u_y_values = propagate_uncertainty_batch("2*pi + 1", x_columns, u_columns)
+    np.testing.assert_array_equal(y_values, np.full(N_ROWS, 2 * np.pi + 1))
+    np.testing.assert_array_equal(u_y_values, np.zeros(N_ROWS))
+
+
+def test_two_dimensional_arrays_with_var_names():
+    x_columns, u_columns = _random_columns(2)
+    x_matrix = np.column_stack([x_columns[name] for name in VAR_NAMES])
+    u_matrix = np.column_stack([u_columns[name] for name in VAR_NAMES])
+    function_str = "x1*x2/x3 + cos(x2)"
+    y_values, u_y_values = propagate_uncertainty_batch(function_str, x_matrix, u_matrix, var_names=VAR_NAMES)
+    _assert_rows_match(function_str, x_columns, u_columns, y_values, u_y_values)
+
+
+def test_broadcast_scalar_uncertainty():
+    x_columns, _ = _random_columns(3)
+    u_columns = {name: 0.01 for name in VAR_NAMES}
+    y_values, u_y_values = propagate_uncertainty_batch("x1*x2*x3", x_columns, u_columns)
+    _assert_rows_match("x1*x2*x3", x_columns, {name: np.full(N_ROWS, 0.01) for name in VAR_NAMES},
+                       y_values, u_y_values)
+
+
+def test_correlation_matrix_matches_scalar_rows():
+    x_columns, u_columns = _random_columns(4)
+    correlation = [[1.0, 0.3, -0.2], [0.3, 1.0, 0.5], [-0.2, 0.5, 1.0]]
+    function_str = "x1*x2 - x3**2"
+    y_values, u_y_values = propagate_uncertainty_batch(function_str, x_columns, u_columns, correlation=correlation)
+    _assert_rows_match(function_str, x_columns, u_columns, y_values, u_y_values, correlation=correlation)
@@ -0,0 +1,25 @@
+"""函数在测量值处无定义时，两种后端都应给出 ValueError（界面与批量计算据此显示“输入错误”）。"""
+import pytest
+
+from calculation_formulas import propagate_uncertainty
+
+U_X = {"x1": 0.1, "x2": 0.1}
+
+
+@pytest.mark.parametrize("backend", ["sympy", "autodiff"])
+@pytest.mark.parametrize("function_str, x_values", [
+    ("x1/x2", {"x1": 1.0, "x2": 0.0}),
+    ("log(x1) + x2", {"x1": 0.0, "x2": 1.0}),
+    ("x1**0.5 + x2", {"x1": -1.0, "x2": 1.0}),
+    ("x1**2 + x2", {"x1": 1e200, "x2": 1.0}),
+])
+def test_undefined_value_raises_value_error(backend, function_str, x_values):
+    with pytest.raises(ValueError):
+        propagate_uncertainty(function_str, x_values, U_X, backend=backend)
+
+
+@pytest.mark.parametrize("backend", ["sympy", "autodiff"])
+def test_defined_value_unchanged(backend):
+    y_value, u_y = propagate_uncertainty("x1/x2", {"x1": 1.0, "x2": 2.0}, U_X, backend=backend)
+    assert y_value == 0.5
+    assert u_y == pytest.approx((0.05**2 + 0.025**2) ** 0.5)
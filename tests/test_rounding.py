@@ -0,0 +1,123 @@
+"""“四舍六入五成双、5后有数就入”舍入：快速实现与基于 Decimal 的参照实现一致。"""
+from decimal import Context, Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+import pytest
+
+from calculation_formulas import custom_round_decimal, custom_round_decimal_array
+
+
+def reference_round(number: float, decimals: int) -> float:
+    """按 repr(number) 的十进制数字做 ROUND_HALF_EVEN：大于半个单位进位，恰好为5时成双，小于时舍去。"""
+    # 精度足够大，保留位数很多时 quantize 也不会因超出精度而失败
+    return float(Decimal(repr(number)).quantize(Decimal(1).scaleb(-decimals), rounding=ROUND_HALF_EVEN,
+                                                context=Context(prec=400)))
+
+
+def _assert_rounds_to(number, decimals, expected):
+    assert custom_round_decimal(number, decimals) == expected
+    assert custom_round_decimal_array([number], decimals)[0] == expected
+    assert reference_round(number, decimals) == expected
+
+
+@pytest.mark.parametrize("number, decimals, expected", [
+    # 恰好为5：成双
+    (2.5, 0, 2.0),
+    (3.5, 0, 4.0),
+    (0.125, 2, 0.12),
+    (0.375, 2, 0.38),
+    (0.15, 1, 0.2),  # 二进制值略小于 0.15，但按十进制表示恰好为5
+    (0.25, 1, 0.2),
+    (1234.5, 0, 1234.0),
+    (2.50, 0, 2.0),
+])
+def test_exact_ties_round_half_even(number, decimals, expected):
+    _assert_rounds_to(number, decimals, expected)
+
+
+@pytest.mark.parametrize("number, decimals, expected", [
+    (2.5000001, 0, 3.0),
+    (0.1250001, 2, 0.13),
+    (0.12500000000001, 2, 0.13),
+    (1.05000000001, 1, 1.1),
+    (0.2449, 2, 0.24),
+    (0.246, 2, 0.25),
+])
+def test_five_followed_by_digits_rounds_up(number, decimals, expected):
+    _assert_rounds_to(number, decimals, expected)
+
+
+@pytest.mark.parametrize("number, decimals, expected", [
+    (-2.5, 0, -2.0),
+    (-3.5, 0, -4.0),
+    (-0.375, 2, -0.38),
+    (-2.51, 0, -3.0),
+    (-0.1250001, 2, -0.13),
+    (-1.234, 2, -1.23),
+])
+def test_negative_numbers(number, decimals, expected):
+    _assert_rounds_to(number, decimals, expected)
+
+
+@pytest.mark.parametrize("number, decimals, expected", [
+    (1.5e-07, 7, 2e-07),
+    (2.5e-07, 7, 2e-07),
+    (2.50001e-07, 7, 3e-07),
+    (1.25e-05, 6, 1.2e-05),
+    (-3.5e-10, 10, -4e-10),
+    (1.4e-07, 6, 0.0),
+    (1e+16, 2, 1e16),
+    (1.2345e+20, 0, 1.2345e20),
+    (5e-324, 30, 0.0),
+])
+def test_exponent_form_repr(number, decimals, expected):
+    assert "e" in repr(number)
+    _assert_rounds_to(number, decimals, expected)
+
+
+def test_special_values_and_invalid_decimals():
+    assert custom_round_decimal(float("inf"), 2) == float("inf")
+    assert np.isnan(custom_round_decimal(float("nan"), 2))
+    assert np.isnan(custom_round_decimal_array([float("nan")], 2)[0])
+    with pytest.raises(ValueError):
+        custom_round_decimal(1.0, -1)
+    with pytest.raises(ValueError):
+        custom_round_decimal_array([1.0], -1)
+
+
+def build_corpus(n: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """随机数量级的数字、判断位恰好为5或5后有数字的数字，以及 repr 为科学计数法的极小和极大的数。"""
+    rng = np.random.default_rng(seed)
+    quarter = n // 4
+    numbers = rng.choice([-1, 1], n) * 10.0**rng.uniform(-3, 6, n)
+    decimals = rng.integers(0, 8, n)
+
+    digits = rng.integers(0, 10**7, quarter)
+    tails = rng.choice(["5", "50", "51", "5000001", "49", "6"], quarter)
+    places = rng.integers(0, 5, quarter)
+    signs = rng.choice(["", "-"], quarter)
+    numbers[:quarter] = [float(f"{s}{d / 10**p:.{p}f}{t}") if p else float(f"{s}{d}.{t}")
+                         for s, d, t, p in zip(signs, digits, tails, places)]
+    decimals[:quarter] = places
+
+    # 极小的数：repr 形如 '1.5e-07'，保留位数在数量级附近
+    exponents = rng.integers(-12, -4, quarter)
+    mantissas = rng.choice(["1.5", "2.5", "2.51", "3.45", "9.95", "7"], quarter)
+    numbers[quarter:2 * quarter] = [float(f"{m}e{e}") for m, e in zip(mantissas, exponents)]
+    decimals[quarter:2 * quarter] = -exponents + rng.integers(-1, 3, quarter)
+
+    # 极大的数 (repr 为 '1.2345e+17' 等) 与超过 22 位的保留位数
+    numbers[2 * quarter:2 * quarter + quarter // 4] = 10.0**rng.uniform(16, 20, quarter // 4)
+    decimals[3 * quarter:3 * quarter + quarter // 4] = rng.integers(20, 26, quarter // 4)
+    return numbers, decimals
+
+
+def test_scalar_and_array_match_reference_on_random_corpus():
+    numbers, decimals = build_corpus(40_000, seed=12345)
+    expected = [reference_round(x, d) for x, d in zip(numbers.tolist(), decimals.tolist())]
+    scalar = [custom_round_decimal(x, d) for x, d in zip(numbers.tolist(), decimals.tolist())]
+    vectorized = custom_round_decimal_array(numbers, decimals).tolist()
+
+    mismatches = [(x, d, e, s, v) for x, d, e, s, v in zip(numbers.tolist(), decimals.tolist(), expected, scalar, vectorized)
+                  if not e == s == v]
+    assert not mismatches, f"{len(mismatches)} 条不一致，例如 (数字, 位数, 参照, 标量, 数组): {mismatches[:5]}"
@@ -0,0 +1,59 @@
+"""流式A类统计量：分块累加、合并与一次性计算的结果一致。"""
+import math
+
+import numpy as np
+import pytest
+
+from calculation_formulas import RunningStatistics, calculate_a_uncertainty_multiple_measurements
+
+DATA = np.random.default_rng(0).normal(1e3, 0.5, 10_007)
+EXPECTED_MEAN = float(np.mean(DATA))
+EXPECTED_S_X = float(np.std(DATA, ddof=1))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 10_007])
+def test_chunked_update_matches_single_pass(chunk_size):
+    stats = RunningStatistics()
+    for start in range(0, DATA.size, chunk_size):
+        stats.update(DATA[start:start + chunk_size])
+    assert stats.count == DATA.size
+    assert stats.mean == pytest.approx(EXPECTED_MEAN, rel=1e-14)
+    assert stats.s_x == pytest.approx(EXPECTED_S_X, rel=1e-10)
+
+
+def test_merge_matches_single_pass():
+    # 大小不等的部分结果，包括空的累加器
+    parts = [RunningStatistics().update(chunk) for chunk in np.split(DATA, [1, 2, 500, 9000])]
+    parts.insert(2, RunningStatistics())
+    merged = RunningStatistics()
+    for part in parts:
+        merged.merge(part)
+    assert merged.count == DATA.size
+    assert merged.mean == pytest.approx(EXPECTED_MEAN, rel=1e-14)
+    assert merged.s_x == pytest.approx(EXPECTED_S_X, rel=1e-10)
+    assert merged.u_a(2.0) == pytest.approx(2.0 * EXPECTED_S_X / math.sqrt(DATA.size), rel=1e-10)
+
+
+def test_result_matches_multiple_measurements():
+    data = [1.02, 0.98, 1.01, 0.99, 1.00]
+    stats = RunningStatistics().update(data[:2]).merge(RunningStatistics().update(data[2:]))
+    expected = calculate_a_uncertainty_multiple_measurements(data, t_factor=1.14)
+    assert stats.result(t_factor=1.14) == pytest.approx(expected, rel=1e-12)
+
+
+def test_empty():
+    stats = RunningStatistics().update([]).merge(RunningStatistics())
+    assert stats.count == 0
+    assert stats.s_x == 0.0
+    assert stats.u_a() == 0.0
+    with pytest.raises(ValueError):
+        stats.result()
+
+
+def test_single_value():
+    stats = RunningStatistics().update(3.5)
+    assert stats.count == 1
+    assert stats.result() == (3.5, 0.0, 0.0)
+    # 合并到空累加器，或把空累加器合并进来，结果不变
+    assert RunningStatistics().merge(stats).result() == (3.5, 0.0, 0.0)
+    assert stats.merge(RunningStatistics()).result() == (3.5, 0.0, 0.0)
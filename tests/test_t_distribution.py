@@ -0,0 +1,100 @@
+"""t因子查表与 Welch–Satterthwaite 有效自由度。"""
+import math
+
+import numpy as np
+import pytest
+
+from t_distribution import (
+    propagate_uncertainty_with_dof,
+    propagate_uncertainty_with_dof_batch,
+    student_t_factor,
+    welch_satterthwaite,
+)
+
+
+def test_one_and_two_dof_match_closed_form():
+    # ν=1 时 t = tan(πp/2)，ν=2 时 t = p·√(2/(1-p²))
+    for p in (0.6827, 0.95, 0.99):
+        assert student_t_factor(1, p) == pytest.approx(math.tan(math.pi * p / 2), rel=1e-12)
+        assert student_t_factor(2, p) == pytest.approx(p * math.sqrt(2 / (1 - p * p)), rel=1e-12)
+
+
+@pytest.mark.parametrize("dof, confidence_level, expected, tolerance", [
+    # 常用 t 分布表（双侧）
+    (1, 0.95, 12.706205, 1e-6),
+    (1, 0.99, 63.656741, 1e-6),
+    (2, 0.95, 4.302653, 1e-6),
+    (2, 0.99, 9.924843, 1e-6),
+    (9, 0.95, 2.262157, 1e-6),
+    (9, 0.99, 3.249836, 1e-6),
+    (30, 0.95, 2.042272, 1e-6),
+    # GUM 表 G.2 (两位小数)
+    (1, 0.6827, 1.84, 5e-3),
+    (2, 0.6827, 1.32, 5e-3),
+    (9, 0.6827, 1.06, 5e-3),
+    # 表中节点之间按 1/ν 插值，误差小于 1e-3
+    (35, 0.95, 2.030108, 1e-3),
+    (250, 0.95, 1.969498, 1e-3),
+    # ν = ∞ 为正态分布
+    (math.inf, 0.6827, 1.000022, 1e-6),
+    (math.inf, 0.95, 1.959964, 1e-6),
+    (math.inf, 0.99, 2.575829, 1e-6),
+])
+def test_known_quantiles(dof, confidence_level, expected, tolerance):
+    assert student_t_factor(dof, confidence_level) == pytest.approx(expected, abs=tolerance)
+
+
+def test_non_integer_dof_rounds_down():
+    assert student_t_factor(9.9, 0.95) == student_t_factor(9, 0.95)
+
+
+def test_vectorized_matches_scalar():
+    dofs = np.array([1, 2, 3, 7.5, 9, 29, 30, 31, 45, 99, 150, 999, 1e4, math.inf])
+    for confidence_level in (0.6827, 0.95, 0.99):
+        expected = [student_t_factor(float(dof), confidence_level) for dof in dofs]
+        np.testing.assert_array_equal(student_t_factor(dofs, confidence_level), expected)
+
+
+def test_invalid_dof():
+    np.testing.assert_array_equal(np.isnan(student_t_factor(np.array([0.5, np.nan, 3.0]))), [True, True, False])
+    with pytest.raises(ValueError):
+        student_t_factor(0.5)
+    with pytest.raises(ValueError):
+        student_t_factor(5, 1.0)
+
+
+def test_welch_satterthwaite_sum_example():
+    # y = x1 + x2，u1 = 0.3 (ν = 4)，u2 = 0.4 (B类，ν = ∞)：u_y = 0.5，ν_eff = 0.5⁴ / (0.3⁴/4) = 30.86
+    result = propagate_uncertainty_with_dof("x1 + x2", {"x1": 1.0, "x2": 2.0}, {"x1": 0.3, "x2": 0.4}, {"x1": 4})
+    assert result.u_y == pytest.approx(0.5, rel=1e-12)
+    assert result.effective_dof == pytest.approx(0.0625 / (0.0081 / 4), rel=1e-12)
+    assert result.t_factor == student_t_factor(30, 0.95)
+    assert result.expanded_uncertainty == pytest.approx(2.042272 * 0.5, abs=1e-6)
+
+
+def test_welch_satterthwaite_product_example():
+    # y = x1·x2·x3，各输入量的相对标准不确定度为 0.25%、0.57%、0.82%，自由度为 5、8、4：
+    # (u_y/y)² = 0.25² + 0.57² + 0.82² = 1.0598 (%²)，ν_eff = 1.0598² / (0.25⁴/5 + 0.57⁴/8 + 0.82⁴/4) = 8.84
+    result = propagate_uncertainty_with_dof("x1*x2*x3", {"x1": 1.0, "x2": 1.0, "x3": 1.0},
+                                            {"x1": 0.0025, "x2": 0.0057, "x3": 0.0082}, {"x1": 5, "x2": 8, "x3": 4})
+    assert result.u_y == pytest.approx(math.sqrt(1.0598) / 100, rel=1e-12)
+    assert result.effective_dof == pytest.approx(1.0598**2 / (0.25**4 / 5 + 0.57**4 / 8 + 0.82**4 / 4), rel=1e-12)
+    assert result.t_factor == pytest.approx(2.306004, abs=1e-6)  # t_0.95(8)
+
+
+def test_welch_satterthwaite_all_infinite():
+    assert welch_satterthwaite(0.5, {"x1": 0.3, "x2": 0.4}, {}) == math.inf
+    assert welch_satterthwaite(0.0, {"x1": 0.0}, {"x1": 3}) == math.inf
+
+
+def test_batch_matches_scalar():
+    x_values = {"x1": np.array([1.0, 2.0, 3.0]), "x2": np.array([2.0, 0.5, 4.0])}
+    u_values = {"x1": np.array([0.1, 0.05, 0.3]), "x2": np.array([0.2, 0.01, 0.1])}
+    dof_values = {"x1": np.array([4, 9, 2]), "x2": 20}
+    batch = propagate_uncertainty_with_dof_batch("x1*x2", x_values, u_values, dof_values)
+    for i in range(3):
+        scalar = propagate_uncertainty_with_dof(
+            "x1*x2", {name: float(column[i]) for name, column in x_values.items()},
+            {name: float(column[i]) for name, column in u_values.items()}, {"x1": int(dof_values["x1"][i]), "x2": 20})
+        for batch_field, scalar_field in zip(batch, scalar):
+            assert batch_field[i] == pytest.approx(scalar_field, rel=1e-12)
@@ -1,9 +1,24 @@
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
 import tkinter as tk
-from calculation_formulas import propagate_uncertainty, parse_float_list ,format_uncertainty_and_value
+from calculation_formulas import propagate_uncertainty_budget, parse_float_list ,format_uncertainty_and_value, collect_stage_timings
+from calculation_worker import CalculationWorker
+from project_file import (
+    PROJECT_FILE_EXTENSION,
+    Formula,
+    Project,
+    Variable,
+    correlation_matrix,
+    read_project,
+    write_project,
+)
+from variable_table import VariableTable
 import os
-import threading
+
+# 查询后台计算进程结果的间隔 (ms)
+WORKER_POLL_INTERVAL_MS = 30
+# 实时计算：输入停止变化后等待多久 (ms) 再开始计算，避免每输入一个字符都计算一次
+LIVE_RECALC_DELAY_MS = 400
 
 # 如果要使用图片图标，请取消注释并确保图片文件存在
 # from PIL import Image
@@ -14,6 +29,11 @@ import threading
 # EXPORT_ICON_PATH = "icons/export.png"
 # INFO_ICON_PATH = "icons/info.png"
 
+def _number_text(number) -> str:
+    """项目文件中的数值在输入框中的文本，None（尚未填写）为空。"""
+    return "" if number is None else repr(number)
+
+
 class UncertaintyPropagationCalculator(ctk.CTkFrame):
     def __init__(self, master, app_instance):
         super().__init__(master, fg_color="transparent")
@@ -30,9 +50,21 @@ class UncertaintyPropagationCalculator(ctk.CTkFrame):
         self.grid_rowconfigure(7, weight=1)
 
         self.input_vars_count = 1
-        self.input_var_entries = []
+        # 从项目文件导入、界面中没有对应输入控件的内容，导出时原样写回
+        self.project_formulas = [] # 全部函数关系，界面中编辑的是第一个
+        self.variable_metadata = {} # 变量名 -> (分布类型, 自由度)
+        self.correlations = {} # (变量名, 变量名) -> 相关系数，计算时使用
         
         self.info_tooltip_window = None # 用于存储提示窗口实例
+        self.last_stage_timings = None # 最近一次计算各阶段的耗时 (StageTimings)
+
+        # 计算在后台进程中进行，界面只提交输入快照并定时查询结果
+        self.worker = CalculationWorker()
+        self.worker.start()
+        self._poll_job = None # 查询结果的 after 任务
+        self._live_job = None # 实时计算的延迟 after 任务
+        self._job_is_live = False # 当前任务是否由实时计算提交（出错时不弹窗）
+        self.live_var = tk.BooleanVar(value=False)
 
         # 移除与鼠标悬浮相关的标志位和任务ID
         # self._tooltip_show_job = None
@@ -72,6 +104,7 @@ class UncertaintyPropagationCalculator(ctk.CTkFrame):
         
         self.function_entry = ctk.CTkEntry(function_input_frame, placeholder_text="例如: x1*x2 + sin(x3)", height=35, font=("Arial", 16))
         self.function_entry.grid(row=0, column=1, padx=(0, 10), pady=0, sticky="ew")
+        self.function_entry.bind("<KeyRelease>", self._on_input_changed)
 
         self.info_button = ctk.CTkButton(
             function_input_frame,
@@ -93,18 +126,17 @@ class UncertaintyPropagationCalculator(ctk.CTkFrame):
         
         # ... (以下部分保持不变) ...
 
-        self.input_vars_frame = ctk.CTkScrollableFrame(
+        # 只为可见的行创建输入框，物理量很多时添加、删除和滚动的开销都不随物理量个数增长
+        self.input_vars_frame = VariableTable(
             self, 
-            label_text="输入物理量 (x, ux)", 
+            label_text="输入物理量 (名称, x, ux)", 
             height=200, 
             corner_radius=12, 
             fg_color=("gray92", "gray10"),
-            label_font=("Arial", 17, "bold")
+            label_font=("Arial", 17, "bold"),
+            on_change=self._on_input_changed
         )
         self.input_vars_frame.grid(row=2, column=0, columnspan=2, padx=30, pady=15, sticky="nsew")
-        self.input_vars_frame.grid_columnconfigure(0, weight=0)
-        self.input_vars_frame.grid_columnconfigure(1, weight=1)
-        self.input_vars_frame.grid_columnconfigure(2, weight=1)
 
         self.add_var_button = ctk.CTkButton(
             self, 
@@ -141,6 +173,15 @@ class UncertaintyPropagationCalculator(ctk.CTkFrame):
         )
         self.calculate_button.grid(row=4, column=0, columnspan=2, pady=25)
 
+        self.live_switch = ctk.CTkSwitch(
+            self,
+            text="实时计算",
+            variable=self.live_var,
+            command=self._on_input_changed,
+            font=("Arial", 15)
+        )
+        self.live_switch.grid(row=4, column=1, padx=30, pady=25, sticky="e")
+
         self.result_frame = ctk.CTkFrame(self, fg_color="transparent")
         self.result_frame.grid(row=5, column=0, columnspan=2, padx=30, pady=(10, 20), sticky="ew")
         self.result_frame.grid_columnconfigure((0, 1), weight=1)
@@ -149,6 +190,13 @@ class UncertaintyPropagationCalculator(ctk.CTkFrame):
         self.result_value_label.grid(row=0, column=0, padx=15, pady=8, sticky="w")
         self.result_uncertainty_label = ctk.CTkLabel(self.result_frame, text="输出不确定度 (uy): ", font=("Arial", 22, "bold"))
         self.result_uncertainty_label.grid(row=0, column=1, padx=15, pady=8, sticky="w")
+        self.timing_label = ctk.CTkLabel(self.result_frame, text="", font=("Arial", 13), text_color=("gray40", "gray60"))
+        self.timing_label.grid(row=1, column=0, columnspan=2, padx=15, pady=(0, 4), sticky="w")
+        # 不确定度预算表：各输入量的灵敏系数、不确定度分量及占比，计算成功后显示
+        self.budget_textbox = ctk.CTkTextbox(self.result_frame, height=110, font=("Courier New", 13), wrap="none")
+        self.budget_textbox.grid(row=2, column=0, columnspan=2, padx=15, pady=(0, 4), sticky="ew")
+        self.budget_textbox.configure(state="disabled")
+        self.budget_textbox.grid_remove()
         
         self.io_frame = ctk.CTkFrame(self, fg_color="transparent")
         self.io_frame.grid(row=6, column=0, columnspan=2, padx=30, pady=(10, 10), sticky="ew")
@@ -315,174 +363,252 @@ class UncertaintyPropagationCalculator(ctk.CTkFrame):
     # _schedule_show_tooltip, _on_info_button_enter, _on_info_button_leave,
     # _on_tooltip_window_enter, _on_tooltip_window_leave, _schedule_hide_tooltip, _cancel_hide_tooltip
 
-    def render_input_variables(self):
-        # ... (此方法保持不变) ...
-        for label, value_entry, uncertainty_entry in self.input_var_entries:
-            label.destroy()
-            value_entry.destroy()
-            uncertainty_entry.destroy()
-        self.input_var_entries.clear()
-
-        for i in range(self.input_vars_count):
-            row_num = i 
-            
-            var_name_label = ctk.CTkLabel(self.input_vars_frame, text=f"x{i+1}:", font=("Arial", 16, "bold"))
-            var_name_label.grid(row=row_num, column=0, padx=(15, 5), pady=10, sticky="e")
-
-            value_entry = ctk.CTkEntry(self.input_vars_frame, placeholder_text=f"x{i+1} 测量值", width=160, height=32, font=("Arial", 15))
-            value_entry.grid(row=row_num, column=1, padx=5, pady=10, sticky="ew")
-
-            uncertainty_entry = ctk.CTkEntry(self.input_vars_frame, placeholder_text=f"ux{i+1} 不确定度", width=160, height=32, font=("Arial", 15))
-            uncertainty_entry.grid(row=row_num, column=2, padx=(5, 15), pady=10, sticky="ew")
-            
-            self.input_var_entries.append([var_name_label, value_entry, uncertainty_entry])
-
+    def render_input_variables(self, variables=None):
+        """
+        替换输入物理量表格的全部内容。variables 为 [(名称, 测量值文本, 不确定度文本), ...]，
+        省略时为 input_vars_count 个空白的 x1, x2, ...
+        """
+        if variables is None:
+            variables = [(f"x{i+1}", "", "") for i in range(self.input_vars_count)]
+        self.input_vars_frame.set_rows(variables)
+        self.input_vars_count = len(self.input_vars_frame)
+
+    def _next_variable_name(self):
+        """新物理量的默认名称：x1, x2, ... 中第一个未被使用的名称。"""
+        index = len(self.input_vars_frame) + 1
+        while self.input_vars_frame.name_in_use(f"x{index}"):
+            index += 1
+        return f"x{index}"
 
     def add_input_variable(self):
-        self.input_vars_count += 1
-        self.render_input_variables()
+        # 只在表格末尾添加一行数据，已填写的内容不受影响
+        self.input_vars_frame.append_row(self._next_variable_name())
+        self.input_vars_count = len(self.input_vars_frame)
+        self._on_input_changed()
 
     def remove_input_variable(self):
         if self.input_vars_count > 1:
-            self.input_vars_count -= 1
-            self.render_input_variables()
+            self.input_vars_frame.pop_row()
+            self.input_vars_count = len(self.input_vars_frame)
+            self._on_input_changed()
         else:
             messagebox.showwarning("警告", "至少需要一个输入物理量。")
 
-    def perform_calculation_thread(self):
-        # ... (此方法保持不变) ...
-        self.calculate_button.configure(state="disabled", text="计算中...")
-        self.import_button.configure(state="disabled")
-        self.export_button.configure(state="disabled")
-        self.add_var_button.configure(state="disabled")
-        self.remove_var_button.configure(state="disabled")
-        self.back_button.configure(state="disabled")
-        
-        thread = threading.Thread(target=self._perform_propagation_calculation_safe)
-        thread.start()
-
-    def _perform_propagation_calculation_safe(self):
-        # ... (此方法保持不变) ...
-        try:
-            function_str = self.function_entry.get().strip()
-            
-            x_values_collected = {}
-            u_x_values_collected = {}
-
-            for i, entries in enumerate(self.input_var_entries):
-                var_name = f"x{i+1}"
-                
-                if not entries[1].winfo_exists() or not entries[2].winfo_exists():
-                    raise ValueError(f"物理量 {var_name} 的输入框已被销毁，请重新输入。")
-
-                x_str = entries[1].get().strip()
-                ux_str = entries[2].get().strip()
-
-                if not x_str or not ux_str:
-                    raise ValueError(f"物理量 {var_name} 的测量值和不确定度不能为空。")
-                
-                try:
-                    x_values_collected[var_name] = float(x_str)
-                    u_x_values_collected[var_name] = float(ux_str)
-                except ValueError:
-                    raise ValueError(f"物理量 {var_name} 的测量值或不确定度必须是有效数字。")
-
-            if not x_values_collected:
-                raise ValueError("请至少添加一个输入物理量。")
+    def _read_variable_name(self, row, used_names):
+        var_name = row[0].strip()
+        if not var_name.isidentifier():
+            raise ValueError(f"物理量名称 '{var_name}' 不是有效的变量名（应以字母开头，只含字母、数字和下划线）。")
+        if var_name in used_names:
+            raise ValueError(f"物理量名称 '{var_name}' 重复。")
+        return var_name
+
+    def _snapshot_inputs(self) -> tuple:
+        """
+        在界面线程中读取函数表达式和各物理量，返回 (函数表达式, 测量值, 不确定度, 相关系数矩阵)，
+        没有相关的物理量时相关系数矩阵为 None；输入不完整时抛出 ValueError。
+        """
+        function_str = self.function_entry.get().strip()
+        if not function_str:
+            raise ValueError("函数表达式不能为空。")
+
+        x_values_collected = {}
+        u_x_values_collected = {}
+        for row in self.input_vars_frame.get_rows():
+            var_name = self._read_variable_name(row, x_values_collected)
+            x_str = row[1].strip()
+            ux_str = row[2].strip()
+
+            if not x_str or not ux_str:
+                raise ValueError(f"物理量 {var_name} 的测量值和不确定度不能为空。")
 
-            y_value, u_y = propagate_uncertainty(function_str, x_values_collected, u_x_values_collected)
+            try:
+                x_values_collected[var_name] = float(x_str)
+                u_x_values_collected[var_name] = float(ux_str)
+            except ValueError:
+                raise ValueError(f"物理量 {var_name} 的测量值或不确定度必须是有效数字。")
 
-            self.app.after(10, self._update_results, y_value, u_y, None)
+        if not x_values_collected:
+            raise ValueError("请至少添加一个输入物理量。")
+        correlation = correlation_matrix(self.correlations, x_values_collected)
+        return function_str, x_values_collected, u_x_values_collected, correlation
 
+    def perform_calculation_thread(self):
+        """计算按钮：没有任务时提交计算，计算进行中时取消计算。"""
+        if self.worker.busy and not self._job_is_live:
+            self.worker.cancel()
+            self._set_busy(False)
+            self.timing_label.configure(text="计算已取消")
+            return
+        try:
+            snapshot = self._snapshot_inputs()
+        except ValueError as e:
+            self._update_results(None, None, ("输入错误", str(e)))
+            return
+        self._submit(snapshot, live=False)
+
+    def _submit(self, snapshot, live: bool):
+        """把输入快照交给后台进程；之前尚未完成的计算被取代。"""
+        self._job_is_live = live
+        self.worker.submit(propagate_uncertainty_budget, *snapshot)
+        self._set_busy(True)
+        if self._poll_job is None:
+            self._poll_job = self.after(WORKER_POLL_INTERVAL_MS, self._poll_worker)
+
+    def _poll_worker(self):
+        self._poll_job = None
+        result = self.worker.poll()
+        if result is not None:
+            if result.error:
+                self._update_results(None, None, result.error, live=self._job_is_live)
+            else:
+                y_value, u_y, budget = result.value
+                self._update_results(y_value, u_y, None, result.timings, budget=budget)
+        if self.worker.busy:
+            self._poll_job = self.after(WORKER_POLL_INTERVAL_MS, self._poll_worker)
+        else:
+            self._set_busy(False)
+
+    def _on_input_changed(self, event=None):
+        """输入变化时，若开启了实时计算，则在输入停止 LIVE_RECALC_DELAY_MS 毫秒后重新计算。"""
+        if self._live_job is not None:
+            self.after_cancel(self._live_job)
+            self._live_job = None
+        if self.live_var.get():
+            self._live_job = self.after(LIVE_RECALC_DELAY_MS, self._live_recalculate)
+
+    def _live_recalculate(self):
+        self._live_job = None
+        try:
+            snapshot = self._snapshot_inputs()
         except ValueError as e:
-            self.app.after(10, self._update_results, None, None, ("输入错误", str(e)))
-        except Exception as e:
-            self.app.after(10, self._update_results, None, None, ("计算错误", f"发生未知错误: {e}"))
-        finally:
-            self.app.after(10, self._re_enable_buttons)
+            # 正在输入中，不弹窗，只提示缺少的内容
+            self.timing_label.configure(text=f"等待输入: {e}")
+            return
+        self._submit(snapshot, live=True)
 
-    def _update_results(self, y_value, u_y, error_info):
-        # ... (此方法保持不变) ...
+    def _update_results(self, y_value, u_y, error_info, timings=None, live=False, budget=None):
         if error_info:
-            messagebox.showerror(error_info[0], error_info[1])
+            if not live:
+                messagebox.showerror(error_info[0], error_info[1])
             self.result_value_label.configure(text=f"输出测量值 (y): ")
             self.result_uncertainty_label.configure(text=f"输出不确定度 (uy): ")
+            self.timing_label.configure(text=f"{error_info[0]}: {error_info[1]}" if live else "")
+            self._show_budget(None)
         else:
-            formatted_value, formatted_uncertainty = format_uncertainty_and_value(y_value, u_y)
+            # 格式化的耗时与计算进程中记录的计算耗时合并显示
+            with collect_stage_timings(timings) as timings:
+                formatted_value, formatted_uncertainty = format_uncertainty_and_value(y_value, u_y)
             self.result_value_label.configure(text=f"输出测量值 (y): {formatted_value}")
             self.result_uncertainty_label.configure(text=f"输出不确定度 (uy): {formatted_uncertainty}")
+            self.last_stage_timings = timings
+            self.timing_label.configure(text=f"耗时: {timings.format_summary()}")
+            self._show_budget(budget)
+
+    def _show_budget(self, budget):
+        """显示不确定度预算表（已按贡献从大到小排列）；budget 为 None 或空时隐藏。"""
+        if not budget:
+            self.budget_textbox.grid_remove()
+            return
+        lines = [f"{'变量':<6}{'灵敏系数 c':>14}{'u(x)':>12}{'|c|·u(x)':>12}{'占比':>9}"]
+        for entry in budget:
+            lines.append(
+                f"{entry['variable']:<8}{entry['sensitivity']:>14.5g}{entry['uncertainty']:>12.4g}"
+                f"{entry['contribution']:>12.4g}{entry['share'] * 100:>10.1f}%"
+            )
+        self.budget_textbox.configure(state="normal")
+        self.budget_textbox.delete("0.0", "end")
+        self.budget_textbox.insert("0.0", "\n".join(lines))
+        self.budget_textbox.configure(state="disabled")
+        self.budget_textbox.grid()
+
+    def _set_busy(self, busy: bool):
+        """计算期间界面的其他部分保持可用，计算按钮变为取消按钮。"""
+        if busy:
+            self.calculate_button.configure(text="计算中... (点击取消)")
+        else:
+            self.calculate_button.configure(text="计算传递不确定度")
 
-    def _re_enable_buttons(self):
-        # ... (此方法保持不变) ...
-        self.calculate_button.configure(state="normal", text="计算传递不确定度")
-        self.import_button.configure(state="normal")
-        self.export_button.configure(state="normal")
-        self.add_var_button.configure(state="normal")
-        self.remove_var_button.configure(state="normal")
-        self.back_button.configure(state="normal")
+    def destroy(self):
+        # 离开页面时停止定时任务并关闭后台计算进程
+        for job in (self._poll_job, self._live_job):
+            if job is not None:
+                self.after_cancel(job)
+        self._poll_job = self._live_job = None
+        self.worker.close()
+        super().destroy()
 
 
     def import_config(self):
-        # ... (此方法保持不变) ...
         file_path = filedialog.askopenfilename(
-            title="选择配置文件",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+            title="选择项目文件",
+            filetypes=[("项目文件", f"*{PROJECT_FILE_EXTENSION}"), ("旧版配置文件", "*.txt"), ("All files", "*.*")]
         )
         if file_path:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    if len(lines) < 2:
-                        raise ValueError("文件内容格式不正确。至少需要函数表达式和一组物理量数据。")
-                    
-                    self.function_entry.delete(0, ctk.END)
-                    self.function_entry.insert(0, lines[0].strip())
-
-                    input_data = []
-                    for line in lines[1:]:
-                        parts = [p.strip() for p in line.strip().split(',')]
-                        if len(parts) == 2:
-                            input_data.append((parts[0], parts[1]))
-                        else:
-                            raise ValueError(f"物理量行格式不正确: {line.strip()}。应为 '值,不确定度'。")
-                    
-                    self.input_vars_count = len(input_data)
-                    self.render_input_variables()
-
-                    for i, (value_str, uncertainty_str) in enumerate(input_data):
-                        if i < len(self.input_var_entries):
-                            self.input_var_entries[i][1].delete(0, ctk.END)
-                            self.input_var_entries[i][1].insert(0, value_str)
-                            self.input_var_entries[i][2].delete(0, ctk.END)
-                            self.input_var_entries[i][2].insert(0, uncertainty_str)
-                        else:
-                            messagebox.showwarning("警告", "导入的物理量数量与UI创建的输入框数量不完全匹配。")
-                            break
-
-                messagebox.showinfo("导入成功", "配置已成功导入。")
+                project = read_project(file_path)
             except Exception as e:
                 messagebox.showerror("导入失败", f"无法导入配置文件: {e}")
+                return
+            self.load_project(project)
+
+            message = "配置已成功导入。"
+            if len(project.formulas) > 1:
+                message += f"\n项目包含 {len(project.formulas)} 个函数关系，界面中显示第一个，导出时其余函数关系会保留。"
+            messagebox.showinfo("导入成功", message)
+            self._on_input_changed()
+
+    def load_project(self, project: Project):
+        """用项目文件的内容替换界面中的函数关系和物理量。"""
+        self.project_formulas = list(project.formulas)
+        self.variable_metadata = {
+            variable.name: (variable.distribution, variable.dof) for variable in project.variables
+        }
+        self.correlations = dict(project.correlations)
+
+        self.function_entry.delete(0, ctk.END)
+        if project.formulas:
+            self.function_entry.insert(0, project.formulas[0].expression)
+        # 项目中没有物理量时显示一个空白的 x1
+        self.render_input_variables([
+            (variable.name, _number_text(variable.value), _number_text(variable.uncertainty))
+            for variable in project.variables
+        ] or None)
+
+    def collect_project(self) -> Project:
+        """把界面中的内容（及导入时保留的其余内容）整理为项目；尚未填写的测量值和不确定度记为 None。"""
+        formulas = list(self.project_formulas) or [Formula("y", "")]
+        formulas[0] = formulas[0]._replace(expression=self.function_entry.get().strip())
+
+        variables = []
+        used_names = set()
+        for row in self.input_vars_frame.get_rows():
+            var_name = self._read_variable_name(row, used_names)
+            used_names.add(var_name)
+            numbers = []
+            for text, label in ((row[1], "测量值"), (row[2], "不确定度")):
+                text = text.strip()
+                try:
+                    numbers.append(float(text) if text else None)
+                except ValueError:
+                    raise ValueError(f"物理量 {var_name} 的{label}必须是有效数字。")
+            distribution, dof = self.variable_metadata.get(var_name, (None, None))
+            variables.append(Variable(var_name, *numbers, distribution, dof))
+
+        correlations = {
+            pair: coefficient for pair, coefficient in self.correlations.items()
+            if pair[0] in used_names and pair[1] in used_names
+        }
+        return Project(formulas, variables, correlations)
 
     def export_config(self):
-        # ... (此方法保持不变) ...
         file_path = filedialog.asksaveasfilename(
-            title="保存配置文件",
-            defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+            title="保存项目文件",
+            defaultextension=PROJECT_FILE_EXTENSION,
+            filetypes=[("项目文件", f"*{PROJECT_FILE_EXTENSION}"), ("All files", "*.*")]
         )
         if file_path:
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(self.function_entry.get().strip() + "\n")
-                    
-                    for i, entries in enumerate(self.input_var_entries):
-                        if entries[1].winfo_exists() and entries[2].winfo_exists():
-                            value = entries[1].get().strip()
-                            uncertainty = entries[2].get().strip()
-                            f.write(f"{value},{uncertainty}\n")
-                        else:
-                            messagebox.showwarning("警告", f"物理量 x{i+1} 的输入框已销毁，未导出。")
-
+                write_project(file_path, self.collect_project())
                 messagebox.showinfo("导出成功", f"配置已成功导出到 {os.path.basename(file_path)}")
             except Exception as e:
-                messagebox.showerror("导出失败", f"无法导出配置文件: {e}")
\ No newline at end of file
+                messagebox.showerror("导出失败", f"无法导出配置文件: {e}")
@@ -0,0 +1,204 @@
+"""
+不确定度传递页面的输入物理量表格。
+
+物理量保存在 rows 列表中（每行为 [名称, 测量值文本, 不确定度文本]），界面只为可见的几行创建输入框：
+滚动时把这组输入框重新填入对应行的内容；添加、删除物理量只修改列表，并只在可见行数变化时创建或销毁一行输入框。
+因此输入框的个数只取决于表格的高度，与物理量的个数无关，添加 n 个物理量的控件开销为 O(n) 而不是 O(n²)。
+"""
+import sys
+from collections import Counter
+import customtkinter as ctk
+
+# 每行的高度 (未缩放的像素)：输入框高 32，上下边距各 10
+ROW_HEIGHT_PX = 52
+# 表格至少显示的行数
+MIN_VISIBLE_ROWS = 1
+
+NAME_COLUMN, VALUE_COLUMN, UNCERTAINTY_COLUMN = 0, 1, 2
+
+
+class VariableTable(ctk.CTkFrame):
+    """
+    只为可见的行创建输入框的物理量表格，外观与 CTkScrollableFrame 相同（顶部标题、右侧滚动条）。
+    Args:
+        master: 父控件。
+        label_text (str): 标题。
+        height (int): 表格区域的初始高度，随父控件分配的空间变化时可见行数随之增减。
+        on_change (callable, optional): 输入框内容被编辑时调用，参数为 tkinter 事件。
+    """
+
+    def __init__(self, master, label_text="", label_font=None, height=200, on_change=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_change = on_change
+        self.rows = [] # 全部物理量，每行为 [名称, 测量值文本, 不确定度文本]
+        self._name_counts = Counter() # 名称（去掉首尾空格）-> 行数，随 rows 增量维护
+        self._slots = [] # 可见行的输入框，每行为 [名称输入框, 测量值输入框, 不确定度输入框]
+        self._first_row = 0 # 第一个可见行在 rows 中的下标
+        self._capacity = max(MIN_VISIBLE_ROWS, height // ROW_HEIGHT_PX) # 表格高度能容纳的行数
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self._label = ctk.CTkLabel(
+            self,
+            text=label_text,
+            font=label_font,
+            corner_radius=self.cget("corner_radius"),
+            fg_color=ctk.ThemeManager.theme["CTkScrollableFrame"]["label_fg_color"]
+        )
+        self._label.grid(row=0, column=0, columnspan=2, padx=self.cget("border_width"), sticky="ew")
+
+        self._body = ctk.CTkFrame(self, fg_color="transparent", height=height)
+        self._body.grid(row=1, column=0, padx=(6, 0), pady=6, sticky="nsew")
+        # 表格的高度由父控件决定，不随输入框的个数伸缩
+        self._body.grid_propagate(False)
+        self._body.grid_columnconfigure(0, weight=0)
+        self._body.grid_columnconfigure(1, weight=1)
+        self._body.grid_columnconfigure(2, weight=1)
+        self._body.bind("<Configure>", self._on_body_resized)
+        self._bind_mouse_wheel(self._body)
+
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.grid(row=1, column=1, padx=(0, 6), pady=6, sticky="ns")
+
+    def __len__(self):
+        return len(self.rows)
+
+    # --- 数据 ---
+
+    def name_in_use(self, var_name: str) -> bool:
+        """是否已有名称为 var_name 的物理量（首尾空格不计）；不遍历全部物理量。"""
+        self._store_visible()
+        return self._name_counts[var_name.strip()] > 0
+
+    def get_rows(self) -> list[list[str]]:
+        """返回全部物理量 [[名称, 测量值文本, 不确定度文本], ...]（表格内部的列表，调用者不应修改）。"""
+        self._store_visible()
+        return self.rows
+
+    def set_rows(self, rows) -> None:
+        """用 [(名称, 测量值文本, 不确定度文本), ...] 替换全部物理量，并滚动到开头。"""
+        self.rows = [[str(var_name), str(value_str), str(uncertainty_str)]
+                     for var_name, value_str, uncertainty_str in rows]
+        self._name_counts = Counter(row[NAME_COLUMN].strip() for row in self.rows)
+        self._first_row = 0
+        self._refresh()
+
+    def append_row(self, var_name: str, value_str: str = "", uncertainty_str: str = "") -> None:
+        """在末尾添加一个物理量，并滚动到该行。"""
+        self._store_visible()
+        self.rows.append([var_name, value_str, uncertainty_str])
+        self._name_counts[var_name.strip()] += 1
+        self._first_row = len(self.rows) - self._capacity
+        self._refresh()
+
+    def pop_row(self) -> list[str]:
+        """删除并返回最后一个物理量。"""
+        self._store_visible()
+        row = self.rows.pop()
+        self._name_counts[row[NAME_COLUMN].strip()] -= 1
+        self._refresh()
+        return row
+
+    def scroll_to(self, first_row: int) -> None:
+        """滚动表格，使 rows[first_row] 成为第一个可见行（超出范围时取最近的有效位置）。"""
+        self._store_visible()
+        self._first_row = first_row
+        self._refresh()
+
+    # --- 可见行 ---
+
+    def _store_visible(self) -> None:
+        """把可见输入框中的内容写回 rows（键盘以外的方式，例如鼠标粘贴，也能被保存）。"""
+        for k, slot in enumerate(self._slots):
+            row = self.rows[self._first_row + k]
+            var_name = slot[NAME_COLUMN].get()
+            if var_name != row[NAME_COLUMN]:
+                self._name_counts[row[NAME_COLUMN].strip()] -= 1
+                self._name_counts[var_name.strip()] += 1
+            for column, entry in enumerate(slot):
+                row[column] = entry.get()
+
+    def _refresh(self) -> None:
+        """按 rows 和 _first_row 更新可见的输入框，只创建或销毁可见行数的变化量。"""
+        visible = min(self._capacity, len(self.rows))
+        while len(self._slots) < visible:
+            self._slots.append(self._create_slot(len(self._slots)))
+        while len(self._slots) > visible:
+            for entry in self._slots.pop():
+                entry.destroy()
+
+        self._first_row = max(0, min(self._first_row, len(self.rows) - visible))
+        for k, slot in enumerate(self._slots):
+            self._fill_slot(slot, self.rows[self._first_row + k])
+
+        if self.rows:
+            self._scrollbar.set(self._first_row / len(self.rows), (self._first_row + visible) / len(self.rows))
+        else:
+            self._scrollbar.set(0.0, 1.0)
+
+    def _create_slot(self, row_num: int) -> list:
+        name_entry = ctk.CTkEntry(self._body, width=80, height=32, font=("Arial", 16, "bold"), justify="right")
+        name_entry.grid(row=row_num, column=0, padx=(15, 5), pady=10, sticky="e")
+
+        value_entry = ctk.CTkEntry(self._body, placeholder_text="测量值", width=160, height=32, font=("Arial", 15))
+        value_entry.grid(row=row_num, column=1, padx=5, pady=10, sticky="ew")
+
+        uncertainty_entry = ctk.CTkEntry(self._body, placeholder_text="不确定度", width=160, height=32, font=("Arial", 15))
+        uncertainty_entry.grid(row=row_num, column=2, padx=(5, 15), pady=10, sticky="ew")
+
+        for entry in (name_entry, value_entry, uncertainty_entry):
+            entry.bind("<KeyRelease>", self._on_key_release)
+            self._bind_mouse_wheel(entry)
+        return [name_entry, value_entry, uncertainty_entry]
+
+    def _fill_slot(self, slot: list, row: list) -> None:
+        var_name = row[NAME_COLUMN]
+        for entry, text in zip(slot, row):
+            # 内容未变的输入框不重写，正在编辑的光标位置不受影响
+            if entry.get() != text:
+                entry.delete(0, ctk.END)
+                if text:
+                    entry.insert(0, text)
+        for column, placeholder in ((VALUE_COLUMN, f"{var_name} 测量值"), (UNCERTAINTY_COLUMN, f"u{var_name} 不确定度")):
+            if slot[column].cget("placeholder_text") != placeholder:
+                slot[column].configure(placeholder_text=placeholder)
+
+    def _on_key_release(self, event=None):
+        if self.on_change is not None:
+            self.on_change(event)
+
+    # --- 滚动 ---
+
+    def _on_body_resized(self, event):
+        capacity = max(MIN_VISIBLE_ROWS, int(event.height // self._apply_widget_scaling(ROW_HEIGHT_PX)))
+        if capacity != self._capacity:
+            self._store_visible()
+            self._capacity = capacity
+            self._refresh()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        # 与 tkinter 的 yscrollcommand 协议相同: ('moveto', 比例) 或 ('scroll', 步数, 'units' / 'pages')
+        if action == "moveto":
+            first_row = round(float(amount) * len(self.rows))
+        elif unit == "pages":
+            first_row = self._first_row + int(amount) * max(1, len(self._slots))
+        else:
+            first_row = self._first_row + int(amount)
+        if first_row != self._first_row:
+            self.scroll_to(first_row)
+
+    def _bind_mouse_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_mouse_wheel)
+        widget.bind("<Button-4>", self._on_mouse_wheel)
+        widget.bind("<Button-5>", self._on_mouse_wheel)
+
+    def _on_mouse_wheel(self, event):
+        # 与 CTkScrollbar 的滚轮处理相同
+        if sys.platform.startswith("win"):
+            delta = -int(event.delta / 40)
+        elif sys.platform == "darwin":
+            delta = -event.delta
+        else:
+            delta = -1 if event.num == 4 else 1
+        self._on_scrollbar("scroll", delta, "units")